@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class BaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.base'
+
+    def ready(self):
+        from apps.base.metrics import install_query_recorder
+        from apps.base.routers import check_pin_cache
+
+        check_pin_cache()
+        connection_created.connect(install_query_recorder)
@@ -0,0 +1,25 @@
+"""
+Checks on the cache backends that must be shared between processes.
+
+The user, recipe response and primary pin caches are invalidated by the
+process handling a write and read by every other one, so they are only
+correct in a cache every process sees, like Redis or memcached, or when
+the app is served by a single process, like runserver.
+"""
+from django.conf import settings
+
+DUMMY_CACHE_BACKEND = 'django.core.cache.backends.dummy.DummyCache'
+# Backends only visible to the process, or host, that writes to them.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+def is_shared_cache(alias):
+    """Return whether what one process stores in a cache is seen by all."""
+    backend = settings.CACHES[alias]['BACKEND']
+    if backend == DUMMY_CACHE_BACKEND:
+        return False
+
+    return settings.SINGLE_PROCESS or backend not in LOCAL_CACHE_BACKENDS
@@ -0,0 +1,220 @@
+"""
+A bounded, thread safe pool of database connections.
+
+Connections are checked out when Django connects and returned when it
+closes them, so with CONN_MAX_AGE = 0 each request borrows a connection
+for its duration instead of opening a new one.
+"""
+import threading
+import time
+from collections import deque
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Hand out at most `size` connections, waiting up to `timeout` seconds
+    for one to be returned when they are all in use.
+
+    Idle connections are health checked with `check` before reuse once
+    they have been idle for `check_interval` seconds, and replaced once
+    they are older than `max_lifetime` seconds.
+    """
+
+    def __init__(self, size, timeout=5, max_lifetime=1800,
+                 check_interval=30, check=None, reset=None):
+        self._check = check
+        self._reset = reset
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._created = {}
+        self._open = 0
+        self._in_use = 0
+        self._closed = False
+        self._exhausted_since = None
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.discards = 0
+        self.exhausted_time = 0.0
+
+    def _checked_out(self):
+        self.checkouts += 1
+        self._in_use += 1
+        if self._in_use >= self.size and self._exhausted_since is None:
+            self._exhausted_since = time.monotonic()
+
+    def _checked_in(self):
+        self._in_use -= 1
+        if self._exhausted_since is not None and self._in_use < self.size:
+            self.exhausted_time += time.monotonic() - self._exhausted_since
+            self._exhausted_since = None
+
+    def _expired(self, connection, now):
+        return now - self._created[id(connection)] > self.max_lifetime
+
+    def _discard(self, connection):
+        """Close a connection and free its slot. Called with the lock held."""
+        self._created.pop(id(connection), None)
+        self._open -= 1
+        self.discards += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def getconn(self, connect):
+        """
+        Check out a connection, opening one with `connect` if none is
+        idle and the pool is not full.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    connection = returned_at = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'No connection available within {self.timeout}s, '
+                        f'all {self.size} are in use.'
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            self._checked_out()
+            if waited:
+                wait_time = time.monotonic() - start
+                self.waits += 1
+                self.wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        if connection is not None:
+            connection = self._validate(connection, returned_at)
+        if connection is None:
+            connection = self._new_connection(connect)
+
+        return connection
+
+    def _validate(self, connection, returned_at):
+        """Return the idle connection if it is still usable, else None."""
+        now = time.monotonic()
+        usable = not connection.closed and not self._expired(connection, now)
+        if usable and self._check and now - returned_at >= self.check_interval:
+            try:
+                self._check(connection)
+            except Exception:
+                usable = False
+        if usable:
+            return connection
+
+        with self._cond:
+            self._discard(connection)
+            # Keep the slot for the replacement connection.
+            self._open += 1
+        return None
+
+    def _new_connection(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._cond:
+                self._open -= 1
+                self._checked_in()
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self.connects += 1
+            self._created[id(connection)] = time.monotonic()
+        return connection
+
+    def putconn(self, connection, discard=False):
+        """Return a connection, closing it when it cannot be reused."""
+        if not discard and not connection.closed and self._reset:
+            try:
+                self._reset(connection)
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._checked_in()
+            if discard or self._closed or connection.closed or (
+                self._expired(connection, time.monotonic())
+            ):
+                self._discard(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        """Close the idle connections, and the others as they return."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return the pool size, usage and counters."""
+        with self._cond:
+            exhausted_time = self.exhausted_time
+            if self._exhausted_since is not None:
+                exhausted_time += time.monotonic() - self._exhausted_since
+            return {
+                'size': self.size,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'exhausted': self._exhausted_since is not None,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_time': round(self.wait_time, 6),
+                'max_wait_time': round(self.max_wait_time, 6),
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'discards': self.discards,
+                'exhausted_time': round(exhausted_time, 6),
+            }
+
+
+def get_pool(key, factory):
+    """Return the pool registered under `key`, creating it if needed."""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+
+        return pool
+
+
+def close_pools():
+    """Close and forget every pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,98 @@
+"""
+PostgreSQL backend that borrows connections from a per-process pool.
+
+Configured with a POOL entry in the database settings, for example
+`{'SIZE': 10, 'TIMEOUT': 5, 'MAX_LIFETIME': 1800, 'CHECK_INTERVAL': 30}`.
+A SIZE of 0 disables pooling.
+"""
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from apps.base.db.pool import ConnectionPool, close_pools, get_pool
+
+
+def check_connection(connection):
+    """Raise if a connection no longer answers."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def reset_connection(connection):
+    """Roll back whatever a returned connection left open."""
+    if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+class PooledDatabaseCreation(DatabaseCreation):
+    """Close pooled connections before the test database is dropped."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = PooledDatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._connection_pool = None
+
+    def get_pool(self, conn_params=None):
+        """Return the pool for the current settings, None when disabled."""
+        options = self.settings_dict.get('POOL') or {}
+        if not options.get('SIZE'):
+            return None
+
+        if conn_params is None:
+            conn_params = self.get_connection_params()
+        key = (
+            self.alias,
+            repr(sorted(conn_params.items())),
+            repr(sorted(self.settings_dict['OPTIONS'].items())),
+        )
+
+        def create_pool():
+            return ConnectionPool(
+                size=options['SIZE'],
+                timeout=options.get('TIMEOUT', 5),
+                max_lifetime=options.get('MAX_LIFETIME', 1800),
+                check_interval=options.get('CHECK_INTERVAL', 30),
+                check=check_connection,
+                reset=reset_connection,
+            )
+
+        return get_pool(key, create_pool)
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        connection = pool.getconn(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params,
+            )
+        )
+        # Set by the base class only when it opens a new connection.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get(
+                'isolation_level', IsolationLevel.READ_COMMITTED,
+            )
+        )
+        self._connection_pool = pool
+        return connection
+
+    def _close(self):
+        pool = self._connection_pool
+        if pool is None or self.connection is None:
+            return super()._close()
+
+        self._connection_pool = None
+        with self.wrap_database_errors:
+            # Django keeps referencing a connection closed inside an atomic
+            # block, so it must not be handed to another thread.
+            pool.putconn(self.connection, discard=self.in_atomic_block)
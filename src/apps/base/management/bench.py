@@ -0,0 +1,25 @@
+"""
+Settings shared by the benchmark commands.
+"""
+from django.conf import settings
+from django.test import override_settings
+
+from apps.base.caches import DUMMY_CACHE_BACKEND
+
+NO_CACHE = {'BACKEND': DUMMY_CACHE_BACKEND}
+
+
+def bench_settings(cache=False, **overrides):
+    """
+    Return the settings override the benchmarks run in, with the response
+    cache of the recipe views disabled unless `cache` is set.
+    """
+    # The test clients always send the testserver host.
+    overrides['ALLOWED_HOSTS'] = ['testserver']
+    if not cache:
+        overrides.update(
+            CACHES={**settings.CACHES, 'bench': NO_CACHE},
+            RECIPE_CACHE_ALIAS='bench',
+        )
+
+    return override_settings(**overrides)
@@ -0,0 +1,487 @@
+"""
+Django command to benchmark the API endpoints against a seeded dataset.
+"""
+import json
+import re
+import statistics
+import tempfile
+import time
+import uuid
+from io import BytesIO
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.client import MULTIPART_CONTENT
+from django.urls import reverse
+
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.base.management.bench import bench_settings
+from apps.recipe.models import Recipe, Tag, Ingredient
+from apps.recipe.renditions import wait_for_renditions
+from apps.recipe.seeding import SEED_PASSWORD, WORDS, seed_dataset
+
+JSON_CONTENT = 'application/json'
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+# Write scenarios run after the reads, so reads see the seeded data, and
+# recipe-delete removes the recipes created by recipe-create. The tag and
+# ingredient deletes remove seeded rows, so they run last. Streamed
+# responses only count the queries run before streaming starts.
+SCENARIOS = (
+    'recipe-list', 'recipe-list-tags', 'recipe-search', 'recipe-detail',
+    'recipe-export', 'tag-list', 'tag-list-assigned', 'tag-autocomplete',
+    'ingredient-list', 'ingredient-autocomplete', 'user-me', 'token-obtain',
+    'token-refresh', 'recipe-create', 'recipe-update', 'recipe-delete',
+    'recipe-bulk', 'recipe-upload-image', 'tag-update', 'ingredient-update',
+    'user-me-update', 'user-create', 'tag-delete', 'ingredient-delete',
+)
+
+
+def _image_content():
+    image = BytesIO()
+    Image.new('RGB', size=(64, 64), color=(255, 255, 255)).save(
+        image, 'JPEG',
+    )
+    return image.getvalue()
+
+
+def _percentile(quantiles, latencies, index):
+    if len(latencies) > 1:
+        return quantiles[index] * 1000
+    return latencies[0] * 1000 if latencies else 0.0
+
+
+def summarize(latencies, queries, errors, elapsed):
+    """Return the latency percentiles and query count of a scenario."""
+    quantiles = []
+    if len(latencies) > 1:
+        quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(_percentile(quantiles, latencies, 49), 3),
+        'p95_ms': round(_percentile(quantiles, latencies, 94), 3),
+        'p99_ms': round(_percentile(quantiles, latencies, 98), 3),
+        'queries': round(statistics.mean(queries), 2) if queries else 0,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Return a row per scenario in both results, flagging the ones whose
+    p95 latency grew by more than `threshold` or that run more queries.
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = 0.0
+        if base['p95_ms']:
+            change = result['p95_ms'] / base['p95_ms'] - 1
+        regressed = (
+            change > threshold or result['queries'] > base['queries']
+        )
+        rows.append((name, base, result, change, regressed))
+
+    return rows
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the API."""
+    help = (
+        'Seed users with recipes, tags and ingredients, drive the recipe, '
+        'tag, ingredient, user and token endpoints, and report their '
+        'latency percentiles, queries per request and throughput. '
+        'Uploaded images and their renditions are stored in a temporary '
+        'MEDIA_ROOT. Results can be written as JSON and compared to a '
+        'baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2)
+        parser.add_argument(
+            '--recipes', type=int, default=500, help='Recipes per user.',
+        )
+        parser.add_argument(
+            '--tags', type=int, default=20, help='Tags per user.',
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=100,
+            help='Ingredients per user.',
+        )
+        parser.add_argument(
+            '--links', type=int, default=3,
+            help='Tags and ingredients linked to each recipe.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Timed requests per scenario.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Untimed requests per scenario sent first.',
+        )
+        parser.add_argument(
+            '--scenario', choices=SCENARIOS, action='append',
+            help='Scenario to run, may be repeated. Defaults to all.',
+        )
+        parser.add_argument(
+            '--cache', action='store_true',
+            help='Keep the response cache of the recipe views enabled.',
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep the seeded users and their data.',
+        )
+        parser.add_argument('--output', help='File to write results to.')
+        parser.add_argument(
+            '--baseline', help='Results file to compare against.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=10,
+            help='Percent of p95 latency growth flagged as a regression.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Cannot read baseline: {error}')
+
+        shape = {
+            name: options[name]
+            for name in (
+                'users', 'recipes', 'tags', 'ingredients', 'links', 'seed',
+            )
+        }
+        if options['users'] < 1 or options['recipes'] < 1:
+            raise CommandError('At least one user and recipe is needed.')
+
+        self.prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        start = time.perf_counter()
+        users = seed_dataset(**shape, email_prefix=self.prefix)
+        self.stdout.write(
+            f'Seeded {len(users)} users in '
+            f'{time.perf_counter() - start:.1f}s.'
+        )
+
+        try:
+            with tempfile.TemporaryDirectory() as media_root, bench_settings(
+                options['cache'], MEDIA_ROOT=media_root,
+                SERVER_TIMING_HEADER=True,
+            ):
+                try:
+                    results = self._run(users, options)
+                finally:
+                    wait_for_renditions()
+        finally:
+            if not options['keep']:
+                get_user_model().objects.filter(
+                    email__startswith=f'{self.prefix}-',
+                ).delete()
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(
+                    {
+                        'shape': shape,
+                        'requests': options['requests'],
+                        'results': results,
+                    },
+                    output, indent=2, sort_keys=True,
+                )
+                output.write('\n')
+
+        if baseline is not None:
+            self._compare(shape, results, baseline, options['threshold'])
+
+    def _run(self, users, options):
+        """Run the scenarios, writing a result row for each."""
+        self.client = Client()
+        self.users = users
+        self.headers = {
+            user.id: {
+                'Authorization': f'Bearer {AccessToken.for_user(user)}',
+            }
+            for user in users
+        }
+        self.recipe_ids = self._ids_by_user(Recipe)
+        self.tag_ids = self._ids_by_user(Tag)
+        self.ingredient_ids = self._ids_by_user(Ingredient)
+        self.created = None
+        self.image = _image_content()
+
+        self.stdout.write(
+            f'{"scenario":<25}{"requests":>9}{"errors":>7}{"req/s":>9}'
+            f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+        )
+        results = {}
+        for name in options['scenario'] or SCENARIOS:
+            build = getattr(self, '_' + name.replace('-', '_'))
+            for index in range(options['warmup']):
+                self._send(build(index))
+            latencies, queries, errors = [], [], 0
+            start = time.perf_counter()
+            for index in range(
+                options['warmup'], options['warmup'] + options['requests'],
+            ):
+                request = build(index)
+                latency, res = self._send(request)
+                latencies.append(latency)
+                match = QUERIES_RE.search(res.get('Server-Timing', ''))
+                if match:
+                    queries.append(int(match.group(1)))
+                if res.status_code >= 400:
+                    errors += 1
+            result = summarize(
+                latencies, queries, errors, time.perf_counter() - start,
+            )
+            results[name] = result
+            self.stdout.write(
+                f'{name:<25}{result["requests"]:>9}{result["errors"]:>7}'
+                f'{result["rps"]:>9.1f}{result["p50_ms"]:>9.1f}'
+                f'{result["p95_ms"]:>9.1f}{result["p99_ms"]:>9.1f}'
+                f'{result["queries"]:>9.1f}'
+            )
+
+        return results
+
+    def _ids_by_user(self, model):
+        ids = {user.id: [] for user in self.users}
+        for user_id, pk in model.objects.filter(
+            user__in=self.users,
+        ).order_by('pk').values_list('user_id', 'pk'):
+            ids[user_id].append(pk)
+        return ids
+
+    def _send(self, request):
+        """Send a request, returning its latency and response."""
+        method, path, data, headers, content_type = request
+        kwargs = {'headers': headers}
+        if method != 'get':
+            kwargs['content_type'] = content_type
+        start = time.perf_counter()
+        res = getattr(self.client, method)(path, data, **kwargs)
+        if res.streaming:
+            b''.join(res.streaming_content)
+        return time.perf_counter() - start, res
+
+    def _user(self, index):
+        return self.users[index % len(self.users)]
+
+    def _as_user(self, index, method, path, data=None,
+                 content_type=JSON_CONTENT):
+        user = self._user(index)
+        return method, path, data, self.headers[user.id], content_type
+
+    def _pick(self, ids_by_user, index):
+        ids = ids_by_user[self._user(index).id]
+        return ids[index // len(self.users) % len(ids)]
+
+    def _recipe_list(self, index):
+        return self._as_user(index, 'get', reverse('recipe:recipe-list'))
+
+    def _recipe_list_tags(self, index):
+        tags = self.tag_ids[self._user(index).id][:2]
+        return self._as_user(
+            index, 'get', reverse('recipe:recipe-list'),
+            {'tags': ','.join(str(pk) for pk in tags)},
+        )
+
+    def _recipe_search(self, index):
+        return self._as_user(
+            index, 'get', reverse('recipe:recipe-list'),
+            {'search': WORDS[index % len(WORDS)]},
+        )
+
+    def _recipe_detail(self, index):
+        return self._as_user(index, 'get', reverse(
+            'recipe:recipe-detail', args=[self._pick(self.recipe_ids, index)],
+        ))
+
+    def _recipe_export(self, index):
+        return self._as_user(index, 'get', reverse('recipe:recipe-export'))
+
+    def _tag_list(self, index):
+        return self._as_user(index, 'get', reverse('recipe:tag-list'))
+
+    def _tag_list_assigned(self, index):
+        return self._as_user(
+            index, 'get', reverse('recipe:tag-list'), {'assigned_only': 1},
+        )
+
+    def _tag_autocomplete(self, index):
+        return self._as_user(
+            index, 'get', reverse('recipe:tag-autocomplete'),
+            {'prefix': f'Tag {index % 10}'},
+        )
+
+    def _ingredient_list(self, index):
+        return self._as_user(index, 'get', reverse('recipe:ingredient-list'))
+
+    def _ingredient_autocomplete(self, index):
+        return self._as_user(
+            index, 'get', reverse('recipe:ingredient-autocomplete'),
+            {'prefix': WORDS[index % len(WORDS)][:2]},
+        )
+
+    def _user_me(self, index):
+        return self._as_user(index, 'get', reverse('user:me'))
+
+    def _token_obtain(self, index):
+        return 'post', reverse('token_obtain_pair'), {
+            'email': self._user(index).email, 'password': SEED_PASSWORD,
+        }, {}, JSON_CONTENT
+
+    def _token_refresh(self, index):
+        refresh = RefreshToken.for_user(self._user(index))
+        return (
+            'post', reverse('token_refresh'), {'refresh': str(refresh)}, {},
+            JSON_CONTENT,
+        )
+
+    def _recipe_payload(self, index):
+        return {
+            'title': f'Bench recipe {index}',
+            'time_minutes': 10 + index % 50,
+            'price': '5.50',
+            'tags': [{'name': f'Tag {index % 10}'}],
+            'ingredients': [{'name': WORDS[index % len(WORDS)]}],
+        }
+
+    def _recipe_create(self, index):
+        return self._as_user(
+            index, 'post', reverse('recipe:recipe-list'),
+            self._recipe_payload(index),
+        )
+
+    def _recipe_update(self, index):
+        return self._as_user(
+            index, 'patch', reverse(
+                'recipe:recipe-detail',
+                args=[self._pick(self.recipe_ids, index)],
+            ),
+            {'time_minutes': 10 + index % 50},
+        )
+
+    def _recipe_delete(self, index):
+        if self.created is None:
+            self.created = list(Recipe.objects.filter(
+                user__in=self.users, title__startswith='Bench recipe ',
+            ).values_list('user_id', 'pk'))
+        # Once the created recipes run out, deletes fail with a 404.
+        user_id, pk = self.created.pop() if self.created else (
+            self._user(index).id, 0,
+        )
+        return (
+            'delete', reverse('recipe:recipe-detail', args=[pk]), None,
+            self.headers[user_id], JSON_CONTENT,
+        )
+
+    def _recipe_bulk(self, index):
+        return self._as_user(
+            index, 'post', reverse('recipe:recipe-bulk'), {
+                'create': [
+                    self._recipe_payload(index * 10 + item)
+                    for item in range(10)
+                ],
+                'update': [{
+                    'id': self._pick(self.recipe_ids, index),
+                    'time_minutes': 10 + index % 50,
+                }],
+            },
+        )
+
+    def _recipe_upload_image(self, index):
+        return self._as_user(
+            index, 'post', reverse(
+                'recipe:recipe-upload-image',
+                args=[self._pick(self.recipe_ids, index)],
+            ),
+            {'image': SimpleUploadedFile(
+                f'bench-{index}.jpg', self.image, content_type='image/jpeg',
+            )},
+            content_type=MULTIPART_CONTENT,
+        )
+
+    def _tag_update(self, index):
+        pk = self._pick(self.tag_ids, index)
+        return self._as_user(
+            index, 'patch', reverse('recipe:tag-detail', args=[pk]),
+            {'name': f'Tag {pk}'},
+        )
+
+    def _ingredient_update(self, index):
+        pk = self._pick(self.ingredient_ids, index)
+        return self._as_user(
+            index, 'patch', reverse('recipe:ingredient-detail', args=[pk]),
+            {'name': f'{WORDS[index % len(WORDS)]} {pk}'},
+        )
+
+    def _user_me_update(self, index):
+        return self._as_user(
+            index, 'patch', reverse('user:me'), {'name': f'Bench {index}'},
+        )
+
+    def _user_create(self, index):
+        return 'post', reverse('user:create'), {
+            'email': f'{self.prefix}-new-{index}@example.com',
+            'password': SEED_PASSWORD,
+            'name': f'Bench {index}',
+        }, {}, JSON_CONTENT
+
+    def _attr_delete(self, index, ids_by_user, url_name):
+        # Once the seeded rows of a user run out, deletes fail with a 404.
+        ids = ids_by_user[self._user(index).id]
+        return self._as_user(
+            index, 'delete', reverse(url_name, args=[ids.pop() if ids else 0]),
+        )
+
+    def _tag_delete(self, index):
+        return self._attr_delete(index, self.tag_ids, 'recipe:tag-detail')
+
+    def _ingredient_delete(self, index):
+        return self._attr_delete(
+            index, self.ingredient_ids, 'recipe:ingredient-detail',
+        )
+
+    def _compare(self, shape, results, baseline, threshold):
+        """Write the change from the baseline, failing on regressions."""
+        if baseline.get('shape') != shape:
+            self.stdout.write(self.style.WARNING(
+                'The baseline was run on a different dataset shape.'
+            ))
+
+        rows = compare(results, baseline.get('results', {}), threshold / 100)
+        self.stdout.write(
+            f'{"scenario":<25}{"base p95":>10}{"p95":>10}{"change":>9}'
+            f'{"base q":>8}{"q":>8}'
+        )
+        regressions = []
+        for name, base, result, change, regressed in rows:
+            line = (
+                f'{name:<25}{base["p95_ms"]:>10.1f}{result["p95_ms"]:>10.1f}'
+                f'{change:>+9.1%}{base["queries"]:>8.1f}'
+                f'{result["queries"]:>8.1f}'
+            )
+            if regressed:
+                regressions.append(name)
+                line = self.style.ERROR(f'{line}  REGRESSION')
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f'Regressed against the baseline: {", ".join(regressions)}.'
+            )
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
@@ -0,0 +1,149 @@
+"""
+Django command to compare recipe read throughput under WSGI and ASGI.
+"""
+import asyncio
+import statistics
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.base.management.bench import bench_settings
+
+ENDPOINTS = ('recipe', 'tag', 'ingredient')
+MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the recipe read APIs."""
+    help = (
+        'Drive concurrent list requests through the WSGI handler with '
+        'the sync views, and through the ASGI handler with the sync and '
+        'async views, and report their throughput and latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user to read as.')
+        parser.add_argument(
+            '--endpoint', choices=ENDPOINTS, default='recipe',
+        )
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument(
+            '--page-size', type=int, default=100,
+        )
+        parser.add_argument(
+            '--mode', choices=MODES, action='append',
+            help='Mode to run, may be repeated. Defaults to all modes.',
+        )
+        parser.add_argument(
+            '--cache', action='store_true',
+            help='Keep the response cache of the sync views enabled.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["email"]} does not exist.')
+
+        self.headers = {
+            'Authorization': f'Bearer {AccessToken.for_user(user)}',
+        }
+        self.params = {'page_size': options['page_size']}
+        endpoint = options['endpoint']
+        urls = {
+            'wsgi': reverse(f'recipe:{endpoint}-list'),
+            'asgi-sync': reverse(f'recipe:{endpoint}-list'),
+            'asgi-async': reverse(f'recipe-async:{endpoint}-list'),
+        }
+        self.stdout.write(
+            f'{"mode":<12}{"requests":>10}{"errors":>8}{"req/s":>10}'
+            f'{"p50 ms":>10}{"p95 ms":>10}'
+        )
+        for mode in options['mode'] or MODES:
+            with bench_settings(options['cache']):
+                if mode == 'wsgi':
+                    run = self._run_wsgi
+                else:
+                    run = async_to_sync(self._run_asgi)
+                elapsed, latencies, errors = run(
+                    urls[mode], options['requests'], options['concurrency'],
+                )
+            self._report(mode, elapsed, latencies, errors)
+
+    def _report(self, mode, elapsed, latencies, errors):
+        """Write one result row."""
+        if len(latencies) > 1:
+            quantiles = statistics.quantiles(latencies, n=20)
+            p50, p95 = quantiles[9], quantiles[18]
+        else:
+            p50 = p95 = latencies[0] if latencies else 0
+        self.stdout.write(
+            f'{mode:<12}{len(latencies):>10}{errors:>8}'
+            f'{len(latencies) / elapsed:>10.1f}'
+            f'{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}'
+        )
+
+    def _run_wsgi(self, url, requests, concurrency):
+        """Send the requests from a pool of threads, one client each."""
+        latencies = []
+        errors = []
+        remaining = iter(range(requests))
+        lock = threading.Lock()
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    start = time.perf_counter()
+                    res = client.get(url, self.params, headers=self.headers)
+                    latency = time.perf_counter() - start
+                    with lock:
+                        latencies.append(latency)
+                        if res.status_code != 200:
+                            errors.append(res.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return time.perf_counter() - start, latencies, len(errors)
+
+    async def _run_asgi(self, url, requests, concurrency):
+        """Send the requests as concurrent tasks on one event loop."""
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = []
+
+        async def send():
+            async with semaphore:
+                start = time.perf_counter()
+                res = await client.get(url, self.params, headers=self.headers)
+                latencies.append(time.perf_counter() - start)
+                if res.status_code != 200:
+                    errors.append(res.status_code)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(requests)))
+
+        return time.perf_counter() - start, latencies, len(errors)
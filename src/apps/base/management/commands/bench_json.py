@@ -0,0 +1,108 @@
+"""
+Django command to compare the JSON encode time of large recipe lists.
+"""
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from rest_framework.renderers import JSONRenderer
+
+from apps.base.renderers import FastJSONRenderer, fast_json_enabled
+from apps.recipe.seeding import WORDS
+
+
+def recipe_list(count, seed=0):
+    """Return a page of recipes shaped like the detail representation."""
+    rng = random.Random(seed)
+    created = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    return {
+        'next': 'http://testserver/api/recipe/recipes/?cursor=cD0x',
+        'previous': None,
+        'results': [
+            {
+                'id': index,
+                'title': ' '.join(rng.sample(WORDS, 3)).capitalize(),
+                'time_minutes': rng.randint(5, 180),
+                'price': Decimal(rng.randint(100, 9999)) / 100,
+                'link': f'https://example.com/recipes/{index}',
+                'description': ' '.join(rng.choices(WORDS, k=12)),
+                'image': (
+                    f'http://testserver/media/uploads/recipe/{index}.jpg'
+                ),
+                'renditions': {
+                    'thumb': f'http://testserver/media/{index}-thumb.webp',
+                },
+                'created': created + datetime.timedelta(
+                    seconds=index, microseconds=rng.randint(0, 999999),
+                ),
+                'tags': [
+                    {'id': tag_id, 'name': f'Tag {tag_id}'}
+                    for tag_id in rng.sample(range(20), 3)
+                ],
+                'ingredients': [
+                    {'id': ingredient_id, 'name': rng.choice(WORDS)}
+                    for ingredient_id in rng.sample(range(100), 5)
+                ],
+            }
+            for index in range(count)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the JSON renderers."""
+    help = (
+        'Encode a large recipe list with the stdlib JSONRenderer and '
+        'with FastJSONRenderer, check they agree and report their time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes', type=int, default=1000,
+            help='Recipes in the encoded list.',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        with override_settings(FAST_JSON=True):
+            if not fast_json_enabled():
+                raise CommandError('orjson is not installed.')
+
+            data = recipe_list(options['recipes'])
+            renderers = {
+                'stdlib': JSONRenderer(),
+                'orjson': FastJSONRenderer(),
+            }
+            outputs = {
+                name: renderer.render(data)
+                for name, renderer in renderers.items()
+            }
+            if outputs['stdlib'] != outputs['orjson']:
+                raise CommandError('The renderers disagree.')
+
+            self.stdout.write(
+                f'{"renderer":<10}{"ms/render":>12}{"MB/s":>10}'
+            )
+            timings = {}
+            for name, renderer in renderers.items():
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    renderer.render(data)
+                timings[name] = (
+                    (time.perf_counter() - start) / options['repeat']
+                )
+                self.stdout.write(
+                    f'{name:<10}{timings[name] * 1000:>12.2f}'
+                    f'{len(outputs[name]) / timings[name] / 1e6:>10.1f}'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Encoded {len(outputs["stdlib"])} bytes identically, '
+            f'{timings["stdlib"] / timings["orjson"]:.1f}x faster '
+            f'with orjson.'
+        ))
@@ -0,0 +1,45 @@
+"""
+Django command to export a user's recipes as NDJSON or CSV.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recipe.export import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    render_export,
+)
+
+
+class Command(BaseCommand):
+    """Django command to export recipes."""
+    help = "Stream a user's recipes with their tags and ingredients."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user to export.')
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default='ndjson',
+        )
+        parser.add_argument(
+            '--output', help='File to write to. Defaults to stdout.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["email"]} does not exist.')
+
+        chunks = render_export(
+            user, options['format'], chunk_size=options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,129 @@
+"""
+Django command to bulk import recipes from NDJSON or CSV.
+"""
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.recipe.importer import (
+    IMPORT_BATCH_SIZE,
+    RecipeImporter,
+    RecipeImportError,
+    read_csv,
+    read_ndjson,
+)
+from apps.recipe.models import ImportCheckpoint
+
+
+def read_checkpoint(name):
+    """Return the number of rows already imported."""
+    if not name:
+        return 0
+
+    return ImportCheckpoint.objects.filter(name=name).values_list(
+        'rows', flat=True,
+    ).first() or 0
+
+
+def write_checkpoint(name, rows):
+    """Record the number of rows imported, in the current transaction."""
+    ImportCheckpoint.objects.update_or_create(
+        name=name, defaults={'rows': rows},
+    )
+
+
+class Command(BaseCommand):
+    """Django command to import recipes."""
+    help = 'Import recipes with their tags and ingredients in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON or CSV file to import.')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='Input format. Defaults to the file extension.',
+        )
+        parser.add_argument(
+            '--user',
+            help='Email of the owner of rows without a "user" field.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'Name under which progress is recorded in the database, '
+                'used to resume the import.'
+            ),
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Use bulk_create even on PostgreSQL.',
+        )
+
+    def _describe(self, exc, first, batch):
+        """Return the error of a batch starting at row `first`."""
+        if exc.index is not None:
+            return f'Row {first + exc.index}: {exc}'
+        if batch is None:
+            # The reader failed, its error names the line.
+            return str(exc)
+
+        return f'Row {first}-{first + len(batch) - 1}: {exc}'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        default_user = None
+        if options['user']:
+            try:
+                default_user = get_user_model().objects.get(
+                    email=options['user'],
+                )
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'User {options["user"]} does not exist.')
+
+        input_format = options['format'] or (
+            'csv' if options['path'].endswith('.csv') else 'ndjson'
+        )
+        reader = read_csv if input_format == 'csv' else read_ndjson
+        importer = RecipeImporter(
+            default_user=default_user,
+            use_copy=False if options['no_copy'] else None,
+        )
+        checkpoint = options['checkpoint']
+        done = read_checkpoint(checkpoint)
+        if done:
+            self.stdout.write(f'Resuming after {done} rows...')
+
+        imported = 0
+        started = time.monotonic()
+        with open(options['path'], newline='') as source:
+            rows = islice(reader(source), done, None)
+            while True:
+                first = done + imported + 1
+                batch = None
+                try:
+                    batch = list(islice(rows, options['batch_size']))
+                    if not batch:
+                        break
+                    # Commit the batch and its checkpoint together.
+                    with transaction.atomic():
+                        loaded = importer.load(batch)
+                        if checkpoint:
+                            write_checkpoint(checkpoint, first - 1 + loaded)
+                except RecipeImportError as exc:
+                    raise CommandError(self._describe(exc, first, batch))
+                imported += loaded
+
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'Imported {done + imported} rows '
+                    f'({imported / elapsed:.0f} rows/sec)'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes.'
+        ))
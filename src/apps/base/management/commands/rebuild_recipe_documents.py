@@ -0,0 +1,50 @@
+"""
+Django command to rebuild the denormalized recipe documents.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recipe.documents import REBUILD_BATCH_SIZE, rebuild_all
+from apps.recipe.models import Recipe
+
+
+class Command(BaseCommand):
+    """Django command to rebuild recipe documents."""
+    help = 'Render and store the read documents of existing recipes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='Only rebuild the recipes of this email.',
+        )
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Only build the recipes without a document.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=REBUILD_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        queryset = Recipe.objects.all()
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(email=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'User {options["user"]} does not exist.')
+            queryset = queryset.filter(user=user)
+        if options['missing']:
+            queryset = queryset.filter(document__isnull=True)
+
+        started = time.monotonic()
+        total = 0
+        for count in rebuild_all(queryset, options['batch_size']):
+            total += count
+            self.stdout.write(f'Rebuilt {total} documents.')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {total} documents in {elapsed:.1f}s.'
+        ))
@@ -0,0 +1,94 @@
+"""
+Django command to seed a large dataset for load and performance tests.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recipe.seeding import (
+    SEED_BATCH_SIZE,
+    SEED_PASSWORD,
+    DatasetSeeder,
+)
+
+
+class Command(BaseCommand):
+    """Django command to seed users, recipes, tags and ingredients."""
+    help = (
+        'Generate users with recipes, tags, ingredients and their links '
+        'from a seed, in batches committed as they are loaded.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--recipes', type=int, default=1000, help='Recipes per user.',
+        )
+        parser.add_argument(
+            '--tags', type=int, default=20, help='Tags per user.',
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=100,
+            help='Ingredients per user.',
+        )
+        parser.add_argument(
+            '--links', type=int, default=3,
+            help='Tags and ingredients linked to each recipe.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--email-prefix', default='seed',
+            help='Users are named <prefix>-<index>@example.com.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=SEED_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Use bulk_create even on PostgreSQL.',
+        )
+        parser.add_argument(
+            '--no-documents', action='store_true',
+            help=(
+                'Skip building the recipe read documents, to build them '
+                'later with rebuild_recipe_documents --missing.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        prefix = options['email_prefix']
+        if get_user_model().objects.filter(
+            email__startswith=f'{prefix}-',
+        ).exists():
+            raise CommandError(
+                f'Users {prefix}-* already exist, use another --email-prefix.'
+            )
+
+        seeder = DatasetSeeder(
+            seed=options['seed'],
+            email_prefix=prefix,
+            batch_size=options['batch_size'],
+            use_copy=False if options['no_copy'] else None,
+            build_documents=not options['no_documents'],
+        )
+        started = time.monotonic()
+        users = recipes = 0
+        for user_count, recipe_count in seeder.seed(
+            options['users'], options['recipes'], options['tags'],
+            options['ingredients'], options['links'],
+        ):
+            users += user_count
+            recipes += recipe_count
+            if recipe_count:
+                self.stdout.write(
+                    f'Seeded {users} users and {recipes} recipes.'
+                )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {users} users and {recipes} recipes in {elapsed:.1f}s '
+            f'({recipes / max(elapsed, 0.001):.0f} recipes/s). '
+            f'Their password is {SEED_PASSWORD}.'
+        ))
@@ -0,0 +1,262 @@
+"""
+Per request timing and per view histograms in Prometheus text format.
+
+The request being served is tracked in a context variable, so queries
+run from sync_to_async threads under ASGI are counted too. Histograms
+are kept in process memory; every worker process exposes its own.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Time spent by a request, split into its phases."""
+
+    __slots__ = (
+        'started', 'view_started', 'view_finished', 'finished',
+        'queries', 'sql_time', 'serialize_time', 'serializing',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_finished = None
+        self.finished = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+
+    @property
+    def total(self):
+        return self.finished - self.started
+
+    @property
+    def view_time(self):
+        """Time in the view, outside of SQL queries and serialization."""
+        if self.view_started is None:
+            return 0.0
+        view_finished = self.view_finished or self.finished
+        return max(
+            view_finished - self.view_started
+            - self.sql_time - self.serialize_time,
+            0.0,
+        )
+
+    @property
+    def render_time(self):
+        """Time rendering a template response after the view returned."""
+        if self.view_finished is None:
+            return 0.0
+        return self.finished - self.view_finished
+
+
+def start_request():
+    """Start timing a request, returning it and its context token."""
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def finish_request(token):
+    """Stop timing the current request."""
+    timing = _current.get()
+    timing.finished = time.perf_counter()
+    _current.reset(token)
+    return timing
+
+
+@contextmanager
+def time_serialization():
+    """
+    Count the time in the block as serialization of the current request,
+    outside of the SQL queries it runs. Nested blocks are counted once.
+    """
+    timing = _current.get()
+    if timing is None or timing.serializing:
+        yield
+        return
+
+    timing.serializing = True
+    started = time.perf_counter()
+    sql_time = timing.sql_time
+    try:
+        yield
+    finally:
+        timing.serializing = False
+        timing.serialize_time += max(
+            time.perf_counter() - started - (timing.sql_time - sql_time),
+            0.0,
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting the queries of a request."""
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.sql_time += time.perf_counter() - started
+        timing.queries += 1
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Record the queries of every new database connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    """Observation counts by upper bound, with their sum."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Return the cumulative count of each bucket, +Inf last."""
+        total = 0
+        counts = []
+        for count in self.counts:
+            total += count
+            counts.append(total)
+
+        return counts
+
+
+class Registry:
+    """Histograms and counters of request metrics by labels."""
+
+    histograms = {
+        'http_request_duration_seconds': (
+            'Time to serve a request.', DURATION_BUCKETS,
+        ),
+        'http_request_view_seconds': (
+            'Time in the view, excluding SQL and serialization.',
+            DURATION_BUCKETS,
+        ),
+        'http_request_serialize_seconds': (
+            'Time serializing response data, excluding SQL.',
+            DURATION_BUCKETS,
+        ),
+        'http_request_render_seconds': (
+            'Time rendering the response.', DURATION_BUCKETS,
+        ),
+        'http_request_db_seconds': (
+            'Time running SQL queries.', DURATION_BUCKETS,
+        ),
+        'http_request_db_queries': (
+            'Number of SQL queries run.', QUERY_BUCKETS,
+        ),
+        'http_response_size_bytes': (
+            'Size of the response body.', SIZE_BUCKETS,
+        ),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {name: {} for name in self.histograms}
+            self._requests = {}
+
+    def _observe(self, name, labels, value):
+        histograms = self._histograms[name]
+        histogram = histograms.get(labels)
+        if histogram is None:
+            histogram = histograms[labels] = Histogram(
+                self.histograms[name][1]
+            )
+        histogram.observe(value)
+
+    def observe(self, view, method, status, timing, size=None):
+        """Record a served request."""
+        labels = (('view', view), ('method', method))
+        with self._lock:
+            key = labels + (('status', str(status)),)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            for name, value in (
+                ('http_request_duration_seconds', timing.total),
+                ('http_request_view_seconds', timing.view_time),
+                ('http_request_serialize_seconds', timing.serialize_time),
+                ('http_request_render_seconds', timing.render_time),
+                ('http_request_db_seconds', timing.sql_time),
+                ('http_request_db_queries', timing.queries),
+                ('http_response_size_bytes', size),
+            ):
+                if value is not None:
+                    self._observe(name, labels, value)
+
+    def expose(self):
+        """Return every metric in the Prometheus text format."""
+        lines = [
+            '# HELP http_requests_total Requests served.',
+            '# TYPE http_requests_total counter',
+        ]
+        with self._lock:
+            for labels, count in sorted(self._requests.items()):
+                lines.append(
+                    f'http_requests_total{_format_labels(labels)} {count}'
+                )
+            for name, (description, buckets) in self.histograms.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                histograms = self._histograms[name]
+                for labels, histogram in sorted(histograms.items()):
+                    bounds = [_format_value(b) for b in buckets] + ['+Inf']
+                    cumulative = histogram.cumulative()
+                    for bound, count in zip(bounds, cumulative):
+                        lines.append(
+                            f'{name}_bucket'
+                            f'{_format_labels(labels + (("le", bound),))} '
+                            f'{count}'
+                        )
+                    lines.append(
+                        f'{name}_sum{_format_labels(labels)} '
+                        f'{_format_value(histogram.sum)}'
+                    )
+                    lines.append(
+                        f'{name}_count{_format_labels(labels)} '
+                        f'{cumulative[-1]}'
+                    )
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return (
+        value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    )
+
+
+def _format_labels(labels):
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return '{' + pairs + '}'
+
+
+registry = Registry()
@@ -0,0 +1,91 @@
+"""
+Middleware timing each request.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from apps.base.metrics import finish_request, registry, start_request
+
+
+class RequestTimingMiddleware:
+    """
+    Report the SQL, view, serialization and render time of each request
+    in a Server-Timing header, and record them in the metrics registry.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Keep the hooks on the event loop instead of a thread.
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timing, token = start_request()
+        request.timing = timing
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+
+        return self._report(request, response, timing)
+
+    async def __acall__(self, request):
+        timing, token = start_request()
+        request.timing = timing
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+
+        return self._report(request, response, timing)
+
+    def _view_started(self, request):
+        request.timing.view_started = time.perf_counter()
+
+    def _view_finished(self, request):
+        request.timing.view_finished = time.perf_counter()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self._view_started(request)
+
+    def process_template_response(self, request, response):
+        self._view_finished(request)
+        return response
+
+    async def _aprocess_view(self, request, *args):
+        self._view_started(request)
+
+    async def _aprocess_template_response(self, request, response):
+        self._view_finished(request)
+        return response
+
+    def _report(self, request, response, timing):
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        size = None
+        if not response.streaming:
+            size = len(response.content)
+        registry.observe(
+            view, request.method, response.status_code, timing, size,
+        )
+
+        if settings.SERVER_TIMING_HEADER:
+            response.headers['Server-Timing'] = ', '.join([
+                f'db;dur={timing.sql_time * 1000:.2f};'
+                f'desc="{timing.queries} queries"',
+                f'view;dur={timing.view_time * 1000:.2f}',
+                f'serialize;dur={timing.serialize_time * 1000:.2f}',
+                f'render;dur={timing.render_time * 1000:.2f}',
+                f'total;dur={timing.total * 1000:.2f}',
+            ])
+
+        return response
@@ -0,0 +1,187 @@
+"""base pagination"""
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+class BaseCursorPagination(CursorPagination):
+    """
+    Cursor pagination without COUNT(*). Pages start from a keyset filter
+    on the first ordering field, and only rows tying on that value are
+    stepped over with an OFFSET, so with an index on the user and the
+    ordering deep pages cost the same as the first.
+    """
+
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def _page_queryset(self, queryset, request, view=None):
+        """
+        Return the queryset slice holding the requested page, plus one
+        row to tell whether a following page exists.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self._offset, self._reverse, self._current_position = (
+                0, False, None,
+            )
+        else:
+            self._offset, self._reverse, self._current_position = self.cursor
+
+        # Cursor pagination always enforces an ordering.
+        if self._reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        # If we have a cursor with a fixed position then filter by that.
+        if self._current_position is not None:
+            is_reversed = self.ordering[0].startswith('-')
+            # Test for: (cursor reversed) XOR (queryset reversed)
+            lookup = 'lt' if self.cursor.reverse != is_reversed else 'gt'
+            queryset = queryset.filter(
+                self._position_filter(self._current_position, lookup),
+            )
+
+        offset = self._offset
+        return queryset[offset:offset + self.page_size + 1]
+
+    def _position_filter(self, position, lookup):
+        """Return the filter for rows after a position in the ordering."""
+        order_attr = self.ordering[0].lstrip('-')
+        return Q(**{f'{order_attr}__{lookup}': position})
+
+    def _set_page(self, results):
+        """Set the page and its cursor positions from the fetched rows."""
+        reverse = self._reverse
+        current_position = self._current_position
+        self.page = list(results[:self.page_size])
+
+        # Determine the position of the final item following the page.
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering,
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            # The query ordering was reversed, so reverse the items again
+            # before returning them.
+            self.page = list(reversed(self.page))
+
+            self.has_next = (
+                current_position is not None or self._offset > 0
+            )
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (
+                current_position is not None or self._offset > 0
+            )
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self._page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+
+        return self._set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Paginate the queryset with the async ORM."""
+        page_queryset = self._page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+
+        return self._set_page([row async for row in page_queryset])
+
+    def get_paginated_data(self, data):
+        """Return the paginated response body for the page data."""
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class IdCursorPagination(BaseCursorPagination):
+    """Cursor pagination over newest rows first."""
+
+    ordering = '-id'
+
+
+class NameCursorPagination(BaseCursorPagination):
+    """Cursor pagination over names, with the id as a tie-breaker."""
+
+    ordering = ('-name', '-id')
+
+
+class RankedCursorPagination(IdCursorPagination):
+    """
+    Cursor pagination by relevance when the queryset is ranked. Ranks
+    often tie, so positions hold the rank and the id, and pages start
+    from a keyset filter on both.
+    """
+    ranked_ordering = ('-rank', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        if 'rank' in queryset.query.annotations:
+            return self.ranked_ordering
+
+        return super().get_ordering(request, queryset, view)
+
+    def _is_ranked(self):
+        return self.ordering == self.ranked_ordering
+
+    def _position_filter(self, position, lookup):
+        if not self._is_ranked():
+            return super()._position_filter(position, lookup)
+
+        rank, _, pk = position.partition(':')
+        try:
+            rank, pk = Decimal(rank), int(pk)
+        except (InvalidOperation, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Q(**{f'rank__{lookup}': rank}) | Q(
+            rank=rank, **{f'id__{lookup}': pk},
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        if not self._is_ranked():
+            return super()._get_position_from_instance(instance, ordering)
+
+        if isinstance(instance, dict):
+            return f'{instance["rank"]}:{instance["id"]}'
+
+        return f'{instance.rank}:{instance.id}'
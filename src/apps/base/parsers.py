@@ -0,0 +1,45 @@
+"""
+JSON parser decoding with orjson when it is installed.
+"""
+import codecs
+import io
+import re
+
+from django.conf import settings
+
+from rest_framework.parsers import JSONParser
+
+from apps.base.renderers import FastJSONRenderer, fast_json_enabled, orjson
+
+# orjson reads integers over 64 bits as floats, the stdlib reads them
+# exactly. Numbers that long are rare, so such bodies go to the stdlib.
+LONG_NUMBER_RE = re.compile(rb'\d{19}')
+
+
+class FastJSONParser(JSONParser):
+    """
+    Parser decoding UTF-8 bodies with orjson, falling back to the stdlib
+    decoder for other encodings, long numbers and bodies orjson rejects,
+    so the stdlib decides what is invalid and words the error.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming bytestream as JSON."""
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not (
+            fast_json_enabled()
+            and self.strict
+            and codecs.lookup(encoding).name == 'utf-8'
+        ):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if not LONG_NUMBER_RE.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+
+        return super().parse(io.BytesIO(body), media_type, parser_context)
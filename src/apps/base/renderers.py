@@ -0,0 +1,63 @@
+"""
+JSON renderer encoding with orjson when it is installed.
+"""
+from django.conf import settings
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through the DRF encoder so they are formatted the same.
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def fast_json_enabled():
+    """Return whether JSON is encoded and decoded with orjson."""
+    return orjson is not None and settings.FAST_JSON
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renderer encoding with orjson, falling back to the stdlib encoder.
+
+    Values orjson does not encode itself, such as Decimal and datetime,
+    are converted by the DRF encoder, so the output is the same as the
+    stdlib's. Indented, ASCII only or non-compact output, and values
+    orjson cannot encode, like integers over 64 bits, are left to the
+    stdlib encoder.
+    """
+
+    def _use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            fast_json_enabled()
+            and self.compact
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None or not self._use_orjson(
+            accepted_media_type, renderer_context or {},
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=ORJSON_OPTIONS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape U+2028 and U+2029 like JSONRenderer.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029',
+            )
+        return ret
@@ -0,0 +1,98 @@
+"""
+Database routing of API reads to read replicas.
+
+Reads only go to a replica inside `replica_reads()`, which the recipe
+viewsets enter for safe requests. After a user writes, they are pinned
+to the primary for DB_PRIMARY_STICKY_SECONDS so they always read their
+own writes, as long as replicas lag by less than that. The pins are
+kept in the DB_PIN_CACHE_ALIAS cache, shared by every process.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.base.caches import is_shared_cache
+
+read_from_replicas = ContextVar('read_from_replicas', default=False)
+
+
+def get_pin_cache():
+    """Return the cache recording users pinned to the primary."""
+    return caches[settings.DB_PIN_CACHE_ALIAS]
+
+
+def check_pin_cache():
+    """
+    Raise ImproperlyConfigured if replicas are used without a shared pin
+    cache, as reads served by another process would miss the pin.
+    """
+    if not settings.DB_REPLICAS:
+        return
+
+    alias = settings.DB_PIN_CACHE_ALIAS
+    if alias not in settings.CACHES:
+        raise ImproperlyConfigured(
+            f'DB_PIN_CACHE_ALIAS {alias!r} is not a configured cache.'
+        )
+    if not is_shared_cache(alias):
+        raise ImproperlyConfigured(
+            f'DB_REPLICAS needs a shared cache, like Redis or memcached, '
+            f'for DB_PIN_CACHE_ALIAS {alias!r}.'
+        )
+
+
+def _pinned_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary for the sticky window."""
+    get_pin_cache().set(
+        _pinned_key(user_id), True, settings.DB_PRIMARY_STICKY_SECONDS,
+    )
+
+
+def is_pinned_to_primary(user_id):
+    """Return whether the user wrote within the sticky window."""
+    return get_pin_cache().get(_pinned_key(user_id), False)
+
+
+async def ais_pinned_to_primary(user_id):
+    """Async version of `is_pinned_to_primary`."""
+    return await get_pin_cache().aget(_pinned_key(user_id), False)
+
+
+@contextmanager
+def replica_reads():
+    """Route the reads made inside the block to a replica."""
+    token = read_from_replicas.set(True)
+    try:
+        yield
+    finally:
+        read_from_replicas.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads made in `replica_reads()` to a replica."""
+
+    def db_for_read(self, model, **hints):
+        if read_from_replicas.get() and settings.DB_REPLICAS:
+            return random.choice(settings.DB_REPLICAS)
+
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary.
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,19 @@
+"""
+Serializers timing their output as the request's serialization phase.
+"""
+from rest_framework import serializers
+
+from apps.base.metrics import time_serialization
+
+
+class TimedDataMixin:
+    """Serializer mixin reporting the time building `data`."""
+
+    @property
+    def data(self):
+        with time_serialization():
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """List serializer reporting the time building `data`."""
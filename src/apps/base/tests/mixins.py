@@ -0,0 +1,28 @@
+"""
+Reusable test helpers.
+"""
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Assert that a block of code stays within a query budget."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using='default'):
+        """Fail if the wrapped block runs more than `budget` queries."""
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        executed = len(context)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}'
+                for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f'{executed} queries executed, budget is {budget}.\n'
+                f'Captured queries were:\n{queries}'
+            )
@@ -1,13 +1,28 @@
 """
 Test custom Django management commands.
 """
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from apps.user.factories import UserFactory
+from apps.recipe.factories import RecipeFactory, TagFactory
+from apps.recipe.models import (
+    ImportCheckpoint,
+    Ingredient,
+    Recipe,
+    RecipeDocument,
+    Tag,
+)
 
 
 @patch('apps.base.management.commands.wait_for_db.Command.check')
@@ -32,3 +47,345 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class ExportRecipesCommandTests(TestCase):
+    """Test the export_recipes command."""
+
+    def test_export_recipes(self):
+        """Test exporting a user's recipes to stdout."""
+        user = UserFactory.create()
+        recipe = RecipeFactory.create(user=user)
+        recipe.tags.add(TagFactory.create(user=user, name='Lunch'))
+        RecipeFactory.create()
+        out = StringIO()
+
+        call_command('export_recipes', user.email, stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [recipe.id])
+        self.assertEqual(rows[0]['tags'], ['Lunch'])
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w') as source:
+            source.write(content)
+        return path
+
+    def _ndjson(self, count):
+        return ''.join(
+            json.dumps({
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '2.50',
+                'tags': ['Dinner', f'Tag {i % 2}'],
+                'ingredients': ['Salt'],
+            }) + '\n'
+            for i in range(count)
+        )
+
+    def _assert_imported(self, count):
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), count)
+        self.assertEqual(
+            sorted(Tag.objects.filter(user=self.user).values_list(
+                'name', flat=True,
+            )),
+            ['Dinner', 'Tag 0', 'Tag 1'],
+        )
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            Tag.objects.get(user=self.user, name='Dinner').recipe_count,
+            count,
+        )
+        for recipe in recipes:
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_import_ndjson_with_copy(self):
+        """Test importing NDJSON in batches with COPY."""
+        TagFactory.create(user=self.user, name='Dinner')
+        path = self._write('recipes.ndjson', self._ndjson(5))
+        out = StringIO()
+
+        call_command(
+            'import_recipes', path, user=self.user.email, batch_size=2,
+            stdout=out,
+        )
+
+        self._assert_imported(5)
+        self.assertIn('rows/sec', out.getvalue())
+        self.assertEqual(
+            RecipeDocument.objects.filter(recipe__user=self.user).count(), 5,
+        )
+        recipe = Recipe.objects.filter(user=self.user).first()
+        self.assertEqual(recipe.renditions, {})
+
+    def test_import_csv_with_bulk_create(self):
+        """Test importing CSV with the bulk_create fallback."""
+        path = self._write('recipes.csv', (
+            'title,time_minutes,price,tags,ingredients\n'
+            'Soup,10,1.00,Dinner;Tag 0,Salt\n'
+            'Stew,20,2.00,Dinner;Tag 1,Salt\n'
+        ))
+
+        call_command(
+            'import_recipes', path, user=self.user.email, no_copy=True,
+            stdout=StringIO(),
+        )
+
+        self._assert_imported(2)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test a restarted import skips rows already imported."""
+        path = self._write('recipes.ndjson', self._ndjson(5))
+        ImportCheckpoint.objects.create(name='recipes', rows=3)
+
+        call_command(
+            'import_recipes', path, user=self.user.email,
+            checkpoint='recipes', stdout=StringIO(),
+        )
+
+        titles = Recipe.objects.filter(user=self.user).values_list(
+            'title', flat=True,
+        )
+        self.assertEqual(sorted(titles), ['Recipe 3', 'Recipe 4'])
+        self.assertEqual(ImportCheckpoint.objects.get(name='recipes').rows, 5)
+
+    def test_checkpoint_matches_committed_rows(self):
+        """Test a failed batch rolls back with its checkpoint."""
+        path = self._write('recipes.ndjson', (
+            self._ndjson(3) + '{"title": "No time", "price": "1.00"}\n'
+        ))
+
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_recipes', path, user=self.user.email, batch_size=2,
+                checkpoint='recipes', stdout=StringIO(),
+            )
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get(name='recipes').rows, 2)
+
+    def test_import_invalid_json_line(self):
+        """Test a malformed line is reported by its line number."""
+        path = self._write(
+            'recipes.ndjson', self._ndjson(2) + '{"title": \n',
+        )
+
+        with self.assertRaisesRegex(CommandError, 'Line 3: invalid JSON'):
+            call_command(
+                'import_recipes', path, user=self.user.email,
+                stdout=StringIO(),
+            )
+
+    def test_import_values_checked_against_model(self):
+        """Test values the columns cannot hold are reported by row."""
+        for row, message in [
+            ({'price': '12345.00'}, 'Row 2: Invalid price'),
+            ({'title': 'x' * 256}, 'Row 2: Invalid title'),
+            ({'link': 'x' * 256}, 'Row 2: Invalid link'),
+            ({'tags': ['x' * 256]}, 'Row 2: Invalid name'),
+            ({'ingredients': 'Salt'}, 'Row 2: Invalid ingredients'),
+        ]:
+            recipe = {'title': 'Soup', 'time_minutes': 5, 'price': '1.00'}
+            path = self._write('recipes.ndjson', (
+                self._ndjson(1) + json.dumps({**recipe, **row}) + '\n'
+            ))
+
+            with self.subTest(row=row):
+                with self.assertRaisesRegex(CommandError, message):
+                    call_command(
+                        'import_recipes', path, user=self.user.email,
+                        stdout=StringIO(),
+                    )
+                self.assertFalse(Recipe.objects.exists())
+
+    def test_import_copy_keeps_literal_null_marker(self):
+        """Test text looking like a COPY NULL marker is loaded as text."""
+        path = self._write('recipes.ndjson', json.dumps({
+            'title': '\\N', 'description': 'a\\b', 'link': '',
+            'time_minutes': 1, 'price': '1.00',
+        }) + '\n')
+
+        call_command(
+            'import_recipes', path, user=self.user.email, stdout=StringIO(),
+        )
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, '\\N')
+        self.assertEqual(recipe.description, 'a\\b')
+        self.assertEqual(recipe.link, '')
+
+    def test_import_invalid_row(self):
+        """Test an invalid row aborts the import with an error."""
+        path = self._write(
+            'recipes.ndjson', '{"title": "No time", "price": "1.00"}\n',
+        )
+
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_recipes', path, user=self.user.email,
+                stdout=StringIO(),
+            )
+
+
+class RebuildRecipeDocumentsCommandTests(TestCase):
+    """Test the rebuild_recipe_documents command."""
+
+    def test_rebuild_missing_documents(self):
+        """Test backfilling the documents of recipes without one."""
+        user = UserFactory.create()
+        recipes = RecipeFactory.create_batch(3, user=user)
+        RecipeFactory.create()
+        RecipeDocument.objects.filter(
+            recipe__in=recipes[:2],
+        ).delete()
+        out = StringIO()
+
+        call_command(
+            'rebuild_recipe_documents', user=user.email, missing=True,
+            batch_size=1, stdout=out,
+        )
+
+        self.assertEqual(
+            RecipeDocument.objects.filter(recipe__user=user).count(), 3,
+        )
+        self.assertIn('Rebuilt 2 documents', out.getvalue())
+
+    def test_rebuild_unknown_user(self):
+        """Test rebuilding the recipes of an unknown user fails."""
+        with self.assertRaises(CommandError):
+            call_command(
+                'rebuild_recipe_documents', user='missing@example.com',
+            )
+
+
+class SeedDatasetCommandTests(TestCase):
+    """Test the seed_dataset command."""
+
+    def test_seed_dataset(self):
+        """Test seeding users with their recipes."""
+        out = StringIO()
+
+        call_command(
+            'seed_dataset', '--users', '2', '--recipes', '3',
+            '--tags', '2', '--ingredients', '2', '--batch-size', '2',
+            stdout=out,
+        )
+
+        self.assertEqual(
+            get_user_model().objects.filter(
+                email__startswith='seed-',
+            ).count(),
+            2,
+        )
+        self.assertEqual(Recipe.objects.count(), 6)
+        self.assertIn('Seeded 2 users and 6 recipes in', out.getvalue())
+
+    def test_seed_dataset_existing_prefix(self):
+        """Test seeding over existing seeded users fails."""
+        UserFactory.create(email='seed-0@example.com')
+
+        with self.assertRaises(CommandError):
+            call_command('seed_dataset', '--users', '1')
+
+
+class BenchJsonCommandTests(SimpleTestCase):
+    """Test the bench_json command."""
+
+    def test_bench_json(self):
+        """Test both renderers encode the recipe list identically."""
+        out = StringIO()
+
+        call_command(
+            'bench_json', '--recipes', '10', '--repeat', '1', stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split()[0] for line in lines[1:3]], ['stdlib', 'orjson'],
+        )
+        self.assertIn('identically', lines[-1])
+
+
+class BenchAsgiCommandTests(TransactionTestCase):
+    """Test the bench_asgi command."""
+
+    def test_bench_asgi(self):
+        """Test every mode serves the requests without errors."""
+        user = UserFactory.create(email='bench@example.com')
+        RecipeFactory.create_batch(3, user=user)
+        out = StringIO()
+
+        call_command(
+            'bench_asgi', 'bench@example.com',
+            '--requests', '4', '--concurrency', '2', stdout=out,
+        )
+
+        rows = [line.split() for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual(
+            [row[0] for row in rows], ['wsgi', 'asgi-sync', 'asgi-async'],
+        )
+        for row in rows:
+            self.assertEqual(row[1:3], ['4', '0'])
+
+    def test_bench_asgi_unknown_user(self):
+        """Test benchmarking as an unknown user fails."""
+        with self.assertRaises(CommandError):
+            call_command('bench_asgi', 'missing@example.com')
+
+
+class BenchApiCommandTests(TransactionTestCase):
+    """Test the bench_api command."""
+
+    def _bench(self, *args):
+        call_command(
+            'bench_api', '--users', '2', '--recipes', '3', '--tags', '2',
+            '--ingredients', '2', '--requests', '2', '--warmup', '1',
+            *args, stdout=StringIO(),
+        )
+
+    def test_bench_api(self):
+        """Test every scenario runs and the seeded data is removed."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            self._bench('--output', path)
+
+            with open(path) as results_file:
+                results = json.load(results_file)
+
+        self.assertEqual(results['shape']['recipes'], 3)
+        self.assertEqual(len(results['results']), 24)
+        for name, result in results['results'].items():
+            self.assertEqual(
+                (result['requests'], result['errors']), (2, 0), name,
+            )
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertGreater(results['results']['recipe-list']['queries'], 0)
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bench_api_regression(self):
+        """Test results slower than the baseline fail the command."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            with open(path, 'w') as baseline:
+                json.dump({'results': {'recipe-list': {
+                    'p95_ms': 0.001, 'queries': 0,
+                }}}, baseline)
+
+            with self.assertRaisesMessage(CommandError, 'recipe-list'):
+                self._bench(
+                    '--scenario', 'recipe-list', '--scenario', 'tag-list',
+                    '--baseline', path,
+                )
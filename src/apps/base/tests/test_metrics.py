@@ -0,0 +1,177 @@
+"""
+Tests for request timing and metrics.
+"""
+import re
+
+from django.db import connection
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.base.metrics import (
+    Histogram,
+    Registry,
+    RequestTiming,
+    _current,
+    registry,
+    time_serialization,
+)
+from apps.recipe.factories import RecipeFactory
+from apps.user.factories import UserFactory
+
+RECIPE_URL = reverse('recipe:recipe-list')
+ASYNC_RECIPE_URL = reverse('recipe-async:recipe-list')
+METRICS_URL = reverse('metrics')
+
+SERVER_TIMING_RE = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", view;dur=[\d.]+, '
+    r'serialize;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+'
+)
+
+
+class HistogramTests(SimpleTestCase):
+    """Test the metrics registry."""
+
+    def test_histogram_buckets(self):
+        """Test observations land in the first bucket holding them."""
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.cumulative(), [2, 3, 4])
+        self.assertEqual(histogram.sum, 14.5)
+
+    def test_expose(self):
+        """Test the registry renders the Prometheus text format."""
+        metrics = Registry()
+        timing = RequestTiming()
+        timing.finished = timing.started + 0.02
+        timing.queries = 2
+
+        metrics.observe('recipe:"odd"\nview', 'GET', 200, timing, size=100)
+
+        text = metrics.expose()
+        labels = r'view="recipe:\"odd\"\nview",method="GET"'
+        self.assertIn(
+            f'http_requests_total{{{labels},status="200"}} 1\n', text,
+        )
+        self.assertIn('# TYPE http_request_db_queries histogram\n', text)
+        self.assertIn(
+            f'http_request_db_queries_bucket{{{labels},le="1"}} 0\n', text,
+        )
+        self.assertIn(
+            f'http_request_db_queries_bucket{{{labels},le="2"}} 1\n', text,
+        )
+        self.assertIn(
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1\n',
+            text,
+        )
+        self.assertIn(f'http_response_size_bytes_sum{{{labels}}} 100\n', text)
+        self.assertIn(
+            f'http_request_serialize_seconds_count{{{labels}}} 1\n', text,
+        )
+
+    def test_time_serialization(self):
+        """Test serialization is timed once, outside of SQL queries."""
+        timing = RequestTiming()
+        token = _current.set(timing)
+        self.addCleanup(_current.reset, token)
+
+        with time_serialization():
+            with time_serialization():
+                timing.sql_time += 10
+
+        self.assertEqual(timing.serialize_time, 0.0)
+        self.assertFalse(timing.serializing)
+
+        with time_serialization():
+            pass
+
+        self.assertGreater(timing.serialize_time, 0.0)
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    """Test each request is timed and recorded."""
+
+    def setUp(self):
+        registry.reset()
+        self.user = UserFactory.create()
+        RecipeFactory.create_batch(2, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        """Test the header reports the queries the request ran."""
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(RECIPE_URL)
+
+        match = SERVER_TIMING_RE.fullmatch(res['Server-Timing'])
+        self.assertIsNotNone(match, res['Server-Timing'])
+        self.assertEqual(int(match.group(1)), len(context))
+        serialize = registry._histograms['http_request_serialize_seconds']
+        self.assertGreater(
+            serialize[(('view', 'recipe:recipe-list'), ('method', 'GET'))].sum,
+            0,
+        )
+
+    async def test_server_timing_header_async(self):
+        """Test queries run by async views are counted."""
+        client = AsyncClient()
+        headers = {
+            'Authorization': f'Bearer {AccessToken.for_user(self.user)}',
+        }
+
+        res = await client.get(ASYNC_RECIPE_URL, headers=headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        match = SERVER_TIMING_RE.fullmatch(res['Server-Timing'])
+        self.assertGreater(int(match.group(1)), 0)
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_server_timing_header_disabled(self):
+        """Test the header can be turned off."""
+        res = self.client.get(RECIPE_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    def test_metrics(self):
+        """Test the metrics endpoint exposes the recorded requests."""
+        self.client.get(RECIPE_URL)
+        self.client.get(RECIPE_URL)
+        self.client.force_authenticate(UserFactory.create(is_staff=True))
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            'http_requests_total{view="recipe:recipe-list",method="GET",'
+            'status="200"} 2\n',
+            res.content.decode(),
+        )
+
+    def test_metrics_require_admin(self):
+        """Test regular users cannot read the metrics."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """Test a scraper can read the metrics with the token."""
+        client = APIClient()
+
+        res = client.get(METRICS_URL, HTTP_X_METRICS_TOKEN='secret')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = client.get(METRICS_URL, HTTP_X_METRICS_TOKEN='guess')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
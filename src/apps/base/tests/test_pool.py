@@ -0,0 +1,201 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+import time
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.base.db.pool import ConnectionPool, PoolTimeout
+from apps.user.factories import UserFactory
+
+POOL_STATS_URL = reverse('db-pool-stats')
+
+
+class FakeConnection:
+    closed = 0
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test checking connections out of and into the pool."""
+
+    def test_reuses_returned_connection(self):
+        """Test a returned connection is handed out again."""
+        pool = ConnectionPool(size=2)
+
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+        second = pool.getconn(FakeConnection)
+
+        self.assertIs(first, second)
+        stats = pool.stats()
+        self.assertEqual(stats['connects'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_timeout_when_exhausted(self):
+        """Test checking out of a full pool times out."""
+        pool = ConnectionPool(size=1, timeout=0.01)
+        pool.getconn(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+
+        stats = pool.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertTrue(stats['exhausted'])
+        self.assertGreater(stats['exhausted_time'], 0)
+
+    def test_waits_for_returned_connection(self):
+        """Test a checkout waits for a connection to be returned."""
+        pool = ConnectionPool(size=1, timeout=5)
+        conn = pool.getconn(FakeConnection)
+        timer = threading.Timer(0.02, pool.putconn, [conn])
+        timer.start()
+
+        self.assertIs(pool.getconn(FakeConnection), conn)
+
+        timer.join()
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['wait_time'], 0)
+        self.assertGreaterEqual(stats['max_wait_time'], stats['wait_time'])
+
+    def test_exhausted_time_stops_when_returned(self):
+        """Test exhausted time only accrues while the pool is full."""
+        pool = ConnectionPool(size=1)
+        conn = pool.getconn(FakeConnection)
+        time.sleep(0.01)
+        pool.putconn(conn)
+
+        stats = pool.stats()
+        self.assertFalse(stats['exhausted'])
+        exhausted_time = stats['exhausted_time']
+        self.assertGreater(exhausted_time, 0)
+        time.sleep(0.01)
+        self.assertEqual(pool.stats()['exhausted_time'], exhausted_time)
+
+    def test_failed_health_check_replaces_connection(self):
+        """Test an idle connection failing its check is replaced."""
+        def check(conn):
+            raise RuntimeError('gone')
+
+        pool = ConnectionPool(size=1, check_interval=0, check=check)
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+        second = pool.getconn(FakeConnection)
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        stats = pool.stats()
+        self.assertEqual(stats['discards'], 1)
+        self.assertEqual(stats['open'], 1)
+
+    def test_health_check_skipped_for_recent_connections(self):
+        """Test connections idle for less than the interval are reused."""
+        checked = []
+        pool = ConnectionPool(size=1, check_interval=60, check=checked.append)
+        conn = pool.getconn(FakeConnection)
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(FakeConnection), conn)
+        self.assertEqual(checked, [])
+
+    def test_expired_connection_closed(self):
+        """Test connections are closed past their lifetime."""
+        pool = ConnectionPool(size=1, max_lifetime=0)
+        conn = pool.getconn(FakeConnection)
+        pool.putconn(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+    def test_failed_reset_discards_connection(self):
+        """Test a connection that cannot be reset is not reused."""
+        def reset(conn):
+            raise RuntimeError('broken')
+
+        pool = ConnectionPool(size=1, reset=reset)
+        conn = pool.getconn(FakeConnection)
+        pool.putconn(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertIsNot(pool.getconn(FakeConnection), conn)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a connection error does not leak a pool slot."""
+        def connect():
+            raise RuntimeError('refused')
+
+        pool = ConnectionPool(size=1, timeout=0.01)
+        with self.assertRaises(RuntimeError):
+            pool.getconn(connect)
+
+        pool.getconn(FakeConnection)
+        stats = pool.stats()
+        self.assertEqual(stats['open'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+
+class PooledDatabaseWrapperTests(TransactionTestCase):
+    """Test Django connections are borrowed from the pool."""
+
+    def test_connection_reused_after_close(self):
+        """Test closing a connection returns it to the pool."""
+        connection.ensure_connection()
+        raw_connection = connection.connection
+        connection.close()
+
+        connection.ensure_connection()
+
+        self.assertIs(connection.connection, raw_connection)
+        self.assertFalse(raw_connection.closed)
+
+    def test_open_transaction_rolled_back_on_return(self):
+        """Test a connection is returned without an open transaction."""
+        connection.ensure_connection()
+        connection.set_autocommit(False)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connection.close()
+
+        connection.ensure_connection()
+
+        self.assertTrue(connection.get_autocommit())
+        self.assertFalse(connection.in_atomic_block)
+
+
+class DatabasePoolStatsApiTests(TestCase):
+    """Test the connection pool stats endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_stats_require_admin(self):
+        """Test pool stats are only served to admins."""
+        self.client.force_authenticate(UserFactory.create())
+
+        res = self.client.get(POOL_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats(self):
+        """Test pool stats are reported by database."""
+        self.client.force_authenticate(UserFactory.create(is_staff=True))
+
+        res = self.client.get(POOL_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        stats = res.data['default']
+        self.assertEqual(stats['size'], connection.get_pool().size)
+        for key in ['in_use', 'idle', 'checkouts', 'waits', 'timeouts',
+                    'exhausted_time']:
+            self.assertIn(key, stats)
@@ -0,0 +1,149 @@
+"""
+Tests for the fast JSON renderer and parser.
+"""
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from apps.base.parsers import FastJSONParser
+from apps.base.renderers import FastJSONRenderer
+from apps.recipe.factories import RecipeFactory, TagFactory
+from apps.user.factories import UserFactory
+
+PAYLOAD = {
+    'price': Decimal('12.50'),
+    'created': datetime.datetime(
+        2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc,
+    ),
+    'local': datetime.datetime(
+        2024, 1, 2, 3, 4, 5,
+        tzinfo=datetime.timezone(datetime.timedelta(hours=4)),
+    ),
+    'naive': datetime.datetime(2024, 1, 2, 3, 4, 5, 600),
+    'date': datetime.date(2024, 1, 2),
+    'time': datetime.time(3, 4, 5, 678901),
+    'duration': datetime.timedelta(minutes=90),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'lazy': gettext_lazy('Recipe'),
+    'image': 'http://testserver/media/uploads/recipe/a b.jpg',
+    'text': 'Crème brûlée \u2028 \u2029 "quoted" \\ \n',
+    'results': ReturnList([{'id': 1, 'tags': [1, 2]}], serializer=None),
+    1: None,
+    'float': 0.1,
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the renderer matches the stdlib renderer."""
+
+    def assertSameRender(self, data, accepted_media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_render_matches_stdlib(self):
+        """Test Decimal, datetime and other values render the same."""
+        self.assertSameRender(PAYLOAD)
+
+    def test_render_falls_back(self):
+        """Test values orjson cannot encode are rendered by the stdlib."""
+        self.assertSameRender({'id': 2 ** 70})
+        self.assertSameRender(PAYLOAD, 'application/json; indent=4')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_render_without_orjson(self):
+        """Test the stdlib is used when orjson is not installed."""
+        with patch('apps.base.renderers.orjson', None):
+            self.assertSameRender(PAYLOAD)
+
+    @override_settings(FAST_JSON=False)
+    @patch('apps.base.renderers.orjson.dumps')
+    def test_render_disabled(self, patched_dumps):
+        """Test orjson can be turned off."""
+        self.assertSameRender(PAYLOAD)
+
+        patched_dumps.assert_not_called()
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test the parser matches the stdlib parser."""
+
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body), 'application/json', {})
+
+    def test_parse(self):
+        """Test bodies decode like the stdlib decoder."""
+        for body in (
+            b'{"title": "Cr\xc3\xa8me", "price": "5.50", "tags": [{}]}',
+            b'[1.5, -2, null, true]',
+            b'{"id": 123456789012345678901234567890}',
+        ):
+            self.assertEqual(
+                self.parse(FastJSONParser(), body),
+                self.parse(JSONParser(), body),
+            )
+
+    def test_parse_error(self):
+        """Test invalid bodies raise the stdlib parse error."""
+        for body in (b'{"title": ', b'{"price": NaN}'):
+            with self.assertRaises(ParseError) as fast:
+                self.parse(FastJSONParser(), body)
+            with self.assertRaises(ParseError) as stdlib:
+                self.parse(JSONParser(), body)
+
+            self.assertEqual(fast.exception.detail, stdlib.exception.detail)
+
+
+class FastJSONApiTests(TestCase):
+    """Test API responses are unchanged by the fast renderer."""
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_recipe_detail(self):
+        """Test a recipe with an image renders the same."""
+        recipe = RecipeFactory.create(
+            user=self.user, price=Decimal('7.25'), description='Crème',
+        )
+        recipe.image = 'uploads/recipe/example.jpg'
+        recipe.save()
+        recipe.tags.add(TagFactory.create(user=self.user))
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+
+        fast = self.client.get(url)
+        with override_settings(FAST_JSON=False):
+            stdlib = self.client.get(url)
+
+        self.assertEqual(fast.content, stdlib.content)
+        self.assertIn(b'"price":"7.25"', fast.content)
+        self.assertIn(b'/media/uploads/recipe/example.jpg', fast.content)
+
+    def test_create_recipe(self):
+        """Test JSON request bodies are parsed."""
+        payload = {
+            'title': 'Crème', 'time_minutes': 5, 'price': '5.50',
+            'tags': [{'name': 'Dessert'}],
+        }
+
+        res = self.client.post(
+            reverse('recipe:recipe-list'), payload, format='json',
+        )
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()['title'], 'Crème')
+        self.assertEqual(res.json()['tags'][0]['name'], 'Dessert')
@@ -0,0 +1,209 @@
+"""
+Tests for routing reads to replicas.
+"""
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.base.routers import (
+    ReplicaRouter,
+    ais_pinned_to_primary,
+    check_pin_cache,
+    is_pinned_to_primary,
+    pin_to_primary,
+    replica_reads,
+)
+from apps.recipe.factories import RecipeFactory, TagFactory
+from apps.recipe.models import Recipe
+from apps.user.factories import UserFactory
+
+RECIPE_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+TAG_URL = reverse('recipe:tag-list')
+ASYNC_RECIPE_URL = reverse('recipe-async:recipe-list')
+
+LOCAL_CACHE = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+SHARED_CACHE = {
+    'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    'LOCATION': 'redis://localhost:6379',
+}
+
+
+@override_settings(DB_REPLICAS=['replica_1'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the replica router."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        """Test reads outside replica_reads() go to the primary."""
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_replica_reads(self):
+        """Test reads inside replica_reads() go to a replica."""
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica_1')
+            self.assertEqual(self.router.db_for_write(Recipe), 'default')
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    @override_settings(DB_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test reads stay on the primary without replicas."""
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_migrations_only_on_primary(self):
+        """Test migrations only run on the primary."""
+        self.assertTrue(self.router.allow_migrate('default', 'recipe'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'recipe'))
+
+    def test_pin_to_primary(self):
+        """Test users are pinned to the primary for the sticky window."""
+        self.assertFalse(is_pinned_to_primary(-1))
+
+        pin_to_primary(-1)
+
+        self.assertTrue(is_pinned_to_primary(-1))
+        self.assertTrue(async_to_sync(ais_pinned_to_primary)(-1))
+        cache.delete('db:pinned:-1')
+
+    @override_settings(
+        DB_PIN_CACHE_ALIAS='pins',
+        CACHES={
+            **settings.CACHES,
+            'pins': {**LOCAL_CACHE, 'LOCATION': 'pins'},
+        },
+    )
+    def test_pins_use_pin_cache(self):
+        """Test pins are stored in the DB_PIN_CACHE_ALIAS cache."""
+        pin_to_primary(-1)
+
+        self.assertTrue(caches['pins'].get('db:pinned:-1'))
+        self.assertIsNone(cache.get('db:pinned:-1'))
+
+    @override_settings(CACHES={'default': LOCAL_CACHE})
+    def test_local_pin_cache_rejected(self):
+        """Test replicas require a pin cache shared between processes."""
+        with self.assertRaises(ImproperlyConfigured):
+            check_pin_cache()
+
+        with override_settings(DB_REPLICAS=[]):
+            check_pin_cache()
+
+    @override_settings(
+        DB_PIN_CACHE_ALIAS='pins',
+        CACHES={'default': LOCAL_CACHE, 'pins': SHARED_CACHE},
+    )
+    def test_shared_pin_cache_accepted(self):
+        """Test a shared pin cache passes the check."""
+        check_pin_cache()
+
+
+@override_settings(DB_REPLICAS=['replica_1'])
+class ReplicaReadApiTests(TransactionTestCase):
+    """Test the recipe APIs read from the replica unless pinned."""
+    databases = {'default', 'replica_1'}
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        RecipeFactory.create_batch(2, user=self.user)
+        TagFactory.create(user=self.user)
+        cache.clear()
+
+    def get_queries(self, method, *args, **kwargs):
+        """Make a request and return the queries run on each database."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica_1']) as replica:
+            res = method(*args, **kwargs)
+
+        return res, len(primary), len(replica)
+
+    def test_reads_use_replica(self):
+        """Test list and retrieve reads are served by the replica."""
+        for url in [RECIPE_URL, TAG_URL]:
+            res, primary, replica = self.get_queries(self.client.get, url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(primary, 0)
+            self.assertGreater(replica, 0)
+
+    def test_export_uses_replica(self):
+        """Test the streamed export is read from the replica."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica_1']) as replica:
+            res = self.client.get(EXPORT_URL)
+            lines = b''.join(res.streaming_content).splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(len(primary), 0)
+        self.assertGreater(len(replica), 0)
+
+    def test_write_pins_user_to_primary(self):
+        """Test reads go to the primary right after a write."""
+        payload = {'title': 'Soup', 'time_minutes': 5, 'price': '1.00'}
+        res, primary, replica = self.get_queries(
+            self.client.post, RECIPE_URL, payload,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replica, 0)
+
+        res, primary, replica = self.get_queries(self.client.get, RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 3)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_pin_expires(self):
+        """Test reads return to the replica after the sticky window."""
+        with override_settings(DB_PRIMARY_STICKY_SECONDS=0.01):
+            pin_to_primary(self.user.id)
+        time.sleep(0.02)
+
+        res, primary, replica = self.get_queries(self.client.get, RECIPE_URL)
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_other_users_not_pinned(self):
+        """Test a write only pins the user who made it."""
+        pin_to_primary(UserFactory.create().id)
+
+        res, primary, replica = self.get_queries(self.client.get, RECIPE_URL)
+
+        self.assertEqual(primary, 0)
+
+    def test_async_reads_use_replica(self):
+        """Test the async list reads recipes from the replica."""
+        client = AsyncClient()
+        token = AccessToken.for_user(self.user)
+        headers = {'Authorization': f'Bearer {token}'}
+
+        res, primary, replica = self.get_queries(
+            async_to_sync(client.get), ASYNC_RECIPE_URL, headers=headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Only the token's user is loaded from the primary.
+        self.assertEqual(primary, 1)
+        self.assertGreater(replica, 0)
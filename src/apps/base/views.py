@@ -1,12 +1,187 @@
 """base views"""
+import hmac
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiParameter,
+    OpenApiTypes,
+)
 from rest_framework import viewsets, mixins
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import (
+    SAFE_METHODS,
+    BasePermission,
+    IsAdminUser,
+    IsAuthenticated,
+)
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.base.metrics import registry
+from apps.base.routers import (
+    is_pinned_to_primary,
+    pin_to_primary,
+    read_from_replicas,
+)
+from apps.recipe.autocomplete import (
+    AUTOCOMPLETE_LIMIT,
+    AUTOCOMPLETE_MAX_LIMIT,
+    autocomplete,
+)
+
+
+class ReplicaReadMixin:
+    """
+    Read from a replica on safe requests, unless the user wrote within
+    the sticky window, and pin the user to the primary on writes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user_id = request.user.pk
+        if request.method not in SAFE_METHODS:
+            # Pin before writing, so concurrent reads see the write too.
+            pin_to_primary(user_id)
+        elif not is_pinned_to_primary(user_id):
+            self._replica_reads_token = read_from_replicas.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_reads_token', None)
+        if token is not None:
+            read_from_replicas.reset(token)
+            self._replica_reads_token = None
+        elif request.method not in SAFE_METHODS and request.user.pk:
+            # Restart the window once the write has committed.
+            pin_to_primary(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
 
 
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
+class BaseRecipeAttrViewSet(ReplicaReadMixin,
+                            mixins.DestroyModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
     """Base views for recipe attributes."""
 
     permission_classes = [IsAuthenticated]
+
+    def filter_assigned(self, queryset):
+        """Keep only the items linked to recipes if requested."""
+        assigned_only = self.request.query_params.get('assigned_only', '0')
+        if assigned_only not in ('0', '1'):
+            raise ValidationError({'assigned_only': 'Must be 0 or 1.'})
+        if assigned_only == '1':
+            queryset = queryset.filter(recipe_count__gt=0)
+
+        return queryset
+
+    def perform_update(self, serializer):
+        # Renames rebuild the linked recipe documents in post_save, which
+        # must roll back with the rename when the rebuild fails.
+        with transaction.atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
+
+    def _autocomplete_limit(self):
+        """Return the number of matches requested."""
+        limit = self.request.query_params.get('limit', AUTOCOMPLETE_LIMIT)
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= AUTOCOMPLETE_MAX_LIMIT:
+            raise ValidationError(
+                {'limit': f'Must be between 1 and {AUTOCOMPLETE_MAX_LIMIT}.'}
+            )
+
+        return limit
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'prefix',
+                OpenApiTypes.STR,
+                description='Case insensitive start of the name to match',
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description=(
+                    f'Number of matches to return, defaults to '
+                    f'{AUTOCOMPLETE_LIMIT}'
+                ),
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=False, pagination_class=None)
+    def autocomplete(self, request):
+        """Return the most used names starting with a prefix."""
+        prefix = request.query_params.get('prefix', '')
+        matches = autocomplete(
+            self.queryset, request.user.pk, prefix, self._autocomplete_limit(),
+        )
+        serializer = self.get_serializer(matches, many=True)
+
+        return Response(serializer.data)
+
+
+class DatabasePoolStatsView(APIView):
+    """Report the connection pool usage of this process by database."""
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        stats = {}
+        for alias in connections:
+            get_pool = getattr(connections[alias], 'get_pool', None)
+            pool = get_pool() if get_pool else None
+            if pool is not None:
+                stats[alias] = pool.stats()
+
+        return Response(stats)
+
+
+class HasMetricsToken(BasePermission):
+    """Allow requests carrying the configured metrics token."""
+
+    def has_permission(self, request, view):
+        token = request.headers.get('X-Metrics-Token', '')
+        return bool(settings.METRICS_TOKEN) and hmac.compare_digest(
+            token.encode(), settings.METRICS_TOKEN.encode(),
+        )
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Render metrics, or an error detail, as plain text."""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data
+        return f'# {data.get("detail", "")}\n'
+
+
+class MetricsView(APIView):
+    """Expose the request metrics of this process to Prometheus."""
+
+    permission_classes = [IsAdminUser | HasMetricsToken]
+    renderer_classes = [PrometheusRenderer]
+
+    @extend_schema(responses={(200, 'text/plain'): OpenApiTypes.STR})
+    def get(self, request):
+        return Response(
+            registry.expose(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
@@ -0,0 +1,32 @@
+"""
+URL mappings for the async recipe read APIs.
+"""
+from django.urls import path
+
+from apps.recipe import views
+from apps.recipe.async_views import AsyncListView, AsyncRetrieveView
+
+app_name = 'recipe-async'
+
+urlpatterns = [
+    path(
+        'recipes/',
+        AsyncListView.as_view(viewset_class=views.RecipeViewSet),
+        name='recipe-list',
+    ),
+    path(
+        'recipes/<int:pk>/',
+        AsyncRetrieveView.as_view(viewset_class=views.RecipeViewSet),
+        name='recipe-detail',
+    ),
+    path(
+        'tags/',
+        AsyncListView.as_view(viewset_class=views.TagViewSet),
+        name='tag-list',
+    ),
+    path(
+        'ingredients/',
+        AsyncListView.as_view(viewset_class=views.IngredientViewSet),
+        name='ingredient-list',
+    ),
+]
@@ -0,0 +1,135 @@
+"""
+Async read views for the recipe APIs.
+
+Under ASGI these run on the event loop and query through the async ORM,
+so a worker does not pin a thread to each open connection. They reuse
+the querysets, pagination and serializers of the DRF viewsets, and
+render exactly what the synchronous list and retrieve actions do.
+"""
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404, HttpResponse
+from django.views import View
+
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from apps.base.routers import ais_pinned_to_primary, replica_reads
+from apps.user.authentication import AsyncJWTAuthentication
+
+
+class AsyncReadView(View):
+    """Serve a read action of `viewset_class` with the async ORM."""
+    viewset_class = None
+    action = None
+    http_method_names = ['get']
+
+    async def _authenticate(self, request):
+        """Return the authenticated user of the request."""
+        authenticator = AsyncJWTAuthentication()
+        user_auth = await authenticator.aauthenticate(request)
+        if user_auth is None:
+            exc = exceptions.NotAuthenticated()
+            # Read by the exception handler, as for synchronous views.
+            exc.auth_header = authenticator.authenticate_header(request)
+            raise exc
+
+        return user_auth[0]
+
+    def _get_viewset(self, request):
+        """Return a viewset bound to the request, without dispatching it."""
+        drf_request = Request(request)
+        drf_request.user = None
+        viewset = self.viewset_class(
+            request=drf_request,
+            args=self.args,
+            kwargs=self.kwargs,
+            action=self.action,
+            format_kwarg=None,
+        )
+        viewset.headers = {}
+        return viewset
+
+    async def get_data(self, viewset):
+        raise NotImplementedError
+
+    def _render(self, viewset, data, status, headers=None):
+        renderer = viewset.renderer_classes[0]()
+        response = HttpResponse(
+            renderer.render(data, renderer.media_type),
+            status=status,
+            content_type=renderer.media_type,
+        )
+        for name, value in (headers or {}).items():
+            response.headers[name] = value
+
+        return response
+
+    def _handle_exception(self, viewset, exc):
+        """Render an exception the way the DRF exception handler does."""
+        response = exception_handler(exc, {'view': viewset})
+        if response is None:
+            raise exc
+
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name != 'Content-Type'
+        }
+        return self._render(
+            viewset, response.data, response.status_code, headers,
+        )
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self._get_viewset(request)
+        try:
+            user = viewset.request.user = await self._authenticate(request)
+            if await ais_pinned_to_primary(user.pk):
+                data = await self.get_data(viewset)
+            else:
+                with replica_reads():
+                    data = await self.get_data(viewset)
+        except (exceptions.APIException, Http404) as exc:
+            return self._handle_exception(viewset, exc)
+
+        return self._render(viewset, data, 200)
+
+
+class AsyncListView(AsyncReadView):
+    """Async version of a viewset list action."""
+    action = 'list'
+
+    async def get_data(self, viewset):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        paginator = viewset.paginator
+        page = await paginator.apaginate_queryset(
+            queryset, viewset.request, view=viewset,
+        )
+        serializer = viewset.get_serializer(page, many=True)
+        if hasattr(serializer, 'adata'):
+            data = await serializer.adata()
+        else:
+            # Relations were prefetched along with the page.
+            data = serializer.data
+
+        return paginator.get_paginated_data(data)
+
+
+class AsyncRetrieveView(AsyncReadView):
+    """Async version of a viewset retrieve action."""
+    action = 'retrieve'
+
+    async def get_data(self, viewset):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        try:
+            instance = await queryset.aget(
+                **{viewset.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+
+        serializer = viewset.get_serializer(instance)
+        if hasattr(serializer, 'adata'):
+            return await serializer.adata()
+
+        return serializer.data
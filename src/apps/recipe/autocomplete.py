@@ -0,0 +1,82 @@
+"""
+Prefix autocomplete for tag and ingredient names.
+
+Matches are looked up through the name prefix index of each model or,
+with RECIPE_AUTOCOMPLETE_LOCAL_INDEX enabled, in a sorted list of the
+user's names kept in process. The local index is keyed by the user's
+recipe cache version, so any write to the user's recipes, tags or
+ingredients rebuilds it on the next lookup, and is only used while the
+recipe cache is enabled.
+"""
+import bisect
+import heapq
+import threading
+
+from django.conf import settings
+from django.db.models.functions import Upper
+
+from apps.recipe.cache import get_user_version, recipe_cache_enabled
+
+AUTOCOMPLETE_FIELDS = ('id', 'name', 'recipe_count')
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+LOCAL_INDEX_MAX_SIZE = 1000
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def _rank(row):
+    """Order matches by usage, then alphabetically ignoring case."""
+    return (-row['recipe_count'], row['name'].upper(), row['id'])
+
+
+class PrefixIndex:
+    """Sorted names of a user answering prefix queries by bisection."""
+
+    def __init__(self, rows):
+        self._rows = sorted(rows, key=lambda row: row['name'].upper())
+        self._keys = [row['name'].upper() for row in self._rows]
+
+    def __len__(self):
+        return len(self._rows)
+
+    def search(self, prefix, limit):
+        """Return the `limit` best ranked rows starting with `prefix`."""
+        prefix = prefix.upper()
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + '\U0010ffff', start)
+        matches = (self._rows[i] for i in range(start, end))
+
+        return [dict(row) for row in heapq.nsmallest(limit, matches, _rank)]
+
+
+def _get_local_index(queryset, user_id):
+    """Return the user's prefix index, rebuilding it when outdated."""
+    key = (queryset.model._meta.label, user_id)
+    version = get_user_version(user_id)
+    entry = _local.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    index = PrefixIndex(queryset.values(*AUTOCOMPLETE_FIELDS))
+    with _local_lock:
+        if key not in _local and len(_local) >= LOCAL_INDEX_MAX_SIZE:
+            # Evict the oldest entry.
+            del _local[next(iter(_local))]
+        _local[key] = (version, index)
+
+    return index
+
+
+def autocomplete(queryset, user_id, prefix, limit):
+    """Return the most used names of a user starting with a prefix."""
+    queryset = queryset.filter(user_id=user_id)
+    if settings.RECIPE_AUTOCOMPLETE_LOCAL_INDEX and recipe_cache_enabled():
+        return _get_local_index(queryset, user_id).search(prefix, limit)
+
+    return list(
+        queryset.filter(name__istartswith=prefix).order_by(
+            '-recipe_count', Upper('name'), 'id',
+        ).values(*AUTOCOMPLETE_FIELDS)[:limit]
+    )
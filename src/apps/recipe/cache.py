@@ -0,0 +1,172 @@
+"""
+Per-user versioned response cache for the recipe APIs.
+
+Every cached response key embeds the user's current version, so bumping
+the version invalidates all of that user's cached responses at once
+without scanning or deleting keys. A version bumped by one process must
+be seen by all, so nothing is cached, and no validators are sent, unless
+RECIPE_CACHE_ALIAS is a shared cache.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.base.caches import is_shared_cache
+
+
+def get_cache():
+    """Return the cache backend used for recipe responses."""
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def recipe_cache_enabled():
+    """Return whether responses are cached and versioned."""
+    return is_shared_cache(settings.RECIPE_CACHE_ALIAS)
+
+
+def _version_key(user_id):
+    return f'recipe:version:{user_id}'
+
+
+def _modified_key(user_id):
+    return f'recipe:modified:{user_id}'
+
+
+def get_user_version(user_id):
+    """Return the current cache version for a user."""
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an
+        # old version that may still have responses cached under it.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def get_user_last_modified(user_id):
+    """Return the time of the user's last write as a timestamp."""
+    cache = get_cache()
+    key = _modified_key(user_id)
+    last_modified = cache.get(key)
+    if last_modified is None:
+        cache.add(key, int(time.time()), timeout=None)
+        last_modified = cache.get(key)
+
+    return last_modified
+
+
+def _incr_user_version(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+    cache.set(_modified_key(user_id), int(time.time()), timeout=None)
+
+
+def bump_user_version(user_id):
+    """Invalidate every cached response for a user."""
+    if not recipe_cache_enabled():
+        return
+
+    _incr_user_version(user_id)
+    # Bump again once the write is visible, so a read that raced the open
+    # transaction cannot keep stale data under the current version.
+    transaction.on_commit(lambda: _incr_user_version(user_id))
+
+
+def response_cache_key(request):
+    """Build the response cache key for a request."""
+    user_id = request.user.pk
+    version = get_user_version(user_id)
+    url = hashlib.sha256(
+        request.build_absolute_uri().encode('utf-8')
+    ).hexdigest()
+
+    return f'recipe:response:{user_id}:{version}:{url}'
+
+
+def response_etag(request):
+    """Build a strong ETag for a request from the user's version."""
+    user_id = request.user.pk
+    version = get_user_version(user_id)
+    validator = (
+        f'{user_id}:{version}:{request.accepted_media_type}:'
+        f'{request.build_absolute_uri()}'
+    )
+
+    return '"%s"' % hashlib.sha256(validator.encode('utf-8')).hexdigest()
+
+
+def conditional_get(view):
+    """Answer matching If-None-Match/If-Modified-Since with a 304."""
+
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        if not recipe_cache_enabled():
+            return view(self, request, *args, **kwargs)
+
+        etag = response_etag(request)
+        last_modified = get_user_last_modified(request.user.pk)
+        if last_modified is not None and int(time.time()) <= last_modified:
+            # Another write may still land within the same second and keep
+            # the same Last-Modified, so only the ETag, which embeds the
+            # version, validates responses until that second is over.
+            last_modified = None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified,
+        )
+        if response is None:
+            response = view(self, request, *args, **kwargs)
+
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED,
+        ):
+            response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(last_modified)
+
+        return response
+
+    return wrapper
+
+
+class VersionedCacheMixin:
+    """Serve list and retrieve responses from the per-user cache."""
+
+    def _cached_response(self, view, request, *args, **kwargs):
+        """Return a cached response or render and cache a fresh one."""
+        if not recipe_cache_enabled():
+            return view(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
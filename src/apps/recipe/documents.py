@@ -0,0 +1,111 @@
+"""
+Denormalized recipe documents for the read APIs.
+
+Each recipe keeps a rendered copy of its detail representation, tags and
+ingredients included, in RecipeDocument. Documents are rebuilt in the
+transaction of every write that changes what a recipe renders, so list
+and retrieve read one row per recipe instead of joining the relations.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import OuterRef
+from django.db.models.functions import JSONObject
+
+from apps.recipe.models import Recipe, RecipeDocument
+
+DOCUMENT_FIELDS = (
+    'id', 'title', 'time_minutes', 'price', 'link', 'description',
+    'image', 'renditions',
+)
+REBUILD_BATCH_SIZE = 1000
+
+_pending = ContextVar('pending_document_rebuilds', default=None)
+
+
+def _related(field, attr):
+    """Return the recipe's related names as an array of JSON objects."""
+    through = getattr(Recipe, field).through
+    return ArraySubquery(
+        through.objects.filter(
+            recipe_id=OuterRef('pk'),
+        ).order_by(f'{attr}_id').values(
+            json=JSONObject(id=f'{attr}_id', name=f'{attr}__name'),
+        )
+    )
+
+
+def render_documents(recipe_ids):
+    """Return the documents of the given recipes by recipe ID."""
+    rows = Recipe.objects.filter(pk__in=recipe_ids).values(
+        *DOCUMENT_FIELDS,
+        related_tags=_related('tags', 'tag'),
+        related_ingredients=_related('ingredients', 'ingredient'),
+    )
+    documents = {}
+    for row in rows:
+        document = {field: row[field] for field in DOCUMENT_FIELDS}
+        document['price'] = str(row['price'])
+        document['image'] = row['image'] or None
+        document['tags'] = row['related_tags']
+        document['ingredients'] = row['related_ingredients']
+        documents[row['id']] = document
+
+    return documents
+
+
+def rebuild_documents(recipe_ids):
+    """Render and store the documents of the given recipes."""
+    documents = render_documents(recipe_ids)
+    RecipeDocument.objects.bulk_create(
+        [
+            RecipeDocument(recipe_id=recipe_id, data=data)
+            for recipe_id, data in documents.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['recipe'],
+        update_fields=['data'],
+    )
+
+    return len(documents)
+
+
+def schedule_rebuild(recipe_ids):
+    """Rebuild the documents now, or at the end of `batch_rebuilds`."""
+    pending = _pending.get()
+    if pending is None:
+        rebuild_documents(list(recipe_ids))
+    else:
+        pending.update(recipe_ids)
+
+
+@contextmanager
+def batch_rebuilds():
+    """Rebuild each recipe written in the block once, when it exits."""
+    if _pending.get() is not None:
+        yield
+        return
+
+    pending = set()
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    if pending:
+        rebuild_documents(sorted(pending))
+
+
+def rebuild_all(queryset=None, batch_size=REBUILD_BATCH_SIZE):
+    """Rebuild the documents of every recipe, yielding progress."""
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    ids = queryset.order_by('pk').values_list('pk', flat=True)
+    last_id = 0
+    while True:
+        batch = list(ids.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        yield rebuild_documents(batch)
+        last_id = batch[-1]
@@ -0,0 +1,109 @@
+"""
+Streaming export of a user's recipes.
+"""
+import csv
+import json
+import re
+
+from django.db.models import Prefetch
+
+from apps.recipe.models import Recipe, Tag, Ingredient
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('ndjson', 'csv')
+CSV_FIELDS = [
+    'id', 'title', 'description', 'time_minutes',
+    'price', 'link', 'tags', 'ingredients',
+]
+ATTR_SEPARATOR = ';'
+ATTR_ESCAPE = '\\'
+# A name is a run of escaped characters or unescaped non-separators.
+ATTR_NAME_RE = re.compile(r'(?:\\.|[^;\\])+')
+ATTR_UNESCAPE_RE = re.compile(r'\\(.)')
+
+
+class Echo:
+    """File-like object that returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def join_names(names):
+    """Join tag or ingredient names, escaping the separator."""
+    return ATTR_SEPARATOR.join(
+        name.replace(ATTR_ESCAPE, ATTR_ESCAPE * 2).replace(
+            ATTR_SEPARATOR, ATTR_ESCAPE + ATTR_SEPARATOR,
+        )
+        for name in names
+    )
+
+
+def split_names(value):
+    """Split names joined by `join_names`."""
+    return [
+        ATTR_UNESCAPE_RE.sub(r'\1', name)
+        for name in ATTR_NAME_RE.findall(value)
+    ]
+
+
+def export_queryset(user, using=None):
+    """Return the recipes of a user, ready to be streamed."""
+    return Recipe.objects.using(using).filter(user=user).order_by('id').only(
+        'id', 'title', 'description', 'time_minutes', 'price', 'link',
+    ).prefetch_related(
+        Prefetch('tags', queryset=Tag.objects.using(using).only('name')),
+        Prefetch(
+            'ingredients',
+            queryset=Ingredient.objects.using(using).only('name'),
+        ),
+    )
+
+
+def export_rows(user, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    """Yield a dict per recipe, read from a server-side cursor."""
+    recipes = export_queryset(user, using).iterator(chunk_size=chunk_size)
+    for recipe in recipes:
+        yield {
+            'id': recipe.id,
+            'title': recipe.title,
+            'description': recipe.description,
+            'time_minutes': recipe.time_minutes,
+            'price': str(recipe.price),
+            'link': recipe.link,
+            'tags': [tag.name for tag in recipe.tags.all()],
+            'ingredients': [
+                ingredient.name for ingredient in recipe.ingredients.all()
+            ],
+        }
+
+
+def render_ndjson(rows):
+    """Yield one JSON document per line."""
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def render_csv(rows):
+    """Yield CSV lines, joining tag and ingredient names."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for row in rows:
+        row['tags'] = join_names(row['tags'])
+        row['ingredients'] = join_names(row['ingredients'])
+        yield writer.writerow([row[field] for field in CSV_FIELDS])
+
+
+def render_export(user, export_format, chunk_size=EXPORT_CHUNK_SIZE,
+                  using=None):
+    """
+    Yield the export of a user's recipes in the given format.
+
+    The rows are read while the response streams, after the view has
+    returned, so the database to read from is passed in `using`.
+    """
+    rows = export_rows(user, chunk_size=chunk_size, using=using)
+    if export_format == 'csv':
+        return render_csv(rows)
+
+    return render_ndjson(rows)
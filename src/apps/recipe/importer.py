@@ -0,0 +1,268 @@
+"""
+High-throughput import of recipes from NDJSON or CSV.
+"""
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from apps.recipe.cache import bump_user_version
+from apps.recipe.documents import rebuild_documents
+from apps.recipe.export import split_names
+from apps.recipe.models import Recipe, Tag, Ingredient
+
+IMPORT_BATCH_SIZE = 5000
+
+
+class RecipeImportError(ValueError):
+    """
+    Raised when an input row cannot be imported, with the `index` of the
+    row in its batch when a single row is at fault.
+    """
+
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.index = index
+
+
+def read_ndjson(lines):
+    """Yield a dict per non-empty NDJSON line."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            raise RecipeImportError(f'Line {number}: invalid JSON: {exc}')
+        if not isinstance(row, dict):
+            raise RecipeImportError(f'Line {number}: not a JSON object.')
+        yield row
+
+
+def read_csv(lines):
+    """Yield a dict per CSV row, splitting tag and ingredient names."""
+    reader = csv.DictReader(lines)
+    try:
+        for row in reader:
+            for field in ('tags', 'ingredients'):
+                row[field] = split_names(row.get(field) or '')
+            yield row
+    except csv.Error as exc:
+        raise RecipeImportError(f'Line {reader.line_num}: {exc}')
+
+
+def copy_rows(table, columns, rows):
+    """Load rows into a table with PostgreSQL COPY."""
+    buffer = io.StringIO()
+    # Quoted fields are never read as NULL, so every value loads as
+    # written, including empty strings and a literal \N.
+    csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {table} ({", ".join(columns)}) '
+            'FROM STDIN WITH (FORMAT csv)',
+            buffer,
+        )
+
+
+def reserve_ids(model, count):
+    """Return `count` new primary keys from the model's sequence."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class RecipeImporter:
+    """Load recipes and their links in batches."""
+
+    def __init__(self, default_user=None, use_copy=None):
+        self.default_user = default_user
+        if use_copy is None:
+            use_copy = connection.vendor == 'postgresql'
+        self.use_copy = use_copy
+        self._users = {}
+        self._attr_ids = {Tag: {}, Ingredient: {}}
+
+    def _user_ids(self, rows):
+        """Resolve the owner of every row, caching users by email."""
+        emails = {row.get('user') for row in rows if row.get('user')}
+        unknown = emails - self._users.keys()
+        if unknown:
+            self._users.update(
+                get_user_model().objects.filter(
+                    email__in=unknown,
+                ).values_list('email', 'id')
+            )
+
+        user_ids = []
+        for index, row in enumerate(rows):
+            email = row.get('user')
+            if email:
+                if email not in self._users:
+                    raise RecipeImportError(
+                        f'User {email} does not exist.', index,
+                    )
+                user_ids.append(self._users[email])
+            elif self.default_user is not None:
+                user_ids.append(self.default_user.id)
+            else:
+                raise RecipeImportError('Row has no user.', index)
+
+        return user_ids
+
+    def _resolve_attrs(self, model, user_ids, rows, field):
+        """Return the attr IDs of every row, creating missing attrs."""
+        known = self._attr_ids[model]
+        wanted = {
+            (user_id, name)
+            for user_id, row in zip(user_ids, rows)
+            for name in row.get(field) or []
+        }
+        missing = wanted - known.keys()
+        if missing:
+            existing = model.objects.filter(
+                user_id__in={user_id for user_id, name in missing},
+                name__in={name for user_id, name in missing},
+            ).values_list('user_id', 'name', 'id')
+            for user_id, name, attr_id in existing:
+                known.setdefault((user_id, name), attr_id)
+
+            created = model.objects.bulk_create([
+                model(user_id=user_id, name=name)
+                for user_id, name in sorted(missing - known.keys())
+            ])
+            for obj in created:
+                known[(obj.user_id, obj.name)] = obj.id
+
+        return [
+            list(dict.fromkeys(
+                known[(user_id, name)] for name in row.get(field) or []
+            ))
+            for user_id, row in zip(user_ids, rows)
+        ]
+
+    def _clean(self, model, field_name, value):
+        """Validate a value against the model field it is stored in."""
+        try:
+            return model._meta.get_field(field_name).clean(value, None)
+        except ValidationError as exc:
+            raise RecipeImportError(
+                f'Invalid {field_name} {value!r}: {" ".join(exc.messages)}'
+            ) from exc
+
+    def _clean_names(self, model, row, field):
+        names = row.get(field) or []
+        if not isinstance(names, list):
+            raise RecipeImportError(f'Invalid {field}: not a list of names.')
+
+        return [self._clean(model, 'name', name) for name in names]
+
+    def _clean_row(self, row):
+        """Return the row with every value checked and converted."""
+        return {
+            'user': row.get('user'),
+            'values': (
+                self._clean(Recipe, 'title', row.get('title')),
+                self._clean(
+                    Recipe, 'description', row.get('description') or '',
+                ),
+                self._clean(Recipe, 'time_minutes', row.get('time_minutes')),
+                self._clean(Recipe, 'price', row.get('price')),
+                self._clean(Recipe, 'link', row.get('link') or ''),
+            ),
+            'tags': self._clean_names(Tag, row, 'tags'),
+            'ingredients': self._clean_names(Ingredient, row, 'ingredients'),
+        }
+
+    def _clean_rows(self, rows):
+        cleaned = []
+        for index, row in enumerate(rows):
+            try:
+                cleaned.append(self._clean_row(row))
+            except RecipeImportError as exc:
+                exc.index = index
+                raise
+
+        return cleaned
+
+    def _insert_recipes(self, user_ids, values):
+        """Insert recipes and return their IDs."""
+        if not self.use_copy:
+            recipes = Recipe.objects.bulk_create([
+                Recipe(
+                    user_id=user_id,
+                    title=title,
+                    description=description,
+                    time_minutes=time_minutes,
+                    price=price,
+                    link=link,
+                )
+                for user_id, (title, description, time_minutes, price, link)
+                in zip(user_ids, values)
+            ])
+            return [recipe.id for recipe in recipes]
+
+        # COPY does not return generated keys, so reserve them up front.
+        ids = reserve_ids(Recipe, len(values))
+
+        copy_rows(
+            Recipe._meta.db_table,
+            ['id', 'user_id', 'title', 'description', 'time_minutes',
+             'price', 'link', 'image', 'renditions'],
+            (
+                (recipe_id, user_id, *value, '', '{}')
+                for recipe_id, user_id, value in zip(ids, user_ids, values)
+            ),
+        )
+        return ids
+
+    def _insert_links(self, through, field, recipe_ids, attr_ids):
+        links = [
+            (recipe_id, attr_id)
+            for recipe_id, ids in zip(recipe_ids, attr_ids)
+            for attr_id in ids
+        ]
+        if not links:
+            return
+
+        if self.use_copy:
+            copy_rows(through._meta.db_table, ['recipe_id', field], links)
+        else:
+            through.objects.bulk_create([
+                through(recipe_id=recipe_id, **{field: attr_id})
+                for recipe_id, attr_id in links
+            ])
+
+    def load(self, rows):
+        """Load a batch of rows in one transaction."""
+        with transaction.atomic():
+            rows = self._clean_rows(rows)
+            user_ids = self._user_ids(rows)
+            values = [row['values'] for row in rows]
+            tag_ids = self._resolve_attrs(Tag, user_ids, rows, 'tags')
+            ingredient_ids = self._resolve_attrs(
+                Ingredient, user_ids, rows, 'ingredients',
+            )
+
+            recipe_ids = self._insert_recipes(user_ids, values)
+            self._insert_links(
+                Recipe.tags.through, 'tag_id', recipe_ids, tag_ids,
+            )
+            self._insert_links(
+                Recipe.ingredients.through, 'ingredient_id',
+                recipe_ids, ingredient_ids,
+            )
+            rebuild_documents(recipe_ids)
+
+            for user_id in set(user_ids):
+                bump_user_version(user_id)
+
+        return len(recipe_ids)
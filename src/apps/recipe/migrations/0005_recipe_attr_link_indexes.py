@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0004_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX recipe_recipe_tags_tag_recipe_idx '
+                'ON recipe_recipe_tags (tag_id, recipe_id);'
+            ),
+            reverse_sql='DROP INDEX recipe_recipe_tags_tag_recipe_idx;',
+        ),
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX recipe_recipe_ingredients_ingredient_recipe_idx '
+                'ON recipe_recipe_ingredients (ingredient_id, recipe_id);'
+            ),
+            reverse_sql=(
+                'DROP INDEX recipe_recipe_ingredients_ingredient_recipe_idx;'
+            ),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.0 on 2026-10-18 03:38
+
+from django.db import migrations, models
+
+# (link table, link column, counted table)
+LINK_TABLES = [
+    ('recipe_recipe_tags', 'tag_id', 'recipe_tag'),
+    ('recipe_recipe_ingredients', 'ingredient_id', 'recipe_ingredient'),
+]
+
+
+def count_sql(links, column, counted):
+    """Backfill the counts and keep them up to date with triggers."""
+    return f"""
+UPDATE {counted} AS counted SET recipe_count = linked.links
+FROM (
+    SELECT {column} AS id, count(*) AS links FROM {links} GROUP BY {column}
+) AS linked
+WHERE counted.id = linked.id;
+
+CREATE FUNCTION {links}_count_insert() RETURNS trigger AS $$
+BEGIN
+    UPDATE {counted} AS counted
+    SET recipe_count = counted.recipe_count + changed.links
+    FROM (
+        SELECT {column} AS id, count(*) AS links
+        FROM new_links GROUP BY {column}
+    ) AS changed
+    WHERE counted.id = changed.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION {links}_count_delete() RETURNS trigger AS $$
+BEGIN
+    UPDATE {counted} AS counted
+    SET recipe_count = counted.recipe_count - changed.links
+    FROM (
+        SELECT {column} AS id, count(*) AS links
+        FROM old_links GROUP BY {column}
+    ) AS changed
+    WHERE counted.id = changed.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {links}_count_insert AFTER INSERT ON {links}
+REFERENCING NEW TABLE AS new_links
+FOR EACH STATEMENT EXECUTE FUNCTION {links}_count_insert();
+
+CREATE TRIGGER {links}_count_delete AFTER DELETE ON {links}
+REFERENCING OLD TABLE AS old_links
+FOR EACH STATEMENT EXECUTE FUNCTION {links}_count_delete();
+"""
+
+
+def drop_count_sql(links, column, counted):
+    return f"""
+DROP TRIGGER {links}_count_insert ON {links};
+DROP TRIGGER {links}_count_delete ON {links};
+DROP FUNCTION {links}_count_insert();
+DROP FUNCTION {links}_count_delete();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0007_recipe_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ingredient',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['id']},
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ] + [
+        migrations.RunSQL(
+            sql=count_sql(*link_table),
+            reverse_sql=drop_count_sql(*link_table),
+        )
+        for link_table in LINK_TABLES
+    ]
@@ -4,7 +4,10 @@ Recipe models.
 import uuid
 import os
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Cast, Upper
 from config import settings
 
 
@@ -29,12 +32,64 @@ class Recipe(models.Model):
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    renditions = models.JSONField(default=dict, blank=True)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx',
+            ),
+            # Serves the user's pages in IdCursorPagination order.
+            models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Tag(models.Model):
+def name_prefix_index(name):
+    """Index the names of a user's rows for `name__istartswith` lookups."""
+    # Matches the UPPER("name"::text) LIKE expression Django generates.
+    return models.Index(
+        models.F('user'),
+        OpClass(
+            Upper(Cast('name', models.TextField())),
+            name='text_pattern_ops',
+        ),
+        name=name,
+    )
+
+
+class RecipeCountedModel(models.Model):
+    """Model counting the recipes linked to it."""
+    # Maintained by triggers on the recipe link tables, see migration 0008.
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+        # Counter updates move rows on disk, keep relations in a stable order.
+        ordering = ['id']
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Never write back a count that may be stale by now.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'recipe_count'
+            ]
+        super().save(*args, **kwargs)
+
+
+class Tag(RecipeCountedModel):
     """Tag for for filtering user."""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
@@ -42,11 +97,18 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta(RecipeCountedModel.Meta):
+        indexes = [
+            name_prefix_index('tag_name_prefix_idx'),
+            # Serves the user's pages in IdCursorPagination order.
+            models.Index(fields=['user', 'id'], name='tag_user_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(RecipeCountedModel):
     """Ingredient model."""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
@@ -54,5 +116,39 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta(RecipeCountedModel.Meta):
+        indexes = [
+            name_prefix_index('ingredient_name_prefix_idx'),
+            # Serves the user's pages in NameCursorPagination order.
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='ingredient_user_name_id_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeDocument(models.Model):
+    """Denormalized representation of a recipe served by the read APIs."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='document',
+    )
+    # Rendered detail fields, with tags and ingredients nested. Images are
+    # stored by name, as their URLs depend on the request.
+    data = models.JSONField()
+
+
+class ImportCheckpoint(models.Model):
+    """Number of rows of a named import already loaded."""
+    # Written in the transaction of each batch, so it never runs ahead of
+    # or behind the rows actually committed.
+    name = models.CharField(max_length=255, unique=True)
+    rows = models.PositiveBigIntegerField(default=0)
+
     def __str__(self):
         return self.name
@@ -0,0 +1,132 @@
+"""
+Background generation of recipe image renditions.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+from apps.recipe.cache import bump_user_version
+from apps.recipe.documents import rebuild_documents
+from apps.recipe.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    """Return the worker pool used to generate renditions."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_RENDITION_WORKERS,
+            thread_name_prefix='recipe-renditions',
+        )
+
+    return _executor
+
+
+def wait_for_renditions():
+    """Wait until the renditions scheduled so far are generated."""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def rendition_path(image_name, size):
+    """Return the storage path of an image rendition."""
+    stem, ext = os.path.splitext(os.path.basename(image_name))
+    filename = f'{stem}_{size}{ext}'
+
+    return os.path.join('uploads', 'recipe', 'renditions', filename)
+
+
+def _render(image, size, image_format):
+    rendition = image.copy()
+    rendition.thumbnail((size, size))
+    if image_format == 'JPEG' and rendition.mode not in ('RGB', 'L'):
+        rendition = rendition.convert('RGB')
+
+    content = BytesIO()
+    rendition.save(content, image_format)
+    return ContentFile(content.getvalue())
+
+
+def generate_renditions(recipe_id, user_id, image_name):
+    """Render every configured size of a recipe image and record them."""
+    try:
+        with default_storage.open(image_name) as image_file:
+            image = Image.open(image_file)
+            image.load()
+
+        renditions = {}
+        for size in settings.RECIPE_IMAGE_RENDITION_SIZES:
+            path = rendition_path(image_name, size)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            renditions[str(size)] = default_storage.save(
+                path, _render(image, size, image.format),
+            )
+
+        # Only record renditions if the image was not replaced meanwhile.
+        updated = Recipe.objects.filter(
+            pk=recipe_id, image=image_name,
+        ).update(renditions=renditions)
+        if updated:
+            rebuild_documents([recipe_id])
+            bump_user_version(user_id)
+        else:
+            delete_image_files(None, renditions)
+    finally:
+        connections.close_all()
+
+
+def delete_image_files(image_name, renditions):
+    """Delete a replaced recipe image and its renditions from storage."""
+    names = list(renditions.values())
+    if image_name:
+        names.append(image_name)
+    for name in names:
+        default_storage.delete(name)
+
+
+def _log_failure(recipe_id, image_name, future):
+    exc = future.exception()
+    if exc is not None:
+        logger.error(
+            'Generating renditions of %s for recipe %s failed.',
+            image_name, recipe_id, exc_info=exc,
+        )
+
+
+def _submit(recipe_id, user_id, image_name):
+    future = get_executor().submit(
+        generate_renditions, recipe_id, user_id, image_name,
+    )
+    future.add_done_callback(partial(_log_failure, recipe_id, image_name))
+    return future
+
+
+def schedule_renditions(recipe, replaced_image=None,
+                        replaced_renditions=None):
+    """
+    Generate renditions for a recipe image once the upload commits, and
+    delete the image it replaced along with that image's renditions.
+    """
+    transaction.on_commit(partial(
+        _submit, recipe.pk, recipe.user_id, recipe.image.name,
+    ))
+    if replaced_image or replaced_renditions:
+        transaction.on_commit(partial(
+            delete_image_files, replaced_image, replaced_renditions or {},
+        ))
@@ -0,0 +1,214 @@
+"""
+Deterministic datasets of users with recipes, tags and ingredients.
+
+Every user's data is drawn from a random generator seeded with the
+dataset seed and the user's index, so a seed always generates the same
+rows whatever the batch size. Rows are loaded with PostgreSQL COPY, or
+bulk_create elsewhere, and every seeded user shares one password hash.
+"""
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from apps.recipe.documents import rebuild_documents
+from apps.recipe.importer import copy_rows, reserve_ids
+from apps.recipe.models import Recipe, Tag, Ingredient
+
+SEED_PASSWORD = 'seed-pass-123'
+SEED_BATCH_SIZE = 5000
+WORDS = (
+    'apple', 'basil', 'bean', 'beef', 'bread', 'butter', 'carrot',
+    'cheese', 'chicken', 'chili', 'coconut', 'corn', 'curry', 'egg',
+    'garlic', 'ginger', 'honey', 'lamb', 'lemon', 'lentil', 'lime',
+    'mango', 'mushroom', 'noodle', 'onion', 'orange', 'pasta', 'pea',
+    'pepper', 'pork', 'potato', 'rice', 'salmon', 'soup', 'spinach',
+    'stew', 'tofu', 'tomato', 'tuna', 'yogurt',
+)
+
+
+def seed_email(email_prefix, index):
+    return f'{email_prefix}-{index}@example.com'
+
+
+class DatasetSeeder:
+    """Generate users with recipes, tags and ingredients in batches."""
+
+    def __init__(self, seed=0, email_prefix='seed',
+                 batch_size=SEED_BATCH_SIZE, use_copy=None,
+                 build_documents=True):
+        self.random_seed = seed
+        self.email_prefix = email_prefix
+        self.batch_size = batch_size
+        if use_copy is None:
+            use_copy = connection.vendor == 'postgresql'
+        self.use_copy = use_copy
+        self.build_documents = build_documents
+        # Hash once, every seeded user shares the password.
+        self.password = make_password(SEED_PASSWORD)
+
+    def _insert(self, model, columns, rows):
+        """Insert rows of values for the columns and return their IDs."""
+        if not self.use_copy:
+            objs = model.objects.bulk_create(
+                [model(**dict(zip(columns, row))) for row in rows],
+                batch_size=self.batch_size,
+            )
+            return [obj.pk for obj in objs]
+
+        # COPY does not return generated keys, so reserve them up front.
+        ids = reserve_ids(model, len(rows))
+        copy_rows(
+            model._meta.db_table,
+            ['id', *columns],
+            ((pk, *row) for pk, row in zip(ids, rows)),
+        )
+        return ids
+
+    def _insert_links(self, through, field, links):
+        if self.use_copy:
+            copy_rows(through._meta.db_table, ['recipe_id', field], links)
+        else:
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe_id, **{field: attr_id})
+                    for recipe_id, attr_id in links
+                ],
+                batch_size=self.batch_size,
+            )
+
+    def _insert_users(self, indexes):
+        return self._insert(
+            get_user_model(),
+            ['password', 'is_superuser', 'email', 'name', 'is_active',
+             'is_staff'],
+            [
+                (
+                    self.password, False,
+                    seed_email(self.email_prefix, index),
+                    f'Seed User {index}', True, False,
+                )
+                for index in indexes
+            ],
+        )
+
+    def _insert_attrs(self, model, user_ids, names):
+        """Insert the named attrs of each user, returning their IDs."""
+        ids = iter(self._insert(
+            model,
+            ['user_id', 'name', 'recipe_count'],
+            [
+                (user_id, name, 0)
+                for user_id, user_names in zip(user_ids, names)
+                for name in user_names
+            ],
+        ))
+        return [[next(ids) for _ in user_names] for user_names in names]
+
+    def _recipes(self, rng, user_id, count, tag_ids, ingredient_ids, links):
+        """Yield the values, tag IDs and ingredient IDs of each recipe."""
+        for index in range(count):
+            values = (
+                user_id,
+                ' '.join(rng.sample(WORDS, 3)).capitalize(),
+                ' '.join(rng.choices(WORDS, k=12)),
+                rng.randint(5, 180),
+                Decimal(rng.randint(100, 9999)) / 100,
+                f'https://example.com/recipes/{index}',
+                '',
+                {},
+            )
+            yield (
+                values,
+                rng.sample(tag_ids, min(links, len(tag_ids))),
+                rng.sample(ingredient_ids, min(links, len(ingredient_ids))),
+            )
+
+    def _load_recipes(self, batch):
+        """Insert a batch of generated recipes with their links."""
+        values = [row[0] for row in batch]
+        if self.use_copy:
+            # Written as JSON text by COPY.
+            values = [(*value[:-1], '{}') for value in values]
+        with transaction.atomic():
+            recipe_ids = self._insert(
+                Recipe,
+                ['user_id', 'title', 'description', 'time_minutes', 'price',
+                 'link', 'image', 'renditions'],
+                values,
+            )
+            self._insert_links(Recipe.tags.through, 'tag_id', [
+                (recipe_id, tag_id)
+                for recipe_id, row in zip(recipe_ids, batch)
+                for tag_id in row[1]
+            ])
+            self._insert_links(
+                Recipe.ingredients.through, 'ingredient_id', [
+                    (recipe_id, ingredient_id)
+                    for recipe_id, row in zip(recipe_ids, batch)
+                    for ingredient_id in row[2]
+                ],
+            )
+            if self.build_documents:
+                rebuild_documents(recipe_ids)
+
+        return len(recipe_ids)
+
+    def seed(self, users, recipes, tags, ingredients, links):
+        """
+        Create `users` users with `recipes` recipes, `tags` tags and
+        `ingredients` ingredients each, every recipe linked to up to
+        `links` tags and ingredients. Yield the number of users and
+        recipes created after each committed batch.
+        """
+        users_per_batch = max(1, self.batch_size // max(recipes, 1))
+        for start in range(0, users, users_per_batch):
+            indexes = range(start, min(users, start + users_per_batch))
+            rngs = [
+                random.Random(f'{self.random_seed}:{index}')
+                for index in indexes
+            ]
+            with transaction.atomic():
+                user_ids = self._insert_users(indexes)
+                tag_ids = self._insert_attrs(
+                    Tag, user_ids,
+                    [[f'Tag {index}' for index in range(tags)]] * len(rngs),
+                )
+                ingredient_ids = self._insert_attrs(
+                    Ingredient, user_ids,
+                    [
+                        [f'{rng.choice(WORDS)} {index}'
+                         for index in range(ingredients)]
+                        for rng in rngs
+                    ],
+                )
+            yield len(user_ids), 0
+
+            batch = []
+            for rng, user_id, user_tag_ids, user_ingredient_ids in zip(
+                rngs, user_ids, tag_ids, ingredient_ids,
+            ):
+                for row in self._recipes(
+                    rng, user_id, recipes, user_tag_ids,
+                    user_ingredient_ids, links,
+                ):
+                    batch.append(row)
+                    if len(batch) == self.batch_size:
+                        yield 0, self._load_recipes(batch)
+                        batch = []
+            if batch:
+                yield 0, self._load_recipes(batch)
+
+
+def seed_dataset(users, recipes, tags, ingredients, links, seed=0,
+                 email_prefix='seed', **kwargs):
+    """Seed a dataset and return its users."""
+    seeder = DatasetSeeder(seed=seed, email_prefix=email_prefix, **kwargs)
+    for _ in seeder.seed(users, recipes, tags, ingredients, links):
+        pass
+
+    return list(get_user_model().objects.filter(
+        email__in=[seed_email(email_prefix, index) for index in range(users)],
+    ).order_by('pk'))
@@ -1,84 +1,169 @@
 """
 Serializers for recipe APIs
 """
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.db import transaction
+
 from rest_framework import serializers
 
+from apps.base.metrics import time_serialization
+from apps.base.serializers import TimedDataMixin, TimedListSerializer
+from apps.recipe.cache import bump_user_version
+from apps.recipe.documents import (
+    batch_rebuilds,
+    render_documents,
+    schedule_rebuild,
+)
 from apps.recipe.models import Recipe, Tag, Ingredient
 
+BULK_MAX_ITEMS = 500
+
+
+def file_url(name, request=None):
+    """Return the URL of a stored file, absolute when given a request."""
+    url = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+
+    return url
+
+
+class RenditionsField(serializers.ReadOnlyField):
+    """Image rendition URLs keyed by size, once they are generated."""
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        return {size: file_url(name, request) for size, name in value.items()}
+
+
+def get_or_create_attrs(model, user, attrs):
+    """Resolve attrs by name, bulk creating the missing ones."""
+    names = list(dict.fromkeys(attr['name'] for attr in attrs))
+    if not names:
+        return []
+
+    existing = {
+        obj.name: obj
+        for obj in model.objects.filter(user=user, name__in=names)
+    }
+    missing = [
+        model(user=user, name=name)
+        for name in names if name not in existing
+    ]
+    for obj in model.objects.bulk_create(missing):
+        existing[obj.name] = obj
+
+    return [existing[name] for name in names]
+
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Serializer for ingredient."""
     class Meta:
         model = Ingredient
-        fields = ['id', 'name']
-        read_only_fields = ['id']
+        fields = ['id', 'name', 'recipe_count']
+        read_only_fields = ['id', 'recipe_count']
+        list_serializer_class = TimedListSerializer
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Serializer for tag."""
     class Meta:
         model = Tag
+        fields = ['id', 'name', 'recipe_count']
+        read_only_fields = ['id', 'recipe_count']
+        list_serializer_class = TimedListSerializer
+
+
+class RecipeIngredientSerializer(IngredientSerializer):
+    """Serializer for ingredients nested in recipes."""
+    class Meta(IngredientSerializer.Meta):
         fields = ['id', 'name']
-        read_only_fields = ['id']
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeTagSerializer(TagSerializer):
+    """Serializer for tags nested in recipes."""
+    class Meta(TagSerializer.Meta):
+        fields = ['id', 'name']
+
+
+class RecipeSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Serializer for recipes."""
-    tags = TagSerializer(many=True, required=False)
-    ingredients = IngredientSerializer(many=True, required=False)
+    expandable_fields = ('tags', 'ingredients')
+
+    tags = RecipeTagSerializer(many=True, required=False)
+    ingredients = RecipeIngredientSerializer(many=True, required=False)
+    renditions = RenditionsField()
 
     class Meta:
         model = Recipe
         fields = ['id', 'title', 'time_minutes',
                   'price', 'link', 'tags',
-                  'ingredients', 'image',
+                  'ingredients', 'image', 'renditions',
                   ]
         read_only_fields = ['id']
+        list_serializer_class = TimedListSerializer
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        """
+        Keep only the given `fields` and render the expandable fields
+        missing from `expand` as lists of IDs.
+        """
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+        if expand is not None:
+            for field_name in set(self.expandable_fields) - set(expand):
+                if field_name in self.fields:
+                    self.fields[field_name] = (
+                        serializers.PrimaryKeyRelatedField(
+                            many=True, read_only=True,
+                        )
+                    )
 
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting or creating tags as needed."""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        tag_objs = get_or_create_attrs(Tag, auth_user, tags)
+        if tag_objs:
+            recipe.tags.add(*tag_objs)
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         """Handle getting or creating ingredients as needed."""
         auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.ingredients.add(ingredient_obj)
+        ingredient_objs = get_or_create_attrs(
+            Ingredient, auth_user, ingredients,
+        )
+        if ingredient_objs:
+            recipe.ingredients.add(*ingredient_objs)
 
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
-        recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        with transaction.atomic(), batch_rebuilds():
+            recipe = Recipe.objects.create(**validated_data)
+            self._get_or_create_tags(tags, recipe)
+            self._get_or_create_ingredients(ingredients, recipe)
         return recipe
 
     def update(self, instance, validated_data):
         """Update a recipe."""
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
-        if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
-        if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+        with transaction.atomic(), batch_rebuilds():
+            if tags is not None:
+                instance.tags.clear()
+                self._get_or_create_tags(tags, instance)
+            if ingredients is not None:
+                instance.ingredients.clear()
+                self._get_or_create_ingredients(ingredients, instance)
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
 
-        instance.save()
+            instance.save()
         return instance
 
 
@@ -89,11 +174,384 @@ class RecipeDetailSerializer(RecipeSerializer):
         fields = RecipeSerializer.Meta.fields + ['description']
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class FastRecipeListSerializer(TimedListSerializer):
+    """Serialize recipe rows, loading their relations in batches."""
+
+    def _relation_links(self, recipe_ids):
+        """Yield each rendered relation with its links to the recipes."""
+        child = self.child
+        relation_fields = (('tags', 'tag'), ('ingredients', 'ingredient'))
+        for field_name, field in relation_fields:
+            if field_name not in child.field_names:
+                continue
+
+            columns = ['recipe_id', f'{field}_id']
+            if field_name in child.expand:
+                columns.append(f'{field}__name')
+            through = getattr(Recipe, field_name).through
+            yield field_name, through.objects.filter(
+                recipe_id__in=recipe_ids,
+            ).order_by(f'{field}_id').values_list(*columns)
+
+    def _group_links(self, links):
+        """Group relation links by recipe ID."""
+        related = {}
+        for recipe_id, attr_id, *name in links:
+            if name:
+                value = {'id': attr_id, 'name': name[0]}
+            else:
+                value = attr_id
+            related.setdefault(recipe_id, []).append(value)
+
+        return related
+
+    def _load_relations(self, recipe_ids):
+        """Return the tags and ingredients of the recipes by recipe ID."""
+        return {
+            field_name: self._group_links(links)
+            for field_name, links in self._relation_links(recipe_ids)
+        }
+
+    async def _aload_relations(self, recipe_ids):
+        """Load the relations of the recipes with the async ORM."""
+        relations = {}
+        for field_name, links in self._relation_links(recipe_ids):
+            relations[field_name] = self._group_links(
+                [link async for link in links]
+            )
+
+        return relations
+
+    def to_representation(self, data):
+        rows = list(data)
+        relations = self._load_relations([row['id'] for row in rows])
+        return [self.child.to_representation(row, relations) for row in rows]
+
+    async def adata(self):
+        """Return the serialized rows, querying with the async ORM."""
+        with time_serialization():
+            rows = list(self.instance)
+            relations = await self._aload_relations(
+                [row['id'] for row in rows],
+            )
+            return serializers.ReturnList(
+                [self.child.to_representation(row, relations) for row in rows],
+                serializer=self,
+            )
+
+
+class FastRecipeSerializer(TimedDataMixin, serializers.BaseSerializer):
+    """
+    Read only serializer for recipe lists built from `values()` rows.
+
+    Renders exactly what RecipeSerializer does, without the per field
+    ModelSerializer machinery.
+    """
+    expandable_fields = RecipeSerializer.expandable_fields
+    price_field = serializers.DecimalField(
+        max_digits=Recipe._meta.get_field('price').max_digits,
+        decimal_places=Recipe._meta.get_field('price').decimal_places,
+    )
+
+    class Meta:
+        fields = RecipeSerializer.Meta.fields
+        list_serializer_class = FastRecipeListSerializer
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field_names = [
+            field for field in self.Meta.fields
+            if fields is None or field in fields
+        ]
+        self.expand = self.expandable_fields if expand is None else expand
+
+    @classmethod
+    def columns(cls, fields):
+        """Return the columns needed to render the given fields."""
+        return ['id'] + [
+            field for field in fields
+            if field not in cls.expandable_fields and field != 'id'
+        ]
+
+    def to_representation(self, row, relations=None):
+        request = self.context.get('request')
+        relations = relations or {}
+        representation = {}
+        for field in self.field_names:
+            if field == 'price':
+                value = self.price_field.to_representation(row['price'])
+            elif field == 'image':
+                value = None
+                if row['image']:
+                    value = file_url(row['image'], request)
+            elif field == 'renditions':
+                value = {
+                    size: file_url(name, request)
+                    for size, name in row['renditions'].items()
+                }
+            elif field in self.expandable_fields:
+                value = relations.get(field, {}).get(row['id'], [])
+            else:
+                value = row[field]
+            representation[field] = value
+
+        return representation
+
+
+class DocumentRecipeListSerializer(FastRecipeListSerializer):
+    """Serialize recipe rows from their stored documents."""
+
+    def _group_documents(self, rows, rendered):
+        """Return the documents of the rows and their relations."""
+        child = self.child
+        documents = [
+            row['document__data'] or rendered[row['id']]
+            for row in rows
+            if row['document__data'] or row['id'] in rendered
+        ]
+        relations = {}
+        for field in child.expandable_fields:
+            related = relations[field] = {}
+            for document in documents:
+                values = document[field]
+                if field not in child.expand:
+                    values = [value['id'] for value in values]
+                related[document['id']] = values
+
+        return documents, relations
+
+    def _missing(self, rows):
+        return [row['id'] for row in rows if row['document__data'] is None]
+
+    def _represent(self, rows, rendered):
+        documents, relations = self._group_documents(rows, rendered)
+        return [
+            self.child.render_document(document, relations)
+            for document in documents
+        ]
+
+    def to_representation(self, data):
+        rows = list(data)
+        missing = self._missing(rows)
+        # Recipes written before their documents existed are rendered live.
+        rendered = render_documents(missing) if missing else {}
+        return self._represent(rows, rendered)
+
+    async def adata(self):
+        """Return the serialized rows, querying with the async ORM."""
+        rows = list(self.instance)
+        missing = self._missing(rows)
+        rendered = {}
+        if missing:
+            rendered = await sync_to_async(render_documents)(missing)
+        return serializers.ReturnList(
+            self._represent(rows, rendered), serializer=self,
+        )
+
+
+class DocumentRecipeSerializer(FastRecipeSerializer):
+    """
+    Read only serializer for recipe rows with their stored document,
+    selected as `values('id', 'document__data')`.
+    """
+
+    class Meta(FastRecipeSerializer.Meta):
+        list_serializer_class = DocumentRecipeListSerializer
+
+    def _as_list(self, row):
+        """Return a list serializer for a single row."""
+        return self.__class__.many_init(
+            [row], context=self.context,
+            fields=self.field_names, expand=self.expand,
+        )
+
+    def render_document(self, document, relations):
+        return super().to_representation(document, relations)
+
+    def to_representation(self, row):
+        return self._as_list(row).to_representation([row])[0]
+
+    async def adata(self):
+        """Return the serialized row, querying with the async ORM."""
+        data = await self._as_list(self.instance).adata()
+        return data[0]
+
+
+class DocumentRecipeDetailSerializer(DocumentRecipeSerializer):
+    """Read only serializer for a recipe detail from its document."""
+
+    class Meta(DocumentRecipeSerializer.Meta):
+        fields = RecipeDetailSerializer.Meta.fields
+
+
+class RecipeBulkCreateSerializer(RecipeDetailSerializer):
+    """Serializer for a recipe created through the bulk endpoint."""
+
+    class Meta(RecipeDetailSerializer.Meta):
+        fields = [
+            field for field in RecipeDetailSerializer.Meta.fields
+            if field not in ('image', 'renditions')
+        ]
+
+
+class RecipeBulkUpdateSerializer(RecipeBulkCreateSerializer):
+    """Serializer for a recipe updated through the bulk endpoint."""
+    id = serializers.IntegerField()
+
+    class Meta(RecipeBulkCreateSerializer.Meta):
+        read_only_fields = []
+        extra_kwargs = {
+            'title': {'required': False},
+            'time_minutes': {'required': False},
+            'price': {'required': False},
+        }
+
+
+class RecipeBulkSerializer(TimedDataMixin, serializers.Serializer):
+    """Serializer for creating, updating and deleting recipes in bulk."""
+    create = RecipeBulkCreateSerializer(
+        many=True, required=False, max_length=BULK_MAX_ITEMS,
+    )
+    update = RecipeBulkUpdateSerializer(
+        many=True, required=False, max_length=BULK_MAX_ITEMS,
+    )
+    delete = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        max_length=BULK_MAX_ITEMS,
+    )
+
+    def validate(self, attrs):
+        """Check updated and deleted recipes exist and are unique."""
+        update_ids = [item['id'] for item in attrs.get('update', [])]
+        delete_ids = attrs.get('delete', [])
+        errors = {}
+
+        if len(set(update_ids)) != len(update_ids):
+            errors['update'] = 'Each recipe can only be updated once.'
+        if len(set(delete_ids)) != len(delete_ids):
+            errors['delete'] = 'Each recipe can only be deleted once.'
+        if set(update_ids) & set(delete_ids):
+            errors['non_field_errors'] = (
+                'A recipe cannot be both updated and deleted.'
+            )
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        auth_user = self.context['request'].user
+        recipes = Recipe.objects.filter(
+            user=auth_user,
+            id__in=update_ids + delete_ids,
+        ).defer('search_vector').in_bulk()
+        for key, ids in (('update', update_ids), ('delete', delete_ids)):
+            missing = [
+                {} if recipe_id in recipes else {'id': 'Recipe not found.'}
+                for recipe_id in ids
+            ]
+            if any(missing):
+                errors[key] = missing
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        attrs['recipes'] = recipes
+        return attrs
+
+    def _set_links(self, recipes, items, field, model):
+        """Replace the given M2M field on recipes with one bulk insert."""
+        auth_user = self.context['request'].user
+        through = getattr(Recipe, field).through
+        source = f'{model._meta.model_name}_id'
+        targets = [
+            (recipe, item[field])
+            for recipe, item in zip(recipes, items) if field in item
+        ]
+        if not targets:
+            return
+
+        through.objects.filter(
+            recipe_id__in=[recipe.id for recipe, attrs in targets],
+        ).delete()
+        objs = {
+            obj.name: obj
+            for obj in get_or_create_attrs(
+                model,
+                auth_user,
+                [attr for recipe, attrs in targets for attr in attrs],
+            )
+        }
+        links = {
+            (recipe.id, objs[attr['name']].id)
+            for recipe, attrs in targets for attr in attrs
+        }
+        through.objects.bulk_create([
+            through(recipe_id=recipe_id, **{source: obj_id})
+            for recipe_id, obj_id in links
+        ])
+
+    def _write_links(self, recipes, items):
+        self._set_links(recipes, items, 'tags', Tag)
+        self._set_links(recipes, items, 'ingredients', Ingredient)
+
+    def _scalar_fields(self, item):
+        return {
+            key: value for key, value in item.items()
+            if key not in ('id', 'tags', 'ingredients')
+        }
+
+    def save(self):
+        """
+        Apply every create, update and delete in one transaction and
+        return the affected recipe IDs in request order.
+        """
+        auth_user = self.context['request'].user
+        data = self.validated_data
+        recipes = data['recipes']
+        create_items = data.get('create', [])
+        update_items = data.get('update', [])
+        delete_ids = data.get('delete', [])
+
+        with transaction.atomic():
+            created = Recipe.objects.bulk_create([
+                Recipe(user=auth_user, **self._scalar_fields(item))
+                for item in create_items
+            ])
+
+            updated = [recipes[item['id']] for item in update_items]
+            update_fields = set()
+            for recipe, item in zip(updated, update_items):
+                for attr, value in self._scalar_fields(item).items():
+                    setattr(recipe, attr, value)
+                    update_fields.add(attr)
+            if update_fields:
+                Recipe.objects.bulk_update(updated, sorted(update_fields))
+
+            self._write_links(
+                created + updated, create_items + update_items,
+            )
+
+            if delete_ids:
+                Recipe.objects.filter(
+                    user=auth_user, id__in=delete_ids,
+                ).delete()
+
+            # Bulk writes send no signals.
+            schedule_rebuild([recipe.id for recipe in created + updated])
+            bump_user_version(auth_user.id)
+
+        return {
+            'created': [recipe.id for recipe in created],
+            'updated': [recipe.id for recipe in updated],
+            'deleted': delete_ids,
+        }
+
+
+class RecipeImageSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Serializer for uploading images to recipe."""
 
+    renditions = RenditionsField()
+
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'renditions']
         read_only_fields = ['id']
         extra_kwargs = {'image': {'required': True}}
@@ -0,0 +1,97 @@
+"""
+Signal handlers for the recipe app.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from apps.recipe.cache import bump_user_version
+from apps.recipe.documents import rebuild_documents, schedule_rebuild
+from apps.recipe.models import Recipe, Tag, Ingredient
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_on_write(sender, instance, **kwargs):
+    """Invalidate cached responses when a user's rows change."""
+    bump_user_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_on_link_change(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe links change."""
+    if action.startswith('post_'):
+        bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_on_user_create(sender, instance, created, **kwargs):
+    """Start new users on a fresh version in case an id is reused."""
+    if created:
+        bump_user_version(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def rebuild_on_recipe_save(sender, instance, **kwargs):
+    """Rebuild the document of a saved recipe."""
+    schedule_rebuild([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def rebuild_on_link_change(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Rebuild the documents of recipes whose links changed."""
+    if not reverse:
+        if action.startswith('post_'):
+            schedule_rebuild([instance.pk])
+    elif action == 'pre_clear':
+        # Remember the recipes, the links are gone once cleared.
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        schedule_rebuild(instance.__dict__.pop('_cleared_recipe_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        schedule_rebuild(pk_set)
+
+
+def _linked_recipe_ids(instance):
+    field = instance._meta.model_name
+    return getattr(Recipe, f'{field}s').through.objects.filter(
+        **{f'{field}_id': instance.pk}
+    ).values('recipe_id')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def rebuild_on_rename(sender, instance, created, **kwargs):
+    """Rebuild the documents of recipes showing a renamed tag or ingredient."""
+    if not created:
+        rebuild_documents(_linked_recipe_ids(instance))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def rebuild_on_attr_delete(sender, instance, **kwargs):
+    """Rebuild the documents of recipes losing a tag or ingredient."""
+    recipe_ids = list(
+        _linked_recipe_ids(instance).values_list('recipe_id', flat=True)
+    )
+    if recipe_ids:
+        # Wait until the links are deleted, along with recipes deleted in
+        # the same cascade, which must not get a document again.
+        transaction.on_commit(partial(rebuild_documents, recipe_ids))
@@ -0,0 +1,158 @@
+"""
+Tests for the async recipe read APIs.
+"""
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.recipe.cache import get_cache
+from apps.recipe.factories import RecipeFactory, TagFactory, IngredientFactory
+from apps.user.factories import UserFactory
+
+SYNC_URLS = {
+    'recipes': reverse('recipe:recipe-list'),
+    'tags': reverse('recipe:tag-list'),
+    'ingredients': reverse('recipe:ingredient-list'),
+}
+ASYNC_URLS = {
+    'recipes': reverse('recipe-async:recipe-list'),
+    'tags': reverse('recipe-async:tag-list'),
+    'ingredients': reverse('recipe-async:ingredient-list'),
+}
+
+
+def detail_url(recipe_id, namespace='recipe-async'):
+    """Create and return a recipe detail URL."""
+    return reverse(f'{namespace}:recipe-detail', args=[recipe_id])
+
+
+def auth_headers(user):
+    """Return the headers authenticating requests as the user."""
+    return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+
+class PublicAsyncRecipeApiTests(TestCase):
+    """Test unauthenticated async API requests."""
+
+    def setUp(self):
+        self.client = AsyncClient()
+
+    async def test_auth_required(self):
+        """Test auth is required on every async read."""
+        for url in ASYNC_URLS.values():
+            res = await self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(res['WWW-Authenticate'], 'Bearer realm="api"')
+
+    async def test_invalid_token(self):
+        """Test an invalid token is rejected."""
+        res = await self.client.get(
+            ASYNC_URLS['recipes'], headers={'Authorization': 'Bearer bad'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.json()['code'], 'token_not_valid')
+
+
+class PrivateAsyncRecipeApiTests(TestCase):
+    """Test the async read APIs render what the sync APIs do."""
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.headers = auth_headers(self.user)
+        self.client = AsyncClient()
+        self.sync_client = self.client_class()
+
+        tags = TagFactory.create_batch(3, user=self.user)
+        ingredients = IngredientFactory.create_batch(3, user=self.user)
+        self.recipes = RecipeFactory.create_batch(5, user=self.user)
+        for i, recipe in enumerate(self.recipes):
+            recipe.tags.add(*tags[:i])
+            recipe.ingredients.add(*ingredients[i % 3:])
+        other_user = UserFactory.create()
+        self.other_recipe = RecipeFactory.create(user=other_user)
+        TagFactory.create(user=other_user)
+
+    def assertParity(self, sync_url, async_url, params=None):
+        """Assert both paths return the same status and body."""
+        get_cache().clear()
+        expected = self.sync_client.get(
+            sync_url, params, headers=self.headers,
+        )
+        res = async_to_sync(self.client.get)(
+            async_url, params, headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(res['Content-Type'], expected['Content-Type'])
+        self.assertEqual(res.content, expected.content)
+
+    def test_list_parity(self):
+        """Test async lists match the sync lists."""
+        for name, params in [
+            ('recipes', {}),
+            ('recipes', {'fields': 'id,title', 'expand': ''}),
+            ('recipes', {'tags': '1,2', 'match': 'all'}),
+            ('recipes', {'match': 'bad'}),
+            ('tags', {}),
+            ('ingredients', {}),
+        ]:
+            with self.subTest(name=name, params=params):
+                self.assertParity(SYNC_URLS[name], ASYNC_URLS[name], params)
+
+    @override_settings(RECIPE_FAST_LIST=False)
+    def test_list_parity_without_fast_list(self):
+        """Test async lists match when rendered from model instances."""
+        self.assertParity(SYNC_URLS['recipes'], ASYNC_URLS['recipes'])
+
+    def test_retrieve_parity(self):
+        """Test async recipe details match the sync details."""
+        recipe = self.recipes[-1]
+        self.assertParity(
+            detail_url(recipe.id, 'recipe'), detail_url(recipe.id),
+        )
+        self.assertParity(
+            detail_url(recipe.id, 'recipe'), detail_url(recipe.id),
+            {'fields': 'id,tags', 'expand': 'tags'},
+        )
+
+    async def test_retrieve_other_users_recipe_not_found(self):
+        """Test a recipe of another user is not found."""
+        res = await self.client.get(
+            detail_url(self.other_recipe.id), headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_list_paginated(self):
+        """Test async lists follow cursor links to the last page."""
+        ids = []
+        res = await self.client.get(
+            ASYNC_URLS['recipes'], {'page_size': 2}, headers=self.headers,
+        )
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            data = res.json()
+            ids += [recipe['id'] for recipe in data['results']]
+            if data['next'] is None:
+                break
+            res = await self.client.get(data['next'], headers=self.headers)
+
+        self.assertEqual(
+            ids, sorted([recipe.id for recipe in self.recipes], reverse=True),
+        )
+
+    async def test_inactive_user_rejected(self):
+        """Test a token of an inactive user is rejected."""
+        self.user.is_active = False
+        await self.user.asave()
+
+        res = await self.client.get(
+            ASYNC_URLS['recipes'], headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,223 @@
+"""
+Tests for the recipe response cache and conditional GETs.
+"""
+import time
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from apps.base.tests.mixins import QueryBudgetMixin
+from apps.recipe.cache import _modified_key, get_cache, get_user_version
+from apps.user.factories import UserFactory
+from apps.recipe.factories import RecipeFactory, TagFactory
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+INGREDIENT_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@override_settings(SINGLE_PROCESS=True)
+class RecipeCacheTests(QueryBudgetMixin, TestCase):
+    """Test caching of recipe responses."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = UserFactory.create()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        """Test an unchanged recipe list is served without queries."""
+        RecipeFactory.create_batch(2, user=self.user)
+        first = self.client.get(RECIPE_URL)
+
+        with self.assertQueryBudget(0):
+            second = self.client.get(RECIPE_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+
+    def test_repeated_detail_served_from_cache(self):
+        """Test an unchanged recipe detail is served without queries."""
+        recipe = RecipeFactory.create(user=self.user)
+        first = self.client.get(detail_url(recipe.id))
+
+        with self.assertQueryBudget(0):
+            second = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_cached_separately(self):
+        """Test different query parameters get different cache entries."""
+        tag = TagFactory.create(user=self.user)
+        recipe = RecipeFactory.create(user=self.user)
+        recipe.tags.add(tag)
+        RecipeFactory.create(user=self.user)
+
+        self.client.get(RECIPE_URL)
+        res = self.client.get(RECIPE_URL, {'tags': f'{tag.id}'})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_recipe_write_invalidates_cache(self):
+        """Test creating a recipe invalidates the cached list."""
+        self.client.get(RECIPE_URL)
+
+        payload = {'title': 'Fresh', 'time_minutes': 5, 'price': '1.00'}
+        self.client.post(RECIPE_URL, payload, format='json')
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_tag_rename_invalidates_cache(self):
+        """Test renaming a tag invalidates cached recipes using it."""
+        tag = TagFactory.create(user=self.user, name='Old')
+        recipe = RecipeFactory.create(user=self.user)
+        recipe.tags.add(tag)
+        self.client.get(detail_url(recipe.id))
+
+        tag.name = 'New'
+        tag.save()
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.data['tags'][0]['name'], 'New')
+
+    def test_link_change_invalidates_cache(self):
+        """Test adding a tag to a recipe invalidates the cache."""
+        recipe = RecipeFactory.create(user=self.user)
+        tag = TagFactory.create(user=self.user)
+        version = get_user_version(self.user.id)
+
+        recipe.tags.add(tag)
+
+        self.assertGreater(get_user_version(self.user.id), version)
+
+    def test_other_user_write_keeps_cache(self):
+        """Test writes by another user do not invalidate the cache."""
+        other_user = UserFactory.create()
+        version = get_user_version(self.user.id)
+
+        RecipeFactory.create(user=other_user)
+
+        self.assertEqual(get_user_version(self.user.id), version)
+
+
+@override_settings(SINGLE_PROCESS=True)
+class ConditionalGetTests(QueryBudgetMixin, TestCase):
+    """Test ETag and Last-Modified handling on the recipe APIs."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = UserFactory.create()
+        self.client.force_authenticate(self.user)
+
+    def _last_write(self, seconds_ago):
+        get_cache().set(
+            _modified_key(self.user.id), int(time.time()) - seconds_ago,
+        )
+
+    def test_unchanged_list_not_modified(self):
+        """Test a matching If-None-Match returns 304 without queries."""
+        self._last_write(10)
+        for url in [RECIPE_URL, TAG_URL, INGREDIENT_URL]:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            validators = (res['ETag'], res['Last-Modified'])
+
+            with self.assertQueryBudget(0):
+                res = self.client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual((res['ETag'], res['Last-Modified']), validators)
+
+    def test_unchanged_since_not_modified(self):
+        """Test a matching If-Modified-Since returns 304."""
+        self._last_write(10)
+        res = self.client.get(RECIPE_URL)
+
+        res = self.client.get(
+            RECIPE_URL, HTTP_IF_MODIFIED_SINCE=res['Last-Modified'],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn('ETag', res.headers)
+
+    def test_write_in_current_second_has_no_last_modified(self):
+        """Test writes in the current second are only told by the ETag."""
+        self._last_write(0)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertNotIn('Last-Modified', res.headers)
+        res = self.client.get(
+            RECIPE_URL, HTTP_IF_MODIFIED_SINCE=http_date(time.time()),
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_unchanged_detail_not_modified(self):
+        """Test a matching If-None-Match on a recipe detail returns 304."""
+        recipe = RecipeFactory.create(user=self.user)
+        res = self.client.get(detail_url(recipe.id))
+
+        res = self.client.get(
+            detail_url(recipe.id), HTTP_IF_NONE_MATCH=res['ETag'],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_changes_etag(self):
+        """Test a write makes the previous ETag stale."""
+        res = self.client.get(TAG_URL)
+        etag = res['ETag']
+
+        TagFactory.create(user=self.user)
+        res = self.client.get(TAG_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_etag_differs_per_url(self):
+        """Test different query parameters get different ETags."""
+        res1 = self.client.get(RECIPE_URL)
+        res2 = self.client.get(RECIPE_URL, {'page_size': 1})
+
+        self.assertNotEqual(res1['ETag'], res2['ETag'])
+
+    def test_missing_recipe_has_no_etag(self):
+        """Test error responses do not carry validators."""
+        res = self.client.get(detail_url(0))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', res.headers)
+
+
+class LocalCacheTests(TestCase):
+    """Test a process-local cache is not used by multi-process apps."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = UserFactory.create()
+        self.client.force_authenticate(self.user)
+
+    def test_local_cache_not_used(self):
+        """Test responses are neither cached nor validated."""
+        RecipeFactory.create(user=self.user)
+        self.client.get(RECIPE_URL)
+
+        res = self.client.get(RECIPE_URL)
+        RecipeFactory.create(user=self.user)
+
+        self.assertNotIn('ETag', res)
+        self.assertEqual(len(self.client.get(RECIPE_URL).data['results']), 2)
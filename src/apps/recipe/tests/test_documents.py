@@ -0,0 +1,99 @@
+"""
+Tests for maintaining the denormalized recipe documents.
+"""
+from django.test import TestCase
+
+from apps.recipe.documents import batch_rebuilds, render_documents
+from apps.recipe.factories import RecipeFactory, TagFactory, IngredientFactory
+from apps.recipe.models import RecipeDocument
+from apps.user.factories import UserFactory
+
+
+class RecipeDocumentTests(TestCase):
+    """Test recipe documents follow every write to their recipe."""
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.recipe = RecipeFactory.create(user=self.user, title='Soup')
+
+    def _document(self, recipe=None):
+        recipe = recipe or self.recipe
+        return RecipeDocument.objects.get(recipe=recipe).data
+
+    def _tag_names(self, recipe=None):
+        return [tag['name'] for tag in self._document(recipe)['tags']]
+
+    def test_document_matches_render(self):
+        """Test the stored document is the rendered recipe."""
+        self.recipe.tags.add(TagFactory.create(user=self.user))
+
+        self.assertEqual(
+            self._document(), render_documents([self.recipe.id])[
+                self.recipe.id
+            ],
+        )
+        self.assertEqual(self._document()['title'], 'Soup')
+
+    def test_document_follows_links(self):
+        """Test adding, removing and clearing links rebuilds documents."""
+        tag1 = TagFactory.create(user=self.user, name='Vegan')
+        tag2 = TagFactory.create(user=self.user, name='Quick')
+
+        self.recipe.tags.add(tag1, tag2)
+        self.assertEqual(self._tag_names(), ['Vegan', 'Quick'])
+
+        self.recipe.tags.remove(tag1)
+        self.assertEqual(self._tag_names(), ['Quick'])
+
+        other = RecipeFactory.create(user=self.user)
+        tag2.recipe_set.add(other)
+        self.assertEqual(self._tag_names(other), ['Quick'])
+
+        tag2.recipe_set.clear()
+        self.assertEqual(self._tag_names(), [])
+        self.assertEqual(self._tag_names(other), [])
+
+    def test_document_follows_rename(self):
+        """Test renaming an ingredient rebuilds the recipes showing it."""
+        ingredient = IngredientFactory.create(user=self.user, name='Salt')
+        self.recipe.ingredients.add(ingredient)
+
+        ingredient.name = 'Sea salt'
+        ingredient.save()
+
+        self.assertEqual(
+            self._document()['ingredients'],
+            [{'id': ingredient.id, 'name': 'Sea salt'}],
+        )
+
+    def test_document_follows_attr_delete(self):
+        """Test deleting a tag rebuilds the recipes once committed."""
+        tag = TagFactory.create(user=self.user)
+        self.recipe.tags.add(tag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.delete()
+
+        self.assertEqual(self._tag_names(), [])
+
+    def test_user_delete_removes_documents(self):
+        """Test deleting a user cascades to their recipes' documents."""
+        self.recipe.tags.add(TagFactory.create(user=self.user))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        self.assertFalse(RecipeDocument.objects.exists())
+
+    def test_batch_rebuilds_once(self):
+        """Test a batch rebuilds each written recipe once on exit."""
+        tag = TagFactory.create(user=self.user, name='Vegan')
+
+        with batch_rebuilds():
+            self.recipe.title = 'Stew'
+            self.recipe.save()
+            self.recipe.tags.add(tag)
+            self.assertEqual(self._document()['title'], 'Soup')
+
+        self.assertEqual(self._document()['title'], 'Stew')
+        self.assertEqual(self._tag_names(), ['Vegan'])
@@ -0,0 +1,155 @@
+"""
+Parity tests for the fast recipe list and document serializers.
+"""
+import decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.base.tests.mixins import QueryBudgetMixin
+from apps.recipe.cache import get_cache
+from apps.user.factories import UserFactory
+from apps.recipe.factories import RecipeFactory, TagFactory, IngredientFactory
+from apps.recipe.models import Recipe, RecipeDocument, Tag
+
+from rest_framework.test import APIClient
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+PARITY_PARAMS = [
+    {},
+    {'page_size': 2},
+    {'fields': 'id,title,time_minutes'},
+    {'fields': 'price,image,renditions,link'},
+    {'fields': 'tags,ingredients', 'expand': ''},
+    {'expand': 'tags'},
+    {'search': 'soup'},
+    {'search': 'soup', 'fields': 'title'},
+]
+
+
+@override_settings(RECIPE_READ_MODEL=False)
+class FastRecipeSerializerParityTests(QueryBudgetMixin, TestCase):
+    """Test the fast list renders exactly what RecipeSerializer does."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory.create()
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            TagFactory.create(user=self.user, name=name)
+            for name in ['Vegan', 'Dinner', 'Zuppa "special"']
+        ]
+        ingredients = [
+            IngredientFactory.create(user=self.user, name=name)
+            for name in ['Salt', 'Émincé de bœuf', 'Water']
+        ]
+        prices = ['0.50', '5.00', '999.99', '12.30']
+        for i, price in enumerate(prices):
+            recipe = RecipeFactory.create(
+                user=self.user,
+                title=f'Soup number {i}' if i % 2 else f'Salad {i}',
+                price=decimal.Decimal(price),
+                link='' if i == 0 else f'https://example.com/{i}',
+            )
+            recipe.tags.add(*tags[:i])
+            recipe.ingredients.add(*ingredients[i % 3:])
+            if i == 1:
+                recipe.image = 'uploads/recipe/example.jpg'
+                recipe.renditions = {
+                    '128': 'uploads/recipe/renditions/example_128.jpg',
+                    '512': 'uploads/recipe/renditions/example_512.jpg',
+                }
+                recipe.save()
+
+    def _get(self, url, params=None):
+        get_cache().clear()
+        return self.client.get(url, params)
+
+    def _assert_parity(self, url, params=None):
+        fast = self._get(url, params)
+        with override_settings(RECIPE_FAST_LIST=False):
+            slow = self._get(url, params)
+
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_parity(self):
+        """Test both serializers render identical bytes."""
+        for params in PARITY_PARAMS:
+            with self.subTest(params=params):
+                self._assert_parity(RECIPE_URL, params)
+
+    def test_parity_across_pages(self):
+        """Test every page of a paginated list is identical."""
+        res = self._assert_parity(RECIPE_URL, {'page_size': 1})
+        while res.data['next']:
+            res = self._assert_parity(res.data['next'])
+
+    def test_parity_browsable_api(self):
+        """Test the browsable API renders the fast list too."""
+        fast = self.client.get(RECIPE_URL, HTTP_ACCEPT='text/html')
+
+        self.assertEqual(fast.status_code, 200)
+
+    def test_fast_list_budget(self):
+        """Test the fast list runs one query per relation."""
+        get_cache().clear()
+
+        with self.assertQueryBudget(3):
+            self.client.get(RECIPE_URL)
+
+
+class DocumentRecipeSerializerParityTests(FastRecipeSerializerParityTests):
+    """Test recipe documents render exactly what the serializers do."""
+
+    def _assert_parity(self, url, params=None):
+        with override_settings(RECIPE_READ_MODEL=True):
+            document = self._get(url, params)
+        with override_settings(RECIPE_FAST_LIST=False):
+            slow = self._get(url, params)
+
+        self.assertEqual(document.status_code, slow.status_code)
+        self.assertEqual(document.content, slow.content)
+        return document
+
+    def test_parity_retrieve(self):
+        """Test a recipe detail is identical."""
+        for recipe in Recipe.objects.all():
+            with self.subTest(recipe=recipe.id):
+                self._assert_parity(detail_url(recipe.id))
+
+    def test_parity_missing_documents(self):
+        """Test recipes without a document yet are rendered live."""
+        RecipeDocument.objects.filter(
+            recipe__in=Recipe.objects.all()[:2],
+        ).delete()
+
+        self._assert_parity(RECIPE_URL)
+        for recipe in Recipe.objects.all():
+            self._assert_parity(detail_url(recipe.id))
+
+    def test_parity_after_rename(self):
+        """Test renaming a tag updates the documents showing it."""
+        tag = Tag.objects.get(name='Vegan')
+        tag.name = 'Plant based'
+        tag.save()
+
+        res = self._assert_parity(RECIPE_URL)
+        self.assertIn(b'Plant based', res.content)
+
+    @override_settings(RECIPE_READ_MODEL=True)
+    def test_document_list_budget(self):
+        """Test the document list runs a single query."""
+        get_cache().clear()
+
+        with self.assertQueryBudget(1):
+            self.client.get(RECIPE_URL)
@@ -1,7 +1,11 @@
 """
 Tests for the ingredients API.
 """
-from apps.recipe.factories import UserFactory, IngredientFactory
+from apps.recipe.factories import (
+    UserFactory,
+    IngredientFactory,
+    RecipeFactory,
+)
 from django.urls import reverse
 from django.test import TestCase
 
@@ -12,6 +16,7 @@ from apps.recipe.models import Ingredient
 from apps.recipe.serializers import IngredientSerializer
 
 INGREDIENT_URL = reverse('recipe:ingredient-list')
+AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
 
 
 def detail_url(ingredient_id):
@@ -48,7 +53,7 @@ class PrivateIngredientApiTests(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test retrieving ingredients is limited to user"""
@@ -62,10 +67,29 @@ class PrivateIngredientApiTests(TestCase):
         res = self.client.get(INGREDIENT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
+        results = res.data['results']
+        self.assertEqual(len(results), 2)
         for i in range(len(ingredients)):
-            self.assertEqual(ingredients[i].name, res.data[i]['name'])
-            self.assertEqual(ingredients[i].id, res.data[i]['id'])
+            self.assertEqual(ingredients[i].name, results[i]['name'])
+            self.assertEqual(ingredients[i].id, results[i]['id'])
+
+    def test_ingredients_paginated_by_name(self):
+        """Test ingredients are paginated with a cursor on name."""
+        for name in ['Apple', 'Kale', 'Kale', 'Salt']:
+            IngredientFactory.create(user=self.user, name=name)
+
+        res = self.client.get(INGREDIENT_URL, {'page_size': 2})
+        first_page = res.data['results']
+        res = self.client.get(res.data['next'])
+        second_page = res.data['results']
+
+        ingredients = (Ingredient.objects.filter(user=self.user)
+                       .order_by('-name', '-id'))
+        self.assertEqual(
+            [item['id'] for item in first_page + second_page],
+            [ingredient.id for ingredient in ingredients],
+        )
+        self.assertIsNone(res.data['next'])
 
     def test_update_ingredient_successful(self):
         """Test updating an ingredient"""
@@ -89,3 +113,38 @@ class PrivateIngredientApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         ingredient = Ingredient.objects.filter(id=ingredient.id)
         self.assertFalse(ingredient.exists())
+
+    def test_filter_ingredients_assigned_only(self):
+        """Test listing only the ingredients assigned to recipes."""
+        in1 = IngredientFactory.create(user=self.user, name='Apples')
+        IngredientFactory.create(user=self.user, name='Turkey')
+        r1, r2 = RecipeFactory.create_batch(2, user=self.user)
+        r1.ingredients.add(in1)
+        r2.ingredients.add(in1)
+
+        res = self.client.get(INGREDIENT_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['id'], in1.id)
+        self.assertEqual(res.data['results'][0]['recipe_count'], 2)
+
+        r1.ingredients.clear()
+        res = self.client.get(INGREDIENT_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.data['results'][0]['recipe_count'], 1)
+
+    def test_autocomplete_ingredients(self):
+        """Test autocomplete returns the user's matching ingredients."""
+        IngredientFactory.create(user=self.user, name='Salt')
+        IngredientFactory.create(user=self.user, name='salmon')
+        IngredientFactory.create(user=self.user, name='Pepper')
+        IngredientFactory.create(user=UserFactory.create(), name='Salsa')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'sal'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [ingredient['name'] for ingredient in res.data],
+            ['salmon', 'Salt'],
+        )
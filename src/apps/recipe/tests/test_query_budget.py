@@ -0,0 +1,248 @@
+"""
+Tests for the query budgets of the recipe APIs.
+"""
+import decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.base.tests.mixins import QueryBudgetMixin
+from apps.user.factories import UserFactory
+from apps.recipe.factories import RecipeFactory, TagFactory, IngredientFactory
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+INGREDIENT_URL = reverse('recipe:ingredient-list')
+
+RECIPE_LIST_BUDGET = 1
+RECIPE_SPARSE_LIST_BUDGET = 1
+RECIPE_RETRIEVE_BUDGET = 1
+RECIPE_CREATE_BUDGET = 7
+RECIPE_UPDATE_BUDGET = 12
+RECIPE_CREATE_WITH_ATTRS_BUDGET = 15
+RECIPE_UPDATE_WITH_ATTRS_BUDGET = 20
+ATTR_LIST_BUDGET = 1
+ATTR_UPDATE_BUDGET = 5
+ATTR_DELETE_BUDGET = 6
+
+
+def recipe_detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def tag_detail_url(tag_id):
+    """Create and return a tag detail URL."""
+    return reverse('recipe:tag-detail', args=[tag_id])
+
+
+def ingredient_detail_url(ingredient_id):
+    """Create and return an ingredient detail URL."""
+    return reverse('recipe:ingredient-detail', args=[ingredient_id])
+
+
+def create_recipes_with_attrs(user, count, attrs_per_recipe=3):
+    """Create recipes that each carry their own tags and ingredients."""
+    recipes = RecipeFactory.create_batch(count, user=user)
+    for recipe in recipes:
+        recipe.tags.add(
+            *TagFactory.create_batch(attrs_per_recipe, user=user)
+        )
+        recipe.ingredients.add(
+            *IngredientFactory.create_batch(attrs_per_recipe, user=user)
+        )
+    return recipes
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test the recipe endpoints stay within their query budgets."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory.create()
+        self.client.force_authenticate(self.user)
+
+    def test_list_recipes_budget(self):
+        """Test listing recipes runs a fixed number of queries."""
+        create_recipes_with_attrs(self.user, 1)
+        with self.assertQueryBudget(RECIPE_LIST_BUDGET):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        create_recipes_with_attrs(self.user, 10)
+        with self.assertQueryBudget(RECIPE_LIST_BUDGET):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_recipes_sparse_budget(self):
+        """Test a sparse fieldset skips the nested relation queries."""
+        create_recipes_with_attrs(self.user, 10)
+
+        params = {'fields': 'id,title,time_minutes'}
+        with self.assertQueryBudget(RECIPE_SPARSE_LIST_BUDGET) as context:
+            res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('"description"', context.captured_queries[0]['sql'])
+
+    def test_filter_recipes_budget(self):
+        """Test filtering recipes runs a fixed number of queries."""
+        recipes = create_recipes_with_attrs(self.user, 10)
+        tag_ids = ','.join(
+            str(recipe.tags.first().id) for recipe in recipes
+        )
+        ingredient_ids = ','.join(
+            str(recipe.ingredients.first().id) for recipe in recipes
+        )
+
+        params = {'tags': tag_ids, 'ingredients': ingredient_ids}
+        with self.assertQueryBudget(RECIPE_LIST_BUDGET):
+            res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+
+    def test_retrieve_recipe_budget(self):
+        """Test retrieving a recipe runs a fixed number of queries."""
+        recipe = create_recipes_with_attrs(
+            self.user, 1, attrs_per_recipe=10,
+        )[0]
+
+        with self.assertQueryBudget(RECIPE_RETRIEVE_BUDGET):
+            res = self.client.get(recipe_detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 10)
+
+    def test_create_recipe_budget(self):
+        """Test creating a recipe runs a fixed number of queries."""
+        payload = {
+            'title': 'Budget Soup',
+            'time_minutes': 20,
+            'price': decimal.Decimal('3.10'),
+        }
+
+        with self.assertQueryBudget(RECIPE_CREATE_BUDGET):
+            res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_recipe_with_attrs_budget(self):
+        """Test creating a recipe with nested attrs has a flat budget."""
+        IngredientFactory.create(user=self.user, name='Ingredient 0')
+        payload = {
+            'title': 'Budget Stew',
+            'time_minutes': 45,
+            'price': decimal.Decimal('6.40'),
+            'tags': [{'name': f'Tag {i}'} for i in range(30)],
+            'ingredients': [{'name': f'Ingredient {i}'} for i in range(30)],
+        }
+
+        with self.assertQueryBudget(RECIPE_CREATE_WITH_ATTRS_BUDGET):
+            res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['tags']), 30)
+        self.assertEqual(len(res.data['ingredients']), 30)
+
+    def test_update_recipe_budget(self):
+        """Test updating a recipe runs a fixed number of queries."""
+        recipe = create_recipes_with_attrs(
+            self.user, 1, attrs_per_recipe=10,
+        )[0]
+
+        payload = {'title': 'Renamed'}
+        with self.assertQueryBudget(RECIPE_UPDATE_BUDGET):
+            res = self.client.patch(
+                recipe_detail_url(recipe.id), payload, format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_recipe_with_attrs_budget(self):
+        """Test updating a recipe with nested attrs has a flat budget."""
+        recipe = create_recipes_with_attrs(self.user, 1)[0]
+
+        payload = {
+            'tags': [{'name': f'Tag {i}'} for i in range(30)],
+            'ingredients': [{'name': f'Ingredient {i}'} for i in range(30)],
+        }
+        with self.assertQueryBudget(RECIPE_UPDATE_WITH_ATTRS_BUDGET):
+            res = self.client.patch(
+                recipe_detail_url(recipe.id), payload, format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 30)
+
+
+class RecipeAttrQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test the tag and ingredient endpoints stay within their budgets."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory.create()
+        self.client.force_authenticate(self.user)
+
+    def test_list_tags_budget(self):
+        """Test listing tags runs a fixed number of queries."""
+        create_recipes_with_attrs(self.user, 10)
+
+        with self.assertQueryBudget(ATTR_LIST_BUDGET):
+            res = self.client.get(TAG_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_ingredients_budget(self):
+        """Test listing ingredients runs a fixed number of queries."""
+        create_recipes_with_attrs(self.user, 10)
+
+        with self.assertQueryBudget(ATTR_LIST_BUDGET):
+            res = self.client.get(INGREDIENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_tag_budget(self):
+        """Test updating a tag runs a fixed number of queries."""
+        tag = TagFactory.create(user=self.user)
+
+        payload = {'name': 'Renamed'}
+        with self.assertQueryBudget(ATTR_UPDATE_BUDGET):
+            res = self.client.patch(
+                tag_detail_url(tag.id), payload, format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_ingredient_budget(self):
+        """Test updating an ingredient runs a fixed number of queries."""
+        ingredient = IngredientFactory.create(user=self.user)
+
+        payload = {'name': 'Renamed'}
+        with self.assertQueryBudget(ATTR_UPDATE_BUDGET):
+            res = self.client.patch(
+                ingredient_detail_url(ingredient.id), payload, format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_tag_budget(self):
+        """Test deleting a tag runs a fixed number of queries."""
+        tag = TagFactory.create(user=self.user)
+
+        with self.assertQueryBudget(ATTR_DELETE_BUDGET):
+            res = self.client.delete(tag_detail_url(tag.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_delete_ingredient_budget(self):
+        """Test deleting an ingredient runs a fixed number of queries."""
+        ingredient = IngredientFactory.create(user=self.user)
+
+        with self.assertQueryBudget(ATTR_DELETE_BUDGET):
+            res = self.client.delete(ingredient_detail_url(ingredient.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
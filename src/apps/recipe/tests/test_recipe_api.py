@@ -1,14 +1,17 @@
 """
 Tests for the Recipe API.
 """
+import base64
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.test import TestCase, TransactionTestCase
 from django.urls import reverse
 
-from apps.recipe import models
+from apps.recipe import models, renditions
 from apps.recipe.models import Recipe, Tag, Ingredient
 from apps.user.factories import UserFactory
 from apps.recipe.factories import RecipeFactory, TagFactory, IngredientFactory
@@ -75,7 +78,7 @@ class PrivateRecipeApiTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """Test retrieving recipes is limited for authenticated user."""
@@ -88,7 +91,23 @@ class PrivateRecipeApiTest(TestCase):
         recipes = Recipe.objects.filter(user=self.user).order_by('-id')
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_list_recipes_paginated(self):
+        """Test recipes are paginated with a cursor newest first."""
+        RecipeFactory.create_batch(5, user=self.user)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+        pages = [res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            pages.append(res.data['results'])
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        serializer = RecipeSerializer(recipes, many=True)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), serializer.data)
+        self.assertNotIn('count', res.data)
 
     def test_get_recipe_detail(self):
         """Test get recipe detail."""
@@ -286,9 +305,9 @@ class PrivateRecipeApiTest(TestCase):
         s1 = RecipeSerializer(r1)
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
 
     def test_filter_by_ingredients(self):
         """Test filtering recipes by ingredients."""
@@ -306,9 +325,217 @@ class PrivateRecipeApiTest(TestCase):
         s1 = RecipeSerializer(r1)
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filter_recipes_by_tags_no_duplicates(self):
+        """Test a recipe matching several tags is returned once."""
+        recipe = RecipeFactory.create(user=self.user)
+        tag1 = TagFactory.create(user=self.user, name='Vegan')
+        tag2 = TagFactory.create(user=self.user, name='Quick')
+        recipe.tags.add(tag1, tag2)
+
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'], [RecipeSerializer(recipe).data],
+        )
+
+    def test_filter_recipes_match_all_tags(self):
+        """Test filtering recipes carrying all of the requested tags."""
+        tag1 = TagFactory.create(user=self.user, name='Vegan')
+        tag2 = TagFactory.create(user=self.user, name='Quick')
+        r1 = RecipeFactory.create(user=self.user)
+        r1.tags.add(tag1, tag2)
+        r2 = RecipeFactory.create(user=self.user)
+        r2.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id},{tag1.id}', 'match': 'all'}
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [RecipeSerializer(r1).data])
+
+    def test_filter_recipes_match_all_ingredients(self):
+        """Test filtering recipes carrying all requested ingredients."""
+        in1 = IngredientFactory.create(user=self.user, name='Rice')
+        in2 = IngredientFactory.create(user=self.user, name='Beans')
+        r1 = RecipeFactory.create(user=self.user)
+        r1.ingredients.add(in1, in2)
+        r2 = RecipeFactory.create(user=self.user)
+        r2.ingredients.add(in2)
+        tag = TagFactory.create(user=self.user, name='Dinner')
+        r1.tags.add(tag)
+        r2.tags.add(tag)
+
+        params = {
+            'ingredients': f'{in1.id},{in2.id}',
+            'tags': f'{tag.id}',
+            'match': 'all',
+        }
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [RecipeSerializer(r1).data])
+
+    def test_filter_recipes_invalid_match(self):
+        """Test an unknown match mode returns an error."""
+        res = self.client.get(RECIPE_URL, {'tags': '1', 'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_recipes_invalid_ids(self):
+        """Test non-integer tag and ingredient IDs return an error."""
+        for params in ({'tags': 'x'}, {'ingredients': '1,a'}):
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(list(res.data), list(params))
+
+    def test_search_recipes(self):
+        """Test searching recipes by words in title and description."""
+        r1 = RecipeFactory.create(
+            user=self.user, title='Spicy Noodles', description='Quick dish',
+        )
+        r2 = RecipeFactory.create(
+            user=self.user, title='Pancakes', description='Not spicy at all',
+        )
+        RecipeFactory.create(
+            user=self.user, title='Fish Stew', description='Slow cooked',
+        )
+
+        res = self.client.get(RECIPE_URL, {'search': 'spicy'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [RecipeSerializer(r1).data, RecipeSerializer(r2).data],
+        )
+
+    def test_search_recipes_with_tags(self):
+        """Test search combines with the tag filter."""
+        tag = TagFactory.create(user=self.user, name='Vegan')
+        r1 = RecipeFactory.create(user=self.user, title='Tofu Curry')
+        r1.tags.add(tag)
+        RecipeFactory.create(user=self.user, title='Chicken Curry')
+
+        params = {'search': 'curry', 'tags': f'{tag.id}'}
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.data['results'], [RecipeSerializer(r1).data])
+
+    def test_search_recipes_paginated(self):
+        """Test paging through ranked search results."""
+        for i in range(5):
+            RecipeFactory.create(
+                user=self.user,
+                title='Soup ' * (i + 1),
+                description='',
+            )
+        RecipeFactory.create(user=self.user, title='Salad')
+
+        res = self.client.get(RECIPE_URL, {'search': 'soup', 'page_size': 2})
+        results = res.data['results']
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            results += res.data['results']
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len({recipe['id'] for recipe in results}), 5)
+        self.assertEqual(results[0]['title'], 'Soup ' * 5)
+
+    def test_search_recipes_paginated_on_rank_ties(self):
+        """Test paging both ways through results with equal ranks."""
+        for _ in range(7):
+            RecipeFactory.create(
+                user=self.user, title='Pasta bake', description='',
+            )
+        params = {'search': 'pasta', 'page_size': 3}
+
+        first = self.client.get(RECIPE_URL, params)
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+        previous = self.client.get(second.data['previous'])
+
+        pages = [first, second, third]
+        ids = [r['id'] for page in pages for r in page.data['results']]
+        self.assertEqual(len(set(ids)), 7)
+        self.assertIsNone(third.data['next'])
+        self.assertEqual(previous.data['results'], first.data['results'])
+
+    def test_search_recipes_invalid_cursor(self):
+        """Test a tampered ranked cursor returns a 404."""
+        RecipeFactory.create(user=self.user, title='Pasta bake')
+        cursor = base64.b64encode(b'p=nope').decode()
+
+        res = self.client.get(
+            RECIPE_URL, {'search': 'pasta', 'cursor': cursor},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_recipes_sparse_fields(self):
+        """Test listing recipes with only the requested fields."""
+        recipe = RecipeFactory.create(user=self.user)
+
+        params = {'fields': 'id,title,time_minutes'}
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [{
+            'id': recipe.id,
+            'title': recipe.title,
+            'time_minutes': recipe.time_minutes,
+        }])
+
+    def test_list_recipes_empty_fields(self):
+        """Test an empty fields parameter returns all fields."""
+        RecipeFactory.create(user=self.user)
+
+        res = self.client.get(RECIPE_URL, {'fields': ''})
+        default = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], default.data['results'])
+        self.assertIn('title', res.data['results'][0])
+
+    def test_list_recipes_without_expansion(self):
+        """Test relations missing from expand are rendered as IDs."""
+        recipe = RecipeFactory.create(user=self.user)
+        tag = TagFactory.create(user=self.user)
+        ingredient = IngredientFactory.create(user=self.user)
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+
+        params = {'fields': 'id,tags,ingredients', 'expand': 'ingredients'}
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.data['results'], [{
+            'id': recipe.id,
+            'tags': [tag.id],
+            'ingredients': [{'id': ingredient.id, 'name': ingredient.name}],
+        }])
+
+    def test_get_recipe_detail_sparse_fields(self):
+        """Test retrieving a recipe with only the requested fields."""
+        recipe = RecipeFactory.create(user=self.user)
+
+        params = {'fields': 'title,description'}
+        res = self.client.get(detail_url(recipe.id), params)
+
+        self.assertEqual(res.data, {
+            'title': recipe.title,
+            'description': recipe.description,
+        })
+
+    def test_list_recipes_unknown_field(self):
+        """Test requesting an unknown field returns an error."""
+        res = self.client.get(RECIPE_URL, {'fields': 'id,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
 
 class ImageUploadTests(TestCase):
@@ -345,3 +572,94 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, payload, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ImageRenditionTests(TransactionTestCase):
+    """Tests for generating image renditions in the background."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory.create()
+        self.client.force_authenticate(self.user)
+        self.recipe = RecipeFactory.create(user=self.user)
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        for name in self.recipe.renditions.values():
+            default_storage.delete(name)
+        self.recipe.image.delete()
+
+    def _upload(self, size=(800, 600)):
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', size=size, color=(255, 255, 255))
+            img.save(image_file, 'JPEG')
+            image_file.seek(0)
+            return self.client.post(
+                url, data={'image': image_file}, format='multipart',
+            )
+
+    @patch('apps.recipe.renditions.get_executor')
+    def test_replacing_image_deletes_old_files(self, patched_executor):
+        """Test a replaced image and its renditions are deleted."""
+        patched_executor.return_value = ThreadPoolExecutor(max_workers=1)
+        self._upload()
+        patched_executor.return_value.shutdown(wait=True)
+        self.recipe.refresh_from_db()
+        old_names = [self.recipe.image.name, *self.recipe.renditions.values()]
+
+        patched_executor.return_value = ThreadPoolExecutor(max_workers=1)
+        self._upload()
+        patched_executor.return_value.shutdown(wait=True)
+
+        self.recipe.refresh_from_db()
+        self.assertNotIn(self.recipe.image.name, old_names)
+        for name in old_names:
+            self.assertFalse(default_storage.exists(name), name)
+        for name in self.recipe.renditions.values():
+            self.assertTrue(default_storage.exists(name), name)
+
+    @patch('apps.recipe.renditions.get_executor')
+    def test_failed_renditions_are_logged(self, patched_executor):
+        """Test an error generating renditions is logged."""
+        executor = ThreadPoolExecutor(max_workers=1)
+        patched_executor.return_value = executor
+
+        with self.assertLogs('apps.recipe.renditions', 'ERROR') as logs:
+            renditions._submit(self.recipe.id, self.user.id, 'missing.jpg')
+            executor.shutdown(wait=True)
+
+        self.assertIn(f'recipe {self.recipe.id} failed', logs.output[0])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.renditions, {})
+
+    @patch('apps.recipe.renditions.get_executor')
+    def test_upload_image_generates_renditions(self, patched_executor):
+        """Test uploading an image generates renditions in a worker."""
+        executor = ThreadPoolExecutor(max_workers=1)
+        patched_executor.return_value = executor
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', size=(800, 600), color=(255, 255, 255))
+            img.save(image_file, 'JPEG')
+            image_file.seek(0)
+            payload = {'image': image_file}
+            res = self.client.post(url, data=payload, format='multipart')
+        executor.shutdown(wait=True)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            sorted(self.recipe.renditions, key=int), ['128', '512', '1024'],
+        )
+        for size, name in self.recipe.renditions.items():
+            with default_storage.open(name) as rendition_file:
+                rendition = Image.open(rendition_file)
+                self.assertEqual(max(rendition.size), min(int(size), 800))
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertTrue(
+            res.data['renditions']['128'].endswith(
+                self.recipe.renditions['128']
+            )
+        )
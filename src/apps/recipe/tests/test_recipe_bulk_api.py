@@ -0,0 +1,161 @@
+"""
+Tests for the recipe bulk API.
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.base.tests.mixins import QueryBudgetMixin
+from apps.recipe.models import Recipe, Tag
+from apps.user.factories import UserFactory
+from apps.recipe.factories import RecipeFactory, TagFactory
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+BULK_URL = reverse('recipe:recipe-bulk')
+RECIPE_URL = reverse('recipe:recipe-list')
+
+BULK_BUDGET = 21
+
+
+def recipe_payload(i, **params):
+    """Create and return a recipe payload for the bulk API."""
+    payload = {
+        'title': f'Recipe {i}',
+        'time_minutes': 10 + i,
+        'price': '4.50',
+        'tags': [{'name': 'Dinner'}, {'name': f'Tag {i}'}],
+        'ingredients': [{'name': 'Salt'}, {'name': f'Ingredient {i}'}],
+    }
+    payload.update(params)
+    return payload
+
+
+class PrivateRecipeBulkApiTests(QueryBudgetMixin, TestCase):
+    """Test the recipe bulk API for authenticated users."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory.create()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating recipes with nested tags and ingredients."""
+        TagFactory.create(user=self.user, name='Dinner')
+        payload = {'create': [recipe_payload(i) for i in range(3)]}
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['created']), 3)
+        for item, created in zip(payload['create'], res.data['created']):
+            recipe = Recipe.objects.get(id=created['id'], user=self.user)
+            self.assertEqual(recipe.title, item['title'])
+            self.assertEqual(
+                sorted(tag.name for tag in recipe.tags.all()),
+                sorted(tag['name'] for tag in item['tags']),
+            )
+            self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name='Dinner').count(), 1,
+        )
+        self.assertEqual(
+            Tag.objects.get(user=self.user, name='Dinner').recipe_count, 3,
+        )
+
+    def test_bulk_update_and_delete(self):
+        """Test updating and deleting recipes in one request."""
+        tag = TagFactory.create(user=self.user, name='Old')
+        r1 = RecipeFactory.create(user=self.user, title='Before')
+        r1.tags.add(tag)
+        r2 = RecipeFactory.create(user=self.user)
+        r2.tags.add(tag)
+        r3 = RecipeFactory.create(user=self.user)
+
+        payload = {
+            'update': [
+                {'id': r1.id, 'title': 'After', 'tags': [{'name': 'New'}]},
+                {'id': r2.id, 'time_minutes': 99},
+            ],
+            'delete': [r3.id],
+        }
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        r1.refresh_from_db()
+        r2.refresh_from_db()
+        self.assertEqual(r1.title, 'After')
+        self.assertEqual([t.name for t in r1.tags.all()], ['New'])
+        self.assertEqual(r2.time_minutes, 99)
+        self.assertEqual([t.name for t in r2.tags.all()], ['Old'])
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+        self.assertFalse(Recipe.objects.filter(id=r3.id).exists())
+        self.assertEqual(res.data['updated'][0]['title'], 'After')
+        self.assertEqual(res.data['deleted'], [r3.id])
+
+    def test_bulk_invalid_item_writes_nothing(self):
+        """Test one invalid item rejects the whole request."""
+        payload = {
+            'create': [recipe_payload(0), recipe_payload(1, price='bad')],
+        }
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['create'][0], {})
+        self.assertIn('price', res.data['create'][1])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_other_users_recipe_not_found(self):
+        """Test recipes of other users cannot be changed."""
+        other_recipe = RecipeFactory.create(user=UserFactory.create())
+
+        payload = {
+            'update': [{'id': other_recipe.id, 'title': 'Stolen'}],
+            'delete': [other_recipe.id + 1000],
+        }
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data['update'][0])
+        self.assertIn('id', res.data['delete'][0])
+        other_recipe.refresh_from_db()
+        self.assertNotEqual(other_recipe.title, 'Stolen')
+
+    def test_bulk_update_and_delete_same_recipe(self):
+        """Test a recipe cannot be updated and deleted together."""
+        recipe = RecipeFactory.create(user=self.user)
+
+        payload = {'update': [{'id': recipe.id}], 'delete': [recipe.id]}
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_invalidates_cache(self):
+        """Test bulk writes are visible to the next list request."""
+        self.client.get(RECIPE_URL)
+
+        payload = {'create': [recipe_payload(0)]}
+        self.client.post(BULK_URL, payload, format='json')
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_bulk_budget(self):
+        """Test the bulk API runs a fixed number of queries."""
+        for count in [1, 20]:
+            recipes = RecipeFactory.create_batch(count * 2, user=self.user)
+            payload = {
+                'create': [recipe_payload(i) for i in range(count)],
+                'update': [
+                    recipe_payload(i, id=recipe.id)
+                    for i, recipe in enumerate(recipes[:count])
+                ],
+                'delete': [recipe.id for recipe in recipes[count:]],
+            }
+
+            with self.assertQueryBudget(BULK_BUDGET):
+                res = self.client.post(BULK_URL, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
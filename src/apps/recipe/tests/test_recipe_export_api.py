@@ -0,0 +1,114 @@
+"""
+Tests for the recipe export API.
+"""
+import csv
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.base.tests.mixins import QueryBudgetMixin
+from apps.recipe.importer import read_csv
+from apps.user.factories import UserFactory
+from apps.recipe.factories import RecipeFactory, TagFactory, IngredientFactory
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def create_recipe(user, **params):
+    """Create and return a recipe with a tag and two ingredients."""
+    recipe = RecipeFactory.create(user=user, **params)
+    recipe.tags.add(TagFactory.create(user=user, name='Dinner'))
+    recipe.ingredients.add(
+        IngredientFactory.create(user=user, name='Salt'),
+        IngredientFactory.create(user=user, name='Rice'),
+    )
+    return recipe
+
+
+class PublicRecipeExportApiTests(TestCase):
+    """Test unauthenticated export requests."""
+
+    def test_auth_required(self):
+        """Test that login is required to export recipes."""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateRecipeExportApiTests(QueryBudgetMixin, TestCase):
+    """Test exporting recipes for authenticated users."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory.create()
+        self.client.force_authenticate(self.user)
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as NDJSON."""
+        recipe = create_recipe(self.user, title='Rice Bowl')
+        RecipeFactory.create(user=UserFactory.create())
+
+        res = self.client.get(EXPORT_URL)
+        lines = b''.join(res.streaming_content).decode().splitlines()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row['id'], recipe.id)
+        self.assertEqual(row['title'], 'Rice Bowl')
+        self.assertEqual(row['price'], str(recipe.price))
+        self.assertEqual(row['tags'], ['Dinner'])
+        self.assertEqual(sorted(row['ingredients']), ['Rice', 'Salt'])
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV."""
+        recipe = create_recipe(self.user, description='Line one,\nline two')
+
+        res = self.client.get(EXPORT_URL, {'export_format': 'csv'})
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines(keepends=True)))
+
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], str(recipe.id))
+        self.assertEqual(rows[0]['description'], recipe.description)
+        self.assertEqual(
+            sorted(rows[0]['ingredients'].split(';')), ['Rice', 'Salt'],
+        )
+
+    def test_export_csv_escapes_separator(self):
+        """Test names containing the separator are read back intact."""
+        recipe = RecipeFactory.create(user=self.user)
+        names = ['Salt; fine', 'Back\\slash', 'Rice']
+        recipe.ingredients.add(*[
+            IngredientFactory.create(user=self.user, name=name)
+            for name in names
+        ])
+
+        res = self.client.get(EXPORT_URL, {'export_format': 'csv'})
+        content = b''.join(res.streaming_content).decode()
+        rows = list(read_csv(content.splitlines(keepends=True)))
+
+        self.assertEqual(sorted(rows[0]['ingredients']), sorted(names))
+
+    def test_export_invalid_format(self):
+        """Test an unknown export format returns an error."""
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_streams_in_chunks(self):
+        """Test the export reads a fixed number of queries per chunk."""
+        for _ in range(5):
+            create_recipe(self.user)
+
+        with self.assertQueryBudget(3):
+            res = self.client.get(EXPORT_URL)
+            lines = b''.join(res.streaming_content).splitlines()
+
+        self.assertEqual(len(lines), 5)
@@ -0,0 +1,71 @@
+"""
+Tests for seeding datasets.
+"""
+from django.test import TestCase
+
+from apps.recipe.models import Recipe, RecipeDocument, Tag
+from apps.recipe.seeding import SEED_PASSWORD, DatasetSeeder, seed_dataset
+
+
+def snapshot(users):
+    """Return the seeded data of the users, without generated keys."""
+    return [
+        (
+            user.email,
+            list(Recipe.objects.filter(user=user).order_by('pk').values_list(
+                'title', 'description', 'time_minutes', 'price', 'link',
+            )),
+            [
+                sorted(recipe.tags.values_list('name', flat=True))
+                for recipe in Recipe.objects.filter(user=user).order_by('pk')
+            ],
+        )
+        for user in users
+    ]
+
+
+class SeedingTests(TestCase):
+    """Test generating datasets."""
+
+    def test_seed_dataset(self):
+        """Test the dataset has the requested shape."""
+        users = seed_dataset(
+            users=3, recipes=4, tags=5, ingredients=6, links=2,
+        )
+
+        self.assertEqual(len(users), 3)
+        self.assertTrue(users[0].check_password(SEED_PASSWORD))
+        self.assertEqual(Recipe.objects.count(), 12)
+        self.assertEqual(Tag.objects.filter(user=users[0]).count(), 5)
+        self.assertEqual(RecipeDocument.objects.count(), 12)
+        for recipe in Recipe.objects.all():
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(
+            sum(Tag.objects.values_list('recipe_count', flat=True)), 24,
+        )
+
+    def test_seed_is_deterministic(self):
+        """Test a seed generates the same data however it is loaded."""
+        first = seed_dataset(
+            users=2, recipes=5, tags=3, ingredients=3, links=2,
+            seed=7, email_prefix='copy', batch_size=3,
+        )
+        second = seed_dataset(
+            users=2, recipes=5, tags=3, ingredients=3, links=2,
+            seed=7, email_prefix='bulk', batch_size=100, use_copy=False,
+        )
+
+        self.assertEqual(
+            [row[1:] for row in snapshot(first)],
+            [row[1:] for row in snapshot(second)],
+        )
+
+    def test_seed_without_documents(self):
+        """Test building the read documents can be skipped."""
+        seeder = DatasetSeeder(build_documents=False)
+
+        progress = list(seeder.seed(1, 3, 1, 1, 1))
+
+        self.assertEqual(progress, [(1, 0), (0, 3)])
+        self.assertFalse(RecipeDocument.objects.exists())
@@ -1,11 +1,14 @@
 """
 Tests for the Tag API.
 """
-from django.test import TestCase
+from unittest.mock import patch
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from apps.user.factories import UserFactory
-from apps.recipe.factories import TagFactory
+from apps.recipe.factories import RecipeFactory, TagFactory
 from apps.recipe.serializers import TagSerializer
 from apps.recipe.models import Tag
 
@@ -14,6 +17,7 @@ from rest_framework.test import APIClient
 
 
 TAG_URL = reverse('recipe:tag-list')
+AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
 
 
 def detail_url(tag_id):
@@ -52,7 +56,7 @@ class PrivateTagApiTest(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test retrieving tags for authenticated user is limited to user."""
@@ -64,8 +68,8 @@ class PrivateTagApiTest(TestCase):
         serializer = TagSerializer(tag, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_update_tag(self):
         """Test updating a tag."""
@@ -80,6 +84,19 @@ class PrivateTagApiTest(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    @patch('apps.recipe.signals.rebuild_documents')
+    def test_update_tag_rolled_back_on_rebuild_error(self, rebuild):
+        """Test a rename is not saved when its documents fail to rebuild."""
+        rebuild.side_effect = DatabaseError
+        tag = TagFactory.create(user=self.user, name='Vegan')
+        RecipeFactory.create(user=self.user).tags.add(tag)
+
+        with self.assertRaises(DatabaseError):
+            self.client.patch(detail_url(tag.id), {'name': 'Vegetarian'})
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Vegan')
+
     def test_delete_tag(self):
         """Test deleting a tag."""
         tag = TagFactory.create(user=self.user)
@@ -90,3 +107,125 @@ class PrivateTagApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         tags = Tag.objects.filter(user=self.user)
         self.assertFalse(tags.exists())
+
+    def test_tag_recipe_count(self):
+        """Test the recipe count follows the recipes linked to a tag."""
+        tag = TagFactory.create(user=self.user)
+        r1, r2 = RecipeFactory.create_batch(2, user=self.user)
+
+        r1.tags.add(tag)
+        r2.tags.add(tag)
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 2)
+
+        r1.tags.remove(tag)
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+
+        r2.delete()
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 0)
+
+    def test_update_tag_keeps_recipe_count(self):
+        """Test saving a stale tag does not overwrite its recipe count."""
+        tag = TagFactory.create(user=self.user)
+        RecipeFactory.create(user=self.user).tags.add(tag)
+
+        tag.name = 'Renamed'
+        tag.save()
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Renamed')
+        self.assertEqual(tag.recipe_count, 1)
+
+    def test_filter_tags_assigned_only(self):
+        """Test listing only the tags assigned to recipes."""
+        tag1 = TagFactory.create(user=self.user, name='Breakfast')
+        TagFactory.create(user=self.user, name='Lunch')
+        recipe = RecipeFactory.create(user=self.user)
+        recipe.tags.add(tag1)
+
+        res = self.client.get(TAG_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tag1.refresh_from_db()
+        self.assertEqual(res.data['results'], [TagSerializer(tag1).data])
+        self.assertEqual(res.data['results'][0]['recipe_count'], 1)
+
+    def test_filter_tags_invalid_assigned_only(self):
+        """Test an invalid assigned_only value returns an error."""
+        res = self.client.get(TAG_URL, {'assigned_only': 'yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def _create_autocomplete_tags(self):
+        """Create tags named like a typeahead would match."""
+        tags = {
+            name: TagFactory.create(user=self.user, name=name)
+            for name in ['Dinner', 'dessert', 'Desk lunch', 'Breakfast']
+        }
+        recipe = RecipeFactory.create(user=self.user)
+        recipe.tags.add(tags['Desk lunch'])
+        TagFactory.create(user=UserFactory.create(), name='Deli')
+        return tags
+
+    def test_autocomplete_tags(self):
+        """Test autocomplete ranks the user's matches by usage and name."""
+        tags = self._create_autocomplete_tags()
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'dE'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in res.data],
+            ['Desk lunch', 'dessert'],
+        )
+        self.assertEqual(res.data[0]['id'], tags['Desk lunch'].id)
+        self.assertEqual(res.data[0]['recipe_count'], 1)
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'd', 'limit': 2})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Desk lunch', 'dessert'],
+        )
+
+    def test_autocomplete_escapes_wildcards(self):
+        """Test LIKE wildcards in the prefix are matched literally."""
+        self._create_autocomplete_tags()
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'prefix': '%'})
+
+        self.assertEqual(res.data, [])
+
+    @override_settings(
+        RECIPE_AUTOCOMPLETE_LOCAL_INDEX=True, SINGLE_PROCESS=True,
+    )
+    def test_autocomplete_tags_local_index(self):
+        """Test the local index matches the database and sees writes."""
+        self._create_autocomplete_tags()
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'dE'})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Desk lunch', 'dessert'],
+        )
+
+        TagFactory.create(user=self.user, name='Deli')
+        with self.assertNumQueries(1):
+            res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'del'})
+
+        self.assertEqual([tag['name'] for tag in res.data], ['Deli'])
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'des'})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Desk lunch', 'dessert'],
+        )
+
+    def test_autocomplete_invalid_limit(self):
+        """Test an out of range limit returns an error."""
+        for limit in ('0', '51', 'ten'):
+            res = self.client.get(AUTOCOMPLETE_URL, {'limit': limit})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
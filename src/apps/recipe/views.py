@@ -1,18 +1,45 @@
 """
 Views for the recipe APIs.
 """
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.http import StreamingHttpResponse
+from django.db import router
+from django.db.models import (
+    Count,
+    DecimalField,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+)
+from django.db.models.functions import Cast
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from apps.base.views import BaseRecipeAttrViewSet
+from apps.base.views import BaseRecipeAttrViewSet, ReplicaReadMixin
+from apps.base.pagination import (
+    IdCursorPagination,
+    NameCursorPagination,
+    RankedCursorPagination,
+)
 
+from apps.recipe.cache import VersionedCacheMixin, conditional_get
+from apps.recipe.export import EXPORT_FORMATS, render_export
 from apps.recipe.models import Recipe, Tag, Ingredient
+from apps.recipe.renditions import schedule_renditions
 from apps.recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
+    FastRecipeSerializer,
+    DocumentRecipeSerializer,
+    DocumentRecipeDetailSerializer,
     TagSerializer, IngredientSerializer,
     RecipeImageSerializer,
+    RecipeBulkSerializer,
 )
 
 from drf_spectacular.utils import (
@@ -36,44 +63,223 @@ from drf_spectacular.utils import (
                 OpenApiTypes.STR,
                 description='Comma separated list of ingredient IDs to filter',
             ),
-        ]
-    )
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description=(
+                    'Full-text search on title and description, '
+                    'ordered by relevance'
+                ),
+            ),
+            OpenApiParameter(
+                'fields',
+                OpenApiTypes.STR,
+                description=(
+                    'Comma separated list of fields to return, defaults to '
+                    'all fields'
+                ),
+            ),
+            OpenApiParameter(
+                'expand',
+                OpenApiTypes.STR,
+                description=(
+                    'Comma separated list of relations to return as nested '
+                    'objects instead of IDs, defaults to tags,ingredients'
+                ),
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR,
+                enum=['any', 'all'],
+                description=(
+                    'Return recipes with any (default) or all of the '
+                    'requested tags and ingredients'
+                ),
+            ),
+        ],
+        # The fast list serializers have no fields to document.
+        responses=RecipeSerializer(many=True),
+    ),
+    retrieve=extend_schema(responses=RecipeDetailSerializer),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin,
+                    VersionedCacheMixin,
+                    viewsets.ModelViewSet):
     """ View for managing recipes APIs."""
     serializer_class = RecipeDetailSerializer
     queryset = Recipe.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = RankedCursorPagination
+
+    def _params_to_ints(self, name, qs):
+        """Convert a comma separated parameter to a list of integers."""
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {name: 'Must be a comma separated list of IDs.'}
+            )
+
+    def _filter_by_attrs(self, queryset, through, field, ids, match):
+        """Filter recipes linked to any or all of the given attr IDs."""
+        links = through.objects.filter(**{f'{field}__in': ids})
+        if match == 'all':
+            matching_recipes = links.values('recipe_id').annotate(
+                matched=Count(field),
+            ).filter(matched=len(ids)).values('recipe_id')
+            return queryset.filter(pk__in=matching_recipes)
+
+        return queryset.filter(Exists(links.filter(recipe_id=OuterRef('pk'))))
+
+    def _search(self, queryset, search):
+        """Filter recipes matching a search and annotate their rank."""
+        query = SearchQuery(search, search_type='websearch', config='english')
+        # Normalize the rank into [0, 1) and store it as a fixed precision
+        # decimal so cursor positions round trip exactly.
+        rank = Cast(
+            SearchRank(F('search_vector'), query, normalization=32),
+            DecimalField(max_digits=7, decimal_places=6),
+        )
+        return queryset.filter(search_vector=query).annotate(rank=rank)
+
+    def _param_to_list(self, name, choices, default, allow_empty=True):
+        """
+        Convert a comma separated parameter to a list of choices. An empty
+        list is returned as is, or as `default` unless `allow_empty`.
+        """
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+
+        items = [item for item in value.split(',') if item]
+        if not items and not allow_empty:
+            return default
+        invalid = set(items) - set(choices)
+        if invalid:
+            raise ValidationError(
+                {name: f'Unknown fields: {", ".join(sorted(invalid))}.'}
+            )
+        return items
+
+    def _sparse_fieldset(self):
+        """Return the requested fields and expanded relations."""
+        serializer_class = self.get_serializer_class()
+        # No fields would render empty objects, so return them all.
+        fields = self._param_to_list(
+            'fields', serializer_class.Meta.fields, None, allow_empty=False,
+        )
+        expand = self._param_to_list(
+            'expand',
+            serializer_class.expandable_fields,
+            serializer_class.expandable_fields,
+        )
+        return fields, expand
+
+    def _fast_list(self):
+        """Return whether the list is rendered from `values()` rows."""
+        return self.action == 'list' and settings.RECIPE_FAST_LIST
+
+    def _read_model(self):
+        """Return whether reads are rendered from recipe documents."""
+        return (
+            self.action in ('list', 'retrieve')
+            and settings.RECIPE_READ_MODEL
+        )
+
+    def _select_fieldset(self, queryset):
+        """Load only the columns and relations the response renders."""
+        if self._read_model():
+            return queryset.values('id', 'document__data')
 
-    def _params_to_ints(self, qs):
-        """Convert a list of strings to integers."""
-        return [int(str_id) for str_id in qs.split(',')]
+        fields, expand = self._sparse_fieldset()
+        if fields is None:
+            fields = self.get_serializer_class().Meta.fields
+
+        if self._fast_list():
+            # Relations are loaded in batches by the serializer.
+            return queryset.values(*FastRecipeSerializer.columns(fields))
+
+        relations = {'tags': Tag, 'ingredients': Ingredient}
+        queryset = queryset.only('id', *[
+            field for field in fields if field not in relations
+        ])
+        for field, model in relations.items():
+            if field in fields:
+                columns = ('id', 'name') if field in expand else ('id',)
+                queryset = queryset.prefetch_related(Prefetch(
+                    field,
+                    queryset=model.objects.only(*columns).order_by('id'),
+                ))
+
+        return queryset
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
+        search = self.request.query_params.get('search')
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': 'Must be "any" or "all".'})
+
+        if self.action in ('list', 'retrieve'):
+            queryset = self._select_fieldset(self.queryset)
+        else:
+            queryset = self.queryset.defer('search_vector').prefetch_related(
+                'tags', 'ingredients',
+            )
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            tag_ids = set(self._params_to_ints('tags', tags))
+            queryset = self._filter_by_attrs(
+                queryset, Recipe.tags.through, 'tag_id', tag_ids, match,
+            )
         if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            ingredient_ids = set(
+                self._params_to_ints('ingredients', ingredients)
+            )
+            queryset = self._filter_by_attrs(
+                queryset, Recipe.ingredients.through, 'ingredient_id',
+                ingredient_ids, match,
+            )
+        if search:
+            queryset = self._search(queryset, search)
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-id').distinct()
+        ).order_by('-id')
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def get_serializer_class(self):
         """Return appropriate serializer class for request."""
-        if self.action == 'list':
+        if self._read_model():
+            if self.action == 'list':
+                return DocumentRecipeSerializer
+            return DocumentRecipeDetailSerializer
+        elif self.action == 'list':
+            if settings.RECIPE_FAST_LIST:
+                return FastRecipeSerializer
             return RecipeSerializer
         elif self.action == 'upload_image':
             return RecipeImageSerializer
+        elif self.action == 'bulk':
+            return RecipeBulkSerializer
 
         return self.serializer_class
 
+    def get_serializer(self, *args, **kwargs):
+        """Apply the requested sparse fieldset to read responses."""
+        if self.action in ('list', 'retrieve'):
+            kwargs['fields'], kwargs['expand'] = self._sparse_fieldset()
+
+        return super().get_serializer(*args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -84,29 +290,132 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            replaced_image = recipe.image.name
+            replaced_renditions = recipe.renditions
+            recipe = serializer.save(renditions={})
+            schedule_renditions(recipe, replaced_image, replaced_renditions)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'export_format',
+                OpenApiTypes.STR,
+                enum=EXPORT_FORMATS,
+                description='Export format, ndjson (default) or csv',
+            ),
+        ],
+        responses={(200, 'application/x-ndjson'): OpenApiTypes.STR},
+    )
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream all recipes of the user as NDJSON or CSV."""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {'export_format': 'Must be "ndjson" or "csv".'}
+            )
+
+        content_type = {
+            'ndjson': 'application/x-ndjson',
+            'csv': 'text/csv',
+        }[export_format]
+        # Resolve the database now, the rows are read after the view returns.
+        response = StreamingHttpResponse(
+            render_export(
+                request.user, export_format,
+                using=router.db_for_read(Recipe),
+            ),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{export_format}"'
+        )
+        return response
+
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create, update and delete recipes in one request."""
+        serializer = self.get_serializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result = serializer.save()
+        rows = {
+            row['id']: row
+            for row in self.queryset.filter(
+                pk__in=result['created'] + result['updated'],
+            ).values('id', 'document__data')
+        }
+
+        def represent(ids):
+            return DocumentRecipeDetailSerializer(
+                [rows[recipe_id] for recipe_id in ids], many=True,
+            ).data
+
+        return Response({
+            'created': represent(result['created']),
+            'updated': represent(result['updated']),
+            'deleted': result['deleted'],
+        }, status=status.HTTP_200_OK)
 
+
+def recipe_attr_schema(serializer_class):
+    """Document the list filters and autocomplete of a recipe attr."""
+    return extend_schema_view(
+        list=extend_schema(
+            parameters=[
+                OpenApiParameter(
+                    'assigned_only',
+                    OpenApiTypes.INT,
+                    enum=[0, 1],
+                    description='Filter by items assigned to recipes.',
+                ),
+            ]
+        ),
+        autocomplete=extend_schema(responses=serializer_class(many=True)),
+    )
+
+
+@recipe_attr_schema(TagSerializer)
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database."""
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
         """Retrieve tags for the authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        return self.filter_assigned(
+            self.queryset.filter(user=self.request.user)
+        ).order_by('-id')
 
 
+@recipe_attr_schema(IngredientSerializer)
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database."""
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = NameCursorPagination
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
         """Retrieve ingredients for the authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        return self.filter_assigned(
+            self.queryset.filter(user=self.request.user)
+        ).order_by('-name', '-id')
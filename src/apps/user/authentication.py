@@ -0,0 +1,101 @@
+"""
+Authentication classes for the user API.
+"""
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.user.cache import (
+    acache_user,
+    aget_cached_user,
+    cache_user,
+    get_cached_user,
+    password_digest,
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that serves users from the user cache."""
+
+    def _get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+
+    def _user_not_found(self):
+        return AuthenticationFailed(
+            _('User not found'), code='user_not_found',
+        )
+
+    def _check_user(self, user, validated_token):
+        """Raise unless the user may authenticate with the token."""
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive',
+            )
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != password_digest(user):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."),
+                    code='password_changed',
+                )
+
+    def get_user(self, validated_token):
+        """Return the active user identified by the validated token."""
+        user_id = self._get_user_id(validated_token)
+        user = get_cached_user(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise self._user_not_found()
+            cache_user(user)
+
+        self._check_user(user, validated_token)
+        return user
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """JWT authentication that loads the user with the async ORM."""
+
+    async def aauthenticate(self, request):
+        """Return a (user, token) tuple, or None without a JWT header."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """Return the active user identified by the validated token."""
+        user_id = self._get_user_id(validated_token)
+        user = await aget_cached_user(user_id)
+        if user is None:
+            try:
+                user = await self.user_model.objects.aget(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise self._user_not_found()
+            await acache_user(user)
+
+        self._check_user(user, validated_token)
+        return user
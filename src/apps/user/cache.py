@@ -0,0 +1,209 @@
+"""
+Two level cache of authenticated users.
+
+Users are kept in the shared cache and, for a few seconds, in process.
+Both levels are keyed by the user's generation, which lives in the
+shared cache and is bumped whenever the user is saved, so a change is
+seen by every process on its next request. That only holds if every
+process sees the same cache, so users are not cached at all unless
+USER_CACHE_ALIAS is a shared cache.
+
+The password hash is never cached. Cached users are built with it
+deferred and carry the digest of it that revocable tokens are checked
+against instead.
+"""
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from apps.base.caches import is_shared_cache
+
+LOCAL_CACHE_MAX_SIZE = 10000
+PASSWORD_FIELD = 'password'
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the shared cache backend used for users."""
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def user_cache_enabled():
+    """Return whether authenticated users are cached."""
+    return is_shared_cache(settings.USER_CACHE_ALIAS)
+
+
+def _generation_key(user_id):
+    return f'user:generation:{user_id}'
+
+
+def _user_key(user_id, generation):
+    return f'user:auth:{user_id}:{generation}'
+
+
+@lru_cache(maxsize=None)
+def _field_names():
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname != PASSWORD_FIELD
+    ]
+
+
+def _get_generation(user_id):
+    cache = get_cache()
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Seed from the clock so an evicted generation is never reused.
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+
+    return generation
+
+
+async def _aget_generation(user_id):
+    cache = get_cache()
+    key = _generation_key(user_id)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        generation = await cache.aget(key)
+
+    return generation
+
+
+def _build_user(values):
+    """Return a fresh user instance, so callers never share one."""
+    digest, *field_values = values
+    user = get_user_model().from_db(
+        DEFAULT_DB_ALIAS, _field_names(), field_values,
+    )
+    user._password_digest = digest
+    return user
+
+
+def password_digest(user):
+    """Return the digest of the user's password hash held by tokens."""
+    if PASSWORD_FIELD in user.get_deferred_fields():
+        return user._password_digest
+
+    return get_md5_hash_password(user.password)
+
+
+def _get_local(user_id, generation):
+    """Return the user kept in process for the generation, if fresh."""
+    entry = _local.get(user_id)
+    if entry is not None:
+        local_generation, expires, values = entry
+        if local_generation == generation and expires > time.monotonic():
+            return _build_user(values)
+
+    return None
+
+
+def get_cached_user(user_id):
+    """Return the cached user, or None when it must be loaded."""
+    if not user_cache_enabled():
+        return None
+
+    generation = _get_generation(user_id)
+    user = _get_local(user_id, generation)
+    if user is not None:
+        return user
+
+    values = get_cache().get(_user_key(user_id, generation))
+    if values is None:
+        return None
+
+    _set_local(user_id, generation, values)
+    return _build_user(values)
+
+
+async def aget_cached_user(user_id):
+    """Async version of `get_cached_user`."""
+    if not user_cache_enabled():
+        return None
+
+    generation = await _aget_generation(user_id)
+    user = _get_local(user_id, generation)
+    if user is not None:
+        return user
+
+    values = await get_cache().aget(_user_key(user_id, generation))
+    if values is None:
+        return None
+
+    _set_local(user_id, generation, values)
+    return _build_user(values)
+
+
+def _set_local(user_id, generation, values):
+    expires = time.monotonic() + settings.USER_LOCAL_CACHE_TIMEOUT
+    with _local_lock:
+        if user_id not in _local and len(_local) >= LOCAL_CACHE_MAX_SIZE:
+            # Evict the oldest entry.
+            del _local[next(iter(_local))]
+        _local[user_id] = (generation, expires, values)
+
+
+def _user_values(user):
+    return (
+        password_digest(user),
+        *(getattr(user, name) for name in _field_names()),
+    )
+
+
+def cache_user(user):
+    """Store a user loaded from the database in both levels."""
+    if not user_cache_enabled():
+        return
+
+    generation = _get_generation(user.pk)
+    values = _user_values(user)
+    get_cache().set(
+        _user_key(user.pk, generation), values, settings.USER_CACHE_TIMEOUT,
+    )
+    _set_local(user.pk, generation, values)
+
+
+async def acache_user(user):
+    """Async version of `cache_user`."""
+    if not user_cache_enabled():
+        return
+
+    generation = await _aget_generation(user.pk)
+    values = _user_values(user)
+    await get_cache().aset(
+        _user_key(user.pk, generation), values, settings.USER_CACHE_TIMEOUT,
+    )
+    _set_local(user.pk, generation, values)
+
+
+def _bump_generation(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        cache.add(_generation_key(user_id), time.time_ns(), timeout=None)
+    with _local_lock:
+        _local.pop(user_id, None)
+
+
+def invalidate_user(user_id):
+    """Drop the cached user in every process."""
+    if not user_cache_enabled():
+        return
+
+    _bump_generation(user_id)
+    # Bump again once the write is visible, so a read that raced the open
+    # transaction cannot cache the old row under the current generation.
+    transaction.on_commit(lambda: _bump_generation(user_id))
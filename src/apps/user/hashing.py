@@ -0,0 +1,197 @@
+"""
+Password hashing and verification in a bounded pool of worker processes.
+
+Hashing is CPU bound, so a burst of logins or sign ups could otherwise
+occupy every core and worker thread. Here at most PASSWORD_HASH_WORKERS
+hashes run at once, at most PASSWORD_HASH_QUEUE_SIZE more wait for a
+worker, and callers beyond that wait up to PASSWORD_HASH_QUEUE_TIMEOUT
+seconds for room before being turned away with a 503.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+LATENCY_SAMPLES = 1000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many password checks in progress, try again later.'
+    default_code = 'password_hashing_busy'
+
+
+def _init_worker():
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def _check_password(password, encoded):
+    """Return whether the password matches and must be rehashed."""
+    must_update = []
+    valid = hashers.check_password(
+        password, encoded, setter=lambda password: must_update.append(True),
+    )
+    return valid, bool(must_update)
+
+
+class HashingPool:
+    """Run hashing functions in worker processes, with backpressure."""
+
+    def __init__(self, workers, queue_size=0, queue_timeout=0):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawn rather than fork, so workers never inherit the
+                # locks or database connections of request threads.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                )
+
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Drop a broken executor, unless another call already did."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args):
+        # A worker killed by the OS breaks the whole executor; replace it
+        # and retry once, so one crash does not fail every later call.
+        for retry in (True, False):
+            executor = self._get_executor()
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                if not retry:
+                    raise PasswordHashingBusy()
+
+    def run(self, fn, *args):
+        """Run `fn` in a worker and return its result."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHashingBusy()
+
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            return self._submit(fn, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._slots.release()
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.total_time += elapsed
+                self.max_time = max(self.max_time, elapsed)
+                self._latencies.append(elapsed)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def stats(self):
+        """Return the queue depth and hash latencies."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'workers': self.workers,
+                'in_flight': self.in_flight,
+                'queued': max(self.in_flight - self.workers, 0),
+                'max_in_flight': self.max_in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'total_time': round(self.total_time, 6),
+                'max_time': round(self.max_time, 6),
+            }
+
+        for name, quantile in (('p50_time', 0.5), ('p95_time', 0.95)):
+            value = 0.0
+            if latencies:
+                value = latencies[int(quantile * (len(latencies) - 1))]
+            stats[name] = round(value, 6)
+
+        return stats
+
+
+def get_pool():
+    """Return the process wide hashing pool, None when it is disabled."""
+    global _pool
+    if not settings.PASSWORD_HASH_WORKERS:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                settings.PASSWORD_HASH_WORKERS,
+                queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+                queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+            )
+
+        return _pool
+
+
+def make_password(password):
+    """Hash a password in the pool."""
+    pool = get_pool()
+    if pool is None or password is None:
+        # Unusable passwords are not hashed.
+        return hashers.make_password(password)
+
+    return pool.run(hashers.make_password, password)
+
+
+def check_password(password, encoded, setter=None):
+    """
+    Check a password against its hash in the pool, calling `setter`
+    with the password when it matches but must be rehashed.
+    """
+    pool = get_pool()
+    if pool is None or password is None or not hashers.is_password_usable(
+        encoded,
+    ):
+        return hashers.check_password(password, encoded, setter)
+
+    valid, must_update = pool.run(_check_password, password, encoded)
+    if valid and must_update and setter:
+        setter(password)
+
+    return valid
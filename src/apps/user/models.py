@@ -8,6 +8,8 @@ from django.contrib.auth.models import (
     PermissionsMixin
 )
 
+from apps.user import hashing
+
 
 class UserManager(BaseUserManager):
     """Manager for users."""
@@ -40,3 +42,19 @@ class User(AbstractBaseUser, PermissionsMixin):
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
+
+    def set_password(self, raw_password):
+        """Hash the password in the hashing pool."""
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Check the password in the hashing pool."""
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # Password hash upgrades shouldn't be considered password
+            # changes.
+            self._password = None
+            self.save(update_fields=['password'])
+
+        return hashing.check_password(raw_password, self.password, setter)
@@ -0,0 +1,11 @@
+"""
+OpenAPI schema extensions for the user app.
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Document the cached JWT authentication as the simplejwt scheme."""
+    target_class = 'apps.user.authentication.CachedJWTAuthentication'
+    # Covers AsyncJWTAuthentication too.
+    match_subclasses = True
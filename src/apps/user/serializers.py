@@ -5,8 +5,10 @@ from django.contrib.auth import get_user_model
 
 from rest_framework import serializers
 
+from apps.base.serializers import TimedDataMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Serializer for the user object."""
     class Meta:
         model = get_user_model()
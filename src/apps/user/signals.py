@@ -0,0 +1,15 @@
+"""
+Signal handlers for the user app.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.user.cache import invalidate_user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_on_user_write(sender, instance, **kwargs):
+    """Drop the cached user whenever it is saved or deleted."""
+    invalidate_user(instance.pk)
@@ -0,0 +1,207 @@
+"""
+Tests for the cached JWT authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from drf_spectacular.generators import SchemaGenerator
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.user import cache as user_cache
+from apps.user.cache import aget_cached_user, get_cache, get_cached_user
+
+USER_ME = reverse('user:me')
+ASYNC_RECIPE_URL = reverse('recipe-async:recipe-list')
+
+
+@override_settings(SINGLE_PROCESS=True)
+class CachedJWTAuthenticationTests(TestCase):
+    """Test authenticated users are served from the user cache."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='test_pass123', name='Name',
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}',
+        )
+
+    def test_user_loaded_once(self):
+        """Test the user is only queried on the first request."""
+        with self.assertNumQueries(1):
+            res = self.client.get(USER_ME)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(USER_ME)
+        self.assertEqual(res.data['name'], 'Name')
+
+    def test_served_from_shared_cache(self):
+        """Test another process finds the user in the shared cache."""
+        self.client.get(USER_ME)
+        user_cache._local.clear()
+
+        with self.assertNumQueries(0):
+            user = get_cached_user(self.user.id)
+
+        self.assertEqual(user.email, self.user.email)
+        self.assertIsNot(user, get_cached_user(self.user.id))
+
+    @patch('apps.user.authentication.cache_user')
+    @patch('apps.user.authentication.get_cached_user')
+    async def test_async_uses_async_cache(self, get_user, set_user):
+        """Test async requests never call the blocking cache helpers."""
+        user_cache._local.clear()
+        get_user.side_effect = set_user.side_effect = AssertionError
+        headers = {
+            'Authorization': f'Bearer {AccessToken.for_user(self.user)}',
+        }
+
+        for _ in range(2):
+            res = await AsyncClient().get(ASYNC_RECIPE_URL, headers=headers)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        user = await aget_cached_user(self.user.id)
+        self.assertEqual(user.email, self.user.email)
+
+    def test_profile_update_invalidates(self):
+        """Test updating the user through the API is seen immediately."""
+        self.client.get(USER_ME)
+
+        res = self.client.patch(USER_ME, {'name': 'New name'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(USER_ME)
+
+        self.assertEqual(res.data['name'], 'New name')
+
+    def test_password_change_invalidates(self):
+        """Test a password change replaces the cached password hash."""
+        self.client.get(USER_ME)
+
+        self.client.patch(USER_ME, {'password': 'new_pass123'})
+
+        self.assertTrue(
+            get_user_model().objects.get(id=self.user.id).check_password(
+                'new_pass123',
+            )
+        )
+        self.assertIsNone(get_cached_user(self.user.id))
+
+    def test_password_hash_not_cached(self):
+        """Test only a digest of the password hash is cached."""
+        self.client.get(USER_ME)
+        user_cache._local.clear()
+
+        user = get_cached_user(self.user.id)
+        values = get_cache().get(user_cache._user_key(
+            self.user.id, user_cache._get_generation(self.user.id),
+        ))
+
+        self.assertNotIn(self.user.password, values)
+        self.assertIn('password', user.get_deferred_fields())
+
+    def test_revoked_token_rejected_from_cache(self):
+        """Test tokens issued before a password change are rejected."""
+        old_client = APIClient()
+        with patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True):
+            old_client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}',
+            )
+            old_client.get(USER_ME)
+            with self.assertNumQueries(0):
+                res = old_client.get(USER_ME)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            self.user.set_password('new_pass123')
+            self.user.save()
+            res = old_client.get(USER_ME)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user is rejected on the next request."""
+        self.client.get(USER_ME)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(USER_ME)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidation_reaches_other_processes(self):
+        """Test a stale in-process entry is ignored after invalidation."""
+        self.client.get(USER_ME)
+        stale_local = dict(user_cache._local)
+
+        get_user_model().objects.filter(id=self.user.id).update(name='Other')
+        user_cache.invalidate_user(self.user.id)
+        # Another process still holds its in-process entry.
+        user_cache._local.update(stale_local)
+        res = self.client.get(USER_ME)
+
+        self.assertEqual(res.data['name'], 'Other')
+
+    def test_deleted_user_rejected(self):
+        """Test a deleted user is rejected on the next request."""
+        self.client.get(USER_ME)
+
+        self.user.delete()
+        res = self.client.get(USER_ME)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LocalUserCacheTests(TestCase):
+    """Test users are not cached in a process-local cache."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='test_pass123',
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}',
+        )
+
+    def test_user_loaded_every_request(self):
+        """Test a change made by another process is seen immediately."""
+        self.client.get(USER_ME)
+
+        # Another process deactivates the user, invalidating its own cache.
+        get_user_model().objects.filter(id=self.user.id).update(
+            is_active=False,
+        )
+        res = self.client.get(USER_ME)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(get_cached_user(self.user.id))
+
+
+class AuthenticationSchemaTests(SimpleTestCase):
+    """Test the OpenAPI schema documents the JWT authentication."""
+
+    def test_jwt_security_scheme(self):
+        """Test endpoints require the jwtAuth bearer scheme."""
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        self.assertEqual(
+            schema['components']['securitySchemes']['jwtAuth']['scheme'],
+            'bearer',
+        )
+        me = schema['paths']['/api/user/me/']['get']
+        self.assertIn({'jwtAuth': []}, me['security'])
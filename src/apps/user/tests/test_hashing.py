@@ -0,0 +1,147 @@
+"""
+Tests for password hashing in the worker pool.
+"""
+import os
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, identify_hasher
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.user import hashing
+from apps.user.hashing import HashingPool, PasswordHashingBusy
+
+TOKEN_URL = reverse('token_obtain_pair')
+HASHING_STATS_URL = reverse('password-hashing-stats')
+
+
+class HashingPoolTests(SimpleTestCase):
+    """Test running functions in the hashing pool."""
+
+    def setUp(self):
+        self.pool = HashingPool(1, queue_size=0, queue_timeout=0.01)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_make_and_check_password(self):
+        """Test passwords hashed in a worker verify."""
+        encoded = self.pool.run(hashing.hashers.make_password, 'secret')
+
+        self.assertTrue(check_password('secret', encoded))
+        self.assertEqual(
+            self.pool.run(hashing._check_password, 'secret', encoded),
+            (True, False),
+        )
+        self.assertEqual(
+            self.pool.run(hashing._check_password, 'wrong', encoded),
+            (False, False),
+        )
+
+    def test_busy_when_full(self):
+        """Test calls beyond the queue are turned away."""
+        self.pool.run(time.sleep, 0)
+        worker = threading.Thread(target=self.pool.run, args=(time.sleep, 1))
+        worker.start()
+        while not self.pool.in_flight:
+            time.sleep(0.001)
+
+        with self.assertRaises(PasswordHashingBusy):
+            self.pool.run(time.sleep, 0)
+
+        worker.join()
+        stats = self.pool.stats()
+        self.assertEqual(stats['rejected'], 1)
+        self.assertEqual(stats['completed'], 2)
+        self.assertEqual(stats['max_in_flight'], 1)
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertGreaterEqual(stats['max_time'], 1)
+        self.assertGreaterEqual(stats['p95_time'], stats['p50_time'])
+
+    def test_worker_crash_recovered(self):
+        """Test a pool broken by a killed worker is replaced."""
+        self.pool.run(time.sleep, 0)
+        executor = self.pool._executor
+        for process in list(executor._processes.values()):
+            process.kill()
+            process.join()
+
+        self.assertIsNone(self.pool.run(time.sleep, 0))
+        self.assertIsNot(self.pool._executor, executor)
+
+    def test_worker_crash_every_time(self):
+        """Test a call that keeps crashing workers is turned away."""
+        with self.assertRaises(PasswordHashingBusy):
+            self.pool.run(os._exit, 1)
+
+        self.assertIsNone(self.pool.run(time.sleep, 0))
+        self.assertEqual(self.pool.stats()['in_flight'], 0)
+
+
+class UserPasswordHashingTests(TestCase):
+    """Test user passwords are hashed in the process pool."""
+
+    def test_user_password_hashed_in_pool(self):
+        """Test creating a user and logging in uses the pool."""
+        completed = hashing.get_pool().completed
+        get_user_model().objects.create_user(
+            email='test@example.com', password='test_pass123',
+        )
+
+        res = APIClient().post(
+            TOKEN_URL,
+            {'email': 'test@example.com', 'password': 'test_pass123'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(hashing.get_pool().completed, completed + 2)
+
+    def test_outdated_hash_upgraded(self):
+        """Test a password hashed with fewer iterations is rehashed."""
+        user = get_user_model().objects.create_user(email='test@example.com')
+        user.password = hashing.hashers.PBKDF2PasswordHasher().encode(
+            'test_pass123', 'salt', iterations=1000,
+        )
+        user.save()
+
+        self.assertTrue(user.check_password('test_pass123'))
+
+        user.refresh_from_db()
+        self.assertFalse(identify_hasher(user.password).must_update(
+            user.password,
+        ))
+        self.assertTrue(user.check_password('test_pass123'))
+
+    def test_busy_login(self):
+        """Test logins are refused with a 503 when the pool is full."""
+        get_user_model().objects.create_user(
+            email='test@example.com', password='test_pass123',
+        )
+        pool = HashingPool(1, queue_size=0, queue_timeout=0)
+        self.addCleanup(pool.shutdown)
+        pool._slots.acquire()
+
+        hashing._pool, original = pool, hashing._pool
+        self.addCleanup(setattr, hashing, '_pool', original)
+
+        res = APIClient().post(
+            TOKEN_URL,
+            {'email': 'test@example.com', 'password': 'test_pass123'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(pool.stats()['rejected'], 1)
+
+    def test_hashing_stats(self):
+        """Test admins can read the hashing pool stats."""
+        client = APIClient()
+        client.force_authenticate(get_user_model()(is_staff=True))
+
+        res = client.get(HASHING_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for key in ['in_flight', 'queued', 'rejected', 'p95_time']:
+            self.assertIn(key, res.data)
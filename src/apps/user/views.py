@@ -1,11 +1,16 @@
 """
 Views for the user API.
 """
+from drf_spectacular.utils import extend_schema, OpenApiTypes
 from rest_framework import permissions
 from rest_framework.generics import (
     CreateAPIView,
     RetrieveUpdateAPIView,
 )
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.user.hashing import get_pool
 from apps.user.serializers import UserSerializer
 
 
@@ -22,3 +27,13 @@ class ManageUserView(RetrieveUpdateAPIView):
     def get_object(self):
         """Retrieve and return authenticated user."""
         return self.request.user
+
+
+class PasswordHashingStatsView(APIView):
+    """Report the password hashing pool usage of this process."""
+    permission_classes = (permissions.IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        pool = get_pool()
+        return Response(pool.stats() if pool else {})
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'drf_spectacular',
     'apps.base',
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.base.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,14 +82,120 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'apps.base.db.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Connections are returned to the pool when Django closes them at
+        # the end of each request. A SIZE of 0 disables pooling.
+        'POOL': {
+            'SIZE': int(os.environ.get('DB_POOL_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+            'MAX_LIFETIME': float(
+                os.environ.get('DB_POOL_MAX_LIFETIME', 1800)
+            ),
+            'CHECK_INTERVAL': float(
+                os.environ.get('DB_POOL_CHECK_INTERVAL', 30)
+            ),
+        },
+    }
+}
+
+# Read replicas, as a comma separated list of hosts sharing the primary's
+# other settings. Without any, replica_1 is a second connection to the
+# primary so replica routing can be exercised locally.
+DB_REPLICA_HOSTS = [
+    host for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',')
+    if host
+]
+for index, host in enumerate(
+    DB_REPLICA_HOSTS or [DATABASES['default']['HOST']], 1
+):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Aliases that recipe API reads are routed to.
+DB_REPLICAS = [
+    f'replica_{index}' for index in range(1, len(DB_REPLICA_HOSTS) + 1)
+]
+DATABASE_ROUTERS = ['apps.base.routers.ReplicaRouter']
+
+# Seconds a user reads from the primary after a write. Must exceed the
+# replication lag.
+DB_PRIMARY_STICKY_SECONDS = int(
+    os.environ.get('DB_PRIMARY_STICKY_SECONDS', 10)
+)
+# Cache recording which users are pinned to the primary. Every process
+# must see the pins, so with replicas it has to be a shared cache, like
+# Redis or memcached, or the app refuses to start, see SINGLE_PROCESS.
+DB_PIN_CACHE_ALIAS = os.environ.get('DB_PIN_CACHE_ALIAS', 'default')
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Set when the app is served by a single process, like runserver, so a
+# process-local cache is seen by every request. Otherwise the user and
+# recipe response caches are only used with a shared backend.
+SINGLE_PROCESS = os.environ.get('SINGLE_PROCESS', 'false') == 'true'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
+RECIPE_CACHE_ALIAS = os.environ.get('RECIPE_CACHE_ALIAS', 'default')
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+
+# Password hashing runs in this many worker processes, 0 hashes inline.
+# Up to PASSWORD_HASH_QUEUE_SIZE more requests wait for a worker, others
+# wait PASSWORD_HASH_QUEUE_TIMEOUT seconds for room before a 503.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 16))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(
+    os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 2)
+)
+
+# Send each response's SQL, view and render time in a Server-Timing
+# header. The per view histograms are recorded regardless.
+SERVER_TIMING_HEADER = os.environ.get(
+    'SERVER_TIMING_HEADER', 'true'
+) == 'true'
+# Lets a scraper read the metrics with an X-Metrics-Token header instead
+# of an admin login.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+USER_CACHE_ALIAS = os.environ.get('USER_CACHE_ALIAS', 'default')
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', 300))
+# Seconds a user is also kept in process memory, checked against the
+# shared cache on every request.
+USER_LOCAL_CACHE_TIMEOUT = int(os.environ.get('USER_LOCAL_CACHE_TIMEOUT', 5))
+
+# Encode and decode API JSON with orjson when it is installed.
+FAST_JSON = os.environ.get('FAST_JSON', 'true') == 'true'
+
+# Render recipe lists from values() rows instead of RecipeSerializer.
+RECIPE_FAST_LIST = os.environ.get('RECIPE_FAST_LIST', 'true') == 'true'
+
+# Render recipe lists and details from the stored RecipeDocument rows.
+# Takes precedence over RECIPE_FAST_LIST.
+RECIPE_READ_MODEL = os.environ.get('RECIPE_READ_MODEL', 'true') == 'true'
+
+# Answer tag and ingredient autocomplete from a per-process index of each
+# user's names instead of the database.
+RECIPE_AUTOCOMPLETE_LOCAL_INDEX = os.environ.get(
+    'RECIPE_AUTOCOMPLETE_LOCAL_INDEX', 'false'
+) == 'true'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -129,6 +237,9 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+RECIPE_IMAGE_RENDITION_SIZES = (128, 512, 1024)
+RECIPE_RENDITION_WORKERS = int(os.environ.get('RECIPE_RENDITION_WORKERS', 2))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -138,8 +249,17 @@ AUTH_USER_MODEL = 'user.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        'apps.base.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'apps.base.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.user.authentication.CachedJWTAuthentication',
     )
 }
 
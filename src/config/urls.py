@@ -27,6 +27,9 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
+from apps.base.views import DatabasePoolStatsView, MetricsView
+from apps.user.views import PasswordHashingStatsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
@@ -45,6 +48,18 @@ urlpatterns = [
         TokenRefreshView.as_view(),
         name='token_refresh'),
     path('api/recipe/', include('apps.recipe.urls')),
+    path('api/async/recipe/', include('apps.recipe.async_urls')),
+    path(
+        'api/stats/db-pool/',
+        DatabasePoolStatsView.as_view(),
+        name='db-pool-stats',
+    ),
+    path(
+        'api/stats/password-hashing/',
+        PasswordHashingStatsView.as_view(),
+        name='password-hashing-stats',
+    ),
+    path('api/stats/metrics/', MetricsView.as_view(), name='metrics'),
 ]
 
 if settings.DEBUG: